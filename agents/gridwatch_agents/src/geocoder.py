@@ -0,0 +1,167 @@
+# agents/gridwatch_agents/src/geocoder.py
+"""
+Offline geocoder for agent adapters.
+Resolves LLM-reported locations ("Dupont Circle", "14th St NW & U St",
+"1400 block of K Street") against a local gazetteer of landmarks, streets
+and intersections per city (gazetteer.json). No network calls; results are
+memoized, so repeated locations cost a dict lookup.
+
+Lookup order within the city: exact name/alias, intersection of two known
+streets, longest gazetteer name contained in the text, then a difflib fuzzy
+match. None means "not found"; callers fall back to the city center.
+"""
+import os
+import re
+import json
+import math
+import difflib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+GAZETTEER_PATH = os.getenv(
+    "GRIDWATCH_GAZETTEER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+)
+FUZZY_CUTOFF = 0.82
+CITY_RADIUS_KM = 60.0  # a city center further than this from the hint is "no city"
+
+ABBREVIATIONS = {
+    "st": "street", "str": "street", "ave": "avenue", "av": "avenue", "blvd": "boulevard",
+    "rd": "road", "dr": "drive", "ln": "lane", "pl": "place", "pkwy": "parkway", "hwy": "highway",
+    "expy": "expressway", "sq": "square", "ct": "court", "mt": "mount", "ft": "fort",
+    "n": "north", "s": "south", "e": "east", "w": "west",
+    "1st": "first", "2nd": "second", "3rd": "third", "5th": "fifth",
+}
+# Tokens that carry no location on their own (DC quadrants, filler words)
+STOPWORDS = {"the", "of", "near", "area", "vicinity", "nw", "ne", "sw", "se", "in", "on", "around", "by"}
+_INTERSECTION_SPLIT = re.compile(r"\s*(?:&|\band\b|\bat\b|/|@)\s*")
+_BLOCK_OF = re.compile(r"^\s*\d+(?:\s*-\s*\d+)?\s+(?:block\s+of\s+)?")
+
+Coords = Tuple[float, float]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip punctuation and house numbers, expand street abbreviations."""
+    text = _BLOCK_OF.sub("", text.lower().replace("'", ""))
+    tokens = re.findall(r"[a-z0-9]+", text)
+    return " ".join(ABBREVIATIONS.get(t, t) for t in tokens if t not in STOPWORDS)
+
+
+def _distance_km(a: Coords, b: Coords) -> float:
+    dlat = math.radians(b[0] - a[0])
+    dlng = math.radians(b[1] - a[1]) * math.cos(math.radians((a[0] + b[0]) / 2))
+    return 6371.0 * math.hypot(dlat, dlng)
+
+
+class CityIndex:
+    """Normalized-name index for one city."""
+
+    def __init__(self, name: str, data: Dict):
+        self.name = name
+        self.center: Coords = (data["lat"], data["lng"])
+        self.places: Dict[str, Coords] = {}
+        for place, coords in data.get("places", {}).items():
+            self.places[normalize(place)] = tuple(coords)
+        self.intersections: Dict[Tuple[str, ...], Coords] = {}
+        for place, coords in data.get("intersections", {}).items():
+            self.intersections[self._intersection_key(place)] = tuple(coords)
+        for alias, target in data.get("aliases", {}).items():
+            coords = data.get("places", {}).get(target) or data.get("intersections", {}).get(target)
+            if coords:
+                self.places.setdefault(normalize(alias), tuple(coords))
+        # Longest names first so "capitol hill" wins over "capitol"
+        self.names: List[str] = sorted(self.places, key=len, reverse=True)
+
+    @staticmethod
+    def _intersection_key(text: str) -> Tuple[str, ...]:
+        return tuple(sorted(normalize(part) for part in _INTERSECTION_SPLIT.split(text) if normalize(part)))
+
+    def lookup(self, text: str) -> Optional[Coords]:
+        query = normalize(text)
+        if not query:
+            return None
+        if query in self.places:
+            return self.places[query]
+
+        key = self._intersection_key(text)
+        if len(key) > 1:
+            if key in self.intersections:
+                return self.intersections[key]
+            # "14th St NW & U St" is known, "14th St & Some Alley" falls back to 14th St
+            for part in key:
+                if part in self.places:
+                    return self.places[part]
+
+        padded = f" {query} "
+        for name in self.names:
+            if f" {name} " in padded:
+                return self.places[name]
+
+        for candidate in (query, *key):
+            match = difflib.get_close_matches(candidate, self.names, n=1, cutoff=FUZZY_CUTOFF)
+            if match:
+                return self.places[match[0]]
+        return None
+
+
+class Gazetteer:
+    def __init__(self, path: str = GAZETTEER_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        self.cities: Dict[str, CityIndex] = {
+            name: CityIndex(name, city) for name, city in data["cities"].items()
+        }
+        self._by_normalized = {normalize(name.split(",")[0]): name for name in self.cities}
+
+    def city_for(self, city: Optional[str] = None, near: Optional[Coords] = None) -> Optional[CityIndex]:
+        """Resolve a city by name ("Seattle", "Seattle, WA") or by the nearest center to `near`."""
+        if city:
+            name = city if city in self.cities else self._by_normalized.get(normalize(city.split(",")[0]))
+            if name:
+                return self.cities[name]
+        if near:
+            nearest = min(self.cities.values(), key=lambda c: _distance_km(c.center, near))
+            if _distance_km(nearest.center, near) <= CITY_RADIUS_KM:
+                return nearest
+        return None
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+def get_gazetteer() -> Gazetteer:
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+@lru_cache(maxsize=4096)
+def _geocode(location: str, city: Optional[str], near: Optional[Coords]) -> Optional[Coords]:
+    index = get_gazetteer().city_for(city, near)
+    return index.lookup(location) if index else None
+
+
+def geocode(location: str, city: Optional[str] = None, near: Optional[Coords] = None) -> Optional[Coords]:
+    """
+    Coordinates for `location` in `city` (or the gazetteer city nearest `near`),
+    or None when the gazetteer has no match.
+    """
+    if not location:
+        return None
+    if near is not None:
+        near = (round(near[0], 2), round(near[1], 2))  # keeps the memo key small
+    return _geocode(location.strip(), city, near)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    city = sys.argv[2] if len(sys.argv) > 2 else "Washington, DC"
+    location = sys.argv[1] if len(sys.argv) > 1 else "14th St NW & U St"
+    started = time.perf_counter()
+    result = geocode(location, city)
+    cold_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    geocode(location, city)
+    warm_us = (time.perf_counter() - started) * 1e6
+    print(f"📍 {location!r} in {city}: {result} (cold {cold_ms:.2f}ms incl. load, cached {warm_us:.1f}µs)")
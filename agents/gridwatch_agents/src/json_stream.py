@@ -0,0 +1,225 @@
+# agents/gridwatch_agents/src/json_stream.py
+"""
+Incremental, tolerant parser for LLM digest output.
+Coordinators answer with `{"crime_digest": [{...}, {...}]}` (optionally in
+a ```json fence). JsonItemStream is fed the model text as it streams and
+hands back every object of the first array as soon as its closing brace
+arrives, so adapters can start converting incidents before the model has
+finished. Each item is parsed on its own: one malformed incident no longer
+costs the whole digest, and a truncated answer keeps every complete item.
+
+Common LLM formatting errors are repaired per item: single-quoted strings,
+Python literals (True/False/None), unquoted keys, trailing commas, // comments
+and raw newlines inside strings. Python reprs of digests (str(list)) parse
+the same way, which replaces eval() in the adapters.
+"""
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _next_char(text: str, i: int) -> str:
+    """First character from `i` on that is neither whitespace nor in a // comment ("" at the end)."""
+    n = len(text)
+    while i < n:
+        if text[i].isspace():
+            i += 1
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+        else:
+            return text[i]
+    return ""
+
+
+def repair_json(text: str) -> str:
+    """Rewrite near-JSON (Python reprs, sloppy LLM output) into JSON."""
+    out: List[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            # Copy a string, re-delimiting single-quoted ones with double quotes
+            j, chars = i + 1, []
+            while j < n and text[j] != c:
+                if text[j] == "\\" and j + 1 < n:
+                    chars.append("'" if c == "'" and text[j + 1] == "'" else text[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if c == "'" and text[j] == '"' else text[j])
+                j += 1
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(json.dumps(word) if _next_char(text, j) == ":" else _LITERALS.get(word, word))
+            i = j
+        elif c == "," and _next_char(text, i + 1) in ("}", "]"):
+            i += 1  # trailing comma, possibly followed by a comment
+        elif c == "/" and text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def loads_tolerant(text: str) -> Any:
+    """json.loads, falling back to repair_json; raises ValueError if both fail."""
+    text = _FENCE.sub("", text.strip())
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return json.loads(repair_json(text), strict=False)
+
+
+class JsonItemStream:
+    """
+    Feed streamed text with feed(); objects of the first JSON array are
+    returned (and passed to `on_item`) as each one completes. close() ends
+    the stream and returns all items; an unterminated last item is dropped.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_item = on_item
+        self.items: List[Dict[str, Any]] = []
+        self.skipped = 0
+        self.text_len = 0
+        self._in_array = False
+        self._done = False
+        self._buf: List[str] = []  # current item
+        self._stack: List[str] = []  # closers expected inside the current item
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._slash = False  # last character was a "/" outside a string
+        self._comment = False  # inside a // comment
+
+    def reset(self) -> None:
+        """Forget a half-scanned answer (e.g. text before a tool call); emitted items stay."""
+        self._in_array = self._done = False
+        self.text_len = 0
+        self._buf, self._stack = [], []
+        self._quote, self._escape = None, False
+        self._slash = self._comment = False
+
+    def _scan_string(self, c: str) -> bool:
+        """Track string state; True if `c` was inside (or delimited) a string."""
+        if self._quote:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == self._quote:
+                self._quote = None
+            return True
+        if c == '"' or (c == "'" and self._stack):  # apostrophes between items are prose
+            self._quote = c
+            return True
+        return False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        emitted: List[Dict[str, Any]] = []
+        if not chunk or self._done:
+            return emitted
+        self.text_len += len(chunk)
+        for c in chunk:
+            if not self._in_array:
+                if not self._scan_string(c) and c == "[":
+                    self._in_array = True
+                continue
+            if self._comment:
+                # Braces and quotes in a // comment neither open nor close anything
+                self._comment = c != "\n"
+                if self._stack:
+                    self._buf.append(c)
+                continue
+            if not self._stack:
+                # Between items: wait for the next object or the end of the array
+                if c == "{":
+                    self._buf, self._stack = [c], ["}"]
+                elif c == "]":
+                    self._done = True
+                    break
+                self._comment = self._slash and c == "/"
+                self._slash = c == "/" and not self._comment
+                continue
+            self._buf.append(c)
+            if self._scan_string(c):
+                self._slash = False
+                continue
+            self._comment = self._slash and c == "/"
+            self._slash = c == "/" and not self._comment
+            if c in _CLOSERS:
+                self._stack.append(_CLOSERS[c])
+            elif c in "}]":
+                if c == self._stack[-1]:
+                    self._stack.pop()
+                if not self._stack:
+                    item = self._finish_item("".join(self._buf))
+                    if item is not None:
+                        emitted.append(item)
+        return emitted
+
+    def _finish_item(self, text: str) -> Optional[Dict[str, Any]]:
+        self._buf = []
+        try:
+            item = loads_tolerant(text)
+        except ValueError as e:
+            self.skipped += 1
+            logger.warning(f"Skipping malformed digest item ({e}): {text[:120]}")
+            return None
+        if not isinstance(item, dict):
+            self.skipped += 1
+            return None
+        self.items.append(item)
+        if self.on_item is not None:
+            try:
+                self.on_item(item)
+            except Exception as e:  # a broken consumer must not stop parsing
+                logger.error(f"Digest item callback failed: {e}")
+        return item
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._stack:
+            self.skipped += 1
+            logger.warning(f"Dropping truncated digest item: {''.join(self._buf)[:120]}")
+            self._buf, self._stack = [], []
+        self._done = True
+        return self.items
+
+
+def parse_items(digest: Any, key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Incident dicts from a digest in any shape the coordinators produce: a
+    list, a dict holding the list (under `key` or as its first list value),
+    or the same as JSON / Python-repr text.
+    """
+    if isinstance(digest, str):
+        stream = JsonItemStream()
+        stream.feed(digest)
+        items = stream.close()
+        if items:
+            return items
+        try:
+            digest = loads_tolerant(digest)
+        except ValueError:
+            return []
+    if isinstance(digest, dict):
+        value = digest.get(key) if key else None
+        if value is None:
+            value = next((v for v in digest.values() if isinstance(v, list)), None)
+        return parse_items(value) if value is not None else [digest]
+    if isinstance(digest, list):
+        return [item for item in digest if isinstance(item, dict)]
+    return []
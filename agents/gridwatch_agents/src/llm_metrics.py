@@ -0,0 +1,321 @@
+# agents/gridwatch_agents/src/llm_metrics.py
+"""
+Latency, token and cost metrics for ADK agents.
+instrument(agent) attaches callbacks to a coordinator, its sub-agents and
+the agents behind its AgentTools (police, news, social_media, roads,
+escorts, public_alerts, bescom, ...). Every coordinator applies it where it
+builds its agent, so all entry points are measured. The callbacks record
+one JSON line per event in GRIDWATCH_LLM_METRICS (default llm_metrics.jsonl):
+
+- model: one Gemini call, with latency, usage_metadata token counts
+  (prompt / output / thinking / cached), function calls requested, Google
+  Search queries issued and the estimated cost from PRICES
+- tool: one tool execution (e.g. an AgentTool running a sub-agent)
+- agent: one agent run, start to finish
+
+Each line carries the agent, the model and the city of the surrounding
+metrics_context(). Callbacks only queue the line; a writer thread appends
+whatever is queued in one write, so the event loop never touches the disk.
+
+`python llm_metrics.py [file] [hours]` aggregates a file per agent/model and
+per city, so models can be picked per agent from data.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_PATH = os.getenv("GRIDWATCH_LLM_METRICS", "llm_metrics.jsonl")
+
+# USD per 1M tokens (input, output); thinking tokens bill as output.
+# Longest matching prefix wins; GRIDWATCH_LLM_PRICES ('{"model": [in, out]}') overrides.
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("GRIDWATCH_LLM_PRICES", "{}")).items()})
+
+_city: ContextVar[str] = ContextVar("gridwatch_metrics_city", default="")
+
+
+@contextmanager
+def metrics_context(city: Optional[str] = None) -> Iterator[None]:
+    """Attribute the model calls made inside the block (and tasks it spawns) to `city`."""
+    token = _city.set(city or "")
+    try:
+        yield
+    finally:
+        _city.reset(token)
+
+
+def price(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    name = (model or "").split("/")[-1]
+    match = max((p for p in PRICES if name.startswith(p)), key=len, default=None)
+    if match is None:
+        return 0.0
+    per_in, per_out = PRICES[match]
+    return (prompt_tokens * per_in + output_tokens * per_out) / 1_000_000
+
+
+class MetricsRecorder:
+    """Appends metric events to a JSONL file; safe to share between threads and processes."""
+
+    def __init__(self, path: str = METRICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple, List[Tuple[float, str]]] = defaultdict(list)
+        self._lines: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    def record(self, kind: str, **fields: Any) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), "kind": kind, "city": _city.get(), **fields},
+                          separators=(",", ":"), default=str)
+        self._lines.put(line)
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="llm-metrics-writer", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        fd = None
+        while True:
+            lines = [self._lines.get()]
+            while True:
+                try:
+                    lines.append(self._lines.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in lines
+            lines = [line for line in lines if line is not None]
+            if lines:
+                try:
+                    if fd is None:
+                        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    # One O_APPEND write per batch: workers sharing the file never interleave mid-line
+                    os.write(fd, ("\n".join(lines) + "\n").encode("utf-8"))
+                except OSError:
+                    pass  # metrics never break an agent run
+            if closing:
+                if fd is not None:
+                    os.close(fd)
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out every queued event and stop the writer thread."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._lines.put(None)
+        if writer is not None:
+            writer.join(timeout)
+
+    def start(self, key: Tuple, label: str = "") -> None:
+        with self._lock:
+            self._started[key].append((time.perf_counter(), label))
+
+    def stop(self, key: Tuple) -> Tuple[float, str]:
+        """(elapsed ms, label) for the newest start() under `key`."""
+        with self._lock:
+            stack = self._started.get(key)
+            if not stack:
+                return 0.0, ""
+            started, label = stack.pop()
+            if not stack:
+                del self._started[key]
+        return (time.perf_counter() - started) * 1000, label
+
+
+_recorder: Optional[MetricsRecorder] = None
+
+
+def get_recorder() -> MetricsRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = MetricsRecorder(os.getenv("GRIDWATCH_LLM_METRICS", METRICS_PATH))
+    return _recorder
+
+
+def close() -> None:
+    """Flush queued events to disk (also run at exit)."""
+    if _recorder is not None:
+        _recorder.close()
+
+
+atexit.register(close)
+
+
+# -- ADK callbacks -------------------------------------------------------------------
+def _before_agent(callback_context):
+    get_recorder().start(("agent", callback_context.invocation_id, callback_context.agent_name))
+    return None
+
+
+def _after_agent(callback_context):
+    elapsed_ms, _ = get_recorder().stop(("agent", callback_context.invocation_id, callback_context.agent_name))
+    get_recorder().record("agent", agent=callback_context.agent_name, latency_ms=round(elapsed_ms, 1))
+    return None
+
+
+def _before_model(callback_context, llm_request):
+    get_recorder().start(("model", callback_context.invocation_id, callback_context.agent_name),
+                         getattr(llm_request, "model", "") or "")
+    return None
+
+
+def _after_model(callback_context, llm_response):
+    if getattr(llm_response, "partial", False):
+        return None  # streamed chunk; the final response carries the usage
+    elapsed_ms, model = get_recorder().stop(("model", callback_context.invocation_id, callback_context.agent_name))
+    usage = getattr(llm_response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    thought_tokens = getattr(usage, "thoughts_token_count", None) or 0
+    content = getattr(llm_response, "content", None)
+    function_calls = sum(1 for part in (getattr(content, "parts", None) or []) if getattr(part, "function_call", None))
+    grounding = getattr(llm_response, "grounding_metadata", None)
+    searches = len(getattr(grounding, "web_search_queries", None) or [])
+    model = model or getattr(llm_response, "model_version", "") or ""
+    get_recorder().record(
+        "model",
+        agent=callback_context.agent_name,
+        model=model,
+        latency_ms=round(elapsed_ms, 1),
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        thought_tokens=thought_tokens,
+        cached_tokens=getattr(usage, "cached_content_token_count", None) or 0,
+        function_calls=function_calls,
+        search_queries=searches,
+        error=getattr(llm_response, "error_code", None),
+        cost_usd=round(price(model, prompt_tokens, output_tokens + thought_tokens), 6),
+    )
+    return None
+
+
+def _before_tool(tool, args, tool_context):
+    get_recorder().start(("tool", tool_context.invocation_id, getattr(tool_context, "function_call_id", None), tool.name))
+    return None
+
+
+def _after_tool(tool, args, tool_context, tool_response):
+    key = ("tool", tool_context.invocation_id, getattr(tool_context, "function_call_id", None), tool.name)
+    elapsed_ms, _ = get_recorder().stop(key)
+    get_recorder().record("tool", agent=tool_context.agent_name, tool=tool.name, latency_ms=round(elapsed_ms, 1))
+    return None
+
+
+def _attach(agent, name: str, callback: Callable) -> None:
+    if not hasattr(agent, name):
+        return
+    existing = getattr(agent, name)
+    if existing is None:
+        setattr(agent, name, callback)
+    elif isinstance(existing, list):
+        if callback not in existing:
+            setattr(agent, name, [*existing, callback])
+    elif existing is not callback:
+        setattr(agent, name, [existing, callback])
+
+
+def instrument(agent) -> Any:
+    """Attach the metric callbacks to `agent` and every agent below it (idempotent); returns `agent`."""
+    seen = set()
+
+    def visit(node) -> None:
+        if node is None or id(node) in seen:
+            return
+        seen.add(id(node))
+        _attach(node, "before_agent_callback", _before_agent)
+        _attach(node, "after_agent_callback", _after_agent)
+        _attach(node, "before_model_callback", _before_model)
+        _attach(node, "after_model_callback", _after_model)
+        _attach(node, "before_tool_callback", _before_tool)
+        _attach(node, "after_tool_callback", _after_tool)
+        for sub in getattr(node, "sub_agents", None) or []:
+            visit(sub)
+        for tool in getattr(node, "tools", None) or []:
+            visit(getattr(tool, "agent", None))  # AgentTool
+
+    visit(agent)
+    return agent
+
+
+# -- report --------------------------------------------------------------------------
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def aggregate(path: str = METRICS_PATH, since: float = 0.0) -> Dict[str, Dict[Tuple, Dict[str, Any]]]:
+    """Totals per (agent, model), per city and per agent run from a metrics file."""
+    by_model: Dict[Tuple, Dict[str, Any]] = defaultdict(lambda: defaultdict(float))
+    by_city: Dict[Tuple, Dict[str, Any]] = defaultdict(lambda: defaultdict(float))
+    runs: Dict[Tuple, Dict[str, Any]] = defaultdict(lambda: defaultdict(float))
+    latencies: Dict[Tuple, List[float]] = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("ts", 0) < since:
+                continue
+            if event["kind"] == "model":
+                for key, totals in (((event["agent"], event["model"]), by_model), ((event.get("city") or "-",), by_city)):
+                    row = totals[key]
+                    row["calls"] += 1
+                    row["errors"] += bool(event.get("error"))
+                    for field in ("prompt_tokens", "output_tokens", "thought_tokens", "function_calls",
+                                  "search_queries", "cost_usd", "latency_ms"):
+                        row[field] += event.get(field) or 0
+                latencies[(event["agent"], event["model"])].append(event["latency_ms"])
+            elif event["kind"] in ("agent", "tool"):
+                row = runs[(event["kind"], event.get("tool") or event["agent"])]
+                row["count"] += 1
+                row["latency_ms"] += event["latency_ms"]
+                row["max_ms"] = max(row["max_ms"], event["latency_ms"])
+    for key, row in by_model.items():
+        row["p50_ms"] = _percentile(latencies[key], 0.5)
+        row["p95_ms"] = _percentile(latencies[key], 0.95)
+    return {"models": by_model, "cities": by_city, "runs": runs}
+
+
+def report(path: str = METRICS_PATH, since: float = 0.0) -> str:
+    totals = aggregate(path, since)
+    lines = [f"{'agent':<28} {'model':<22} {'calls':>6} {'p50 s':>7} {'p95 s':>7} "
+             f"{'in tok':>9} {'out tok':>9} {'think':>8} {'tools':>6} {'search':>6} {'USD':>9}"]
+    for (agent, model), row in sorted(totals["models"].items(), key=lambda kv: -kv[1]["cost_usd"]):
+        lines.append(f"{agent:<28} {model:<22} {row['calls']:>6.0f} {row['p50_ms'] / 1000:>7.1f} "
+                     f"{row['p95_ms'] / 1000:>7.1f} {row['prompt_tokens']:>9.0f} {row['output_tokens']:>9.0f} "
+                     f"{row['thought_tokens']:>8.0f} {row['function_calls']:>6.0f} {row['search_queries']:>6.0f} "
+                     f"{row['cost_usd']:>9.4f}")
+    lines.append("")
+    lines.append(f"{'city':<28} {'calls':>6} {'model s':>9} {'USD':>9}")
+    for (city,), row in sorted(totals["cities"].items(), key=lambda kv: -kv[1]["cost_usd"]):
+        lines.append(f"{city:<28} {row['calls']:>6.0f} {row['latency_ms'] / 1000:>9.1f} {row['cost_usd']:>9.4f}")
+    lines.append("")
+    lines.append(f"{'agent run / tool':<28} {'count':>6} {'mean s':>8} {'max s':>8}")
+    for (kind, name), row in sorted(totals["runs"].items(), key=lambda kv: -kv[1]["latency_ms"]):
+        label = f"{name} ({kind})"
+        lines.append(f"{label:<28} {row['count']:>6.0f} {row['latency_ms'] / row['count'] / 1000:>8.1f} "
+                     f"{row['max_ms'] / 1000:>8.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_PATH
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    print(f"📈 LLM metrics from {path}" + (f" (last {hours:g} h)" if hours else ""))
+    print(report(path, since=time.time() - hours * 3600 if hours else 0.0))
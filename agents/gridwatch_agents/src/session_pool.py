@@ -0,0 +1,112 @@
+# agents/gridwatch_agents/src/session_pool.py
+"""
+Session lifecycle for the coordinators' shared InMemorySessionService.
+Every digest used to create a uuid session that was never deleted, so a
+long-running worker kept every conversation it ever had. SessionPool hands
+out one session per run and cleans up after it:
+
+- evict (default): the session is deleted as soon as the run completes
+- reuse: one session per key (e.g. the city) is kept and reused, and
+  replaced after max_reuses runs so its event history stays bounded. Runs
+  that fail, or that find the key's session busy, get a throwaway session.
+
+GRIDWATCH_SESSION_MODE / GRIDWATCH_SESSION_MAX_REUSES pick the policy.
+rss_mb() reports this process's resident memory for the worker watermark.
+"""
+import os
+import uuid
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_MODE = os.getenv("GRIDWATCH_SESSION_MODE", "evict")
+MAX_REUSES = int(os.getenv("GRIDWATCH_SESSION_MAX_REUSES", "20"))
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class SessionPool:
+    """
+    Args:
+        session_service: The coordinator's (InMemory)SessionService
+        app_name / user_id: Identity the coordinator's runner uses
+        mode: "evict" or "reuse"
+        max_reuses: Runs a reused session serves before it is replaced
+    """
+
+    def __init__(self, session_service, app_name: str, user_id: str,
+                 mode: str = SESSION_MODE, max_reuses: int = MAX_REUSES):
+        if mode not in ("evict", "reuse"):
+            raise ValueError(f"Unknown session mode {mode!r} (expected 'evict' or 'reuse')")
+        self.session_service = session_service
+        self.app_name = app_name
+        self.user_id = user_id
+        self.mode = mode
+        self.max_reuses = max_reuses
+        self.counters = {"created": 0, "deleted": 0, "reused": 0}
+        self._kept: Dict[str, Tuple[str, int]] = {}  # key -> (session_id, runs served)
+        self._busy: Set[str] = set()
+
+    async def _create(self, state: Optional[Dict[str, Any]]) -> str:
+        session_id = uuid.uuid4().hex
+        await self.session_service.create_session(
+            app_name=self.app_name, user_id=self.user_id, session_id=session_id, state=state
+        )
+        self.counters["created"] += 1
+        return session_id
+
+    async def _delete(self, session_id: str) -> None:
+        try:
+            await self.session_service.delete_session(
+                app_name=self.app_name, user_id=self.user_id, session_id=session_id
+            )
+            self.counters["deleted"] += 1
+        except Exception as e:  # never fail a finished run over cleanup
+            logger.warning(f"Could not delete session {session_id}: {e}")
+
+    @asynccontextmanager
+    async def session(self, key: Optional[str] = None,
+                      state: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Session id for one run; deleted afterwards unless kept for reuse under `key`."""
+        reuse = self.mode == "reuse" and key is not None and key not in self._busy
+        session_id, runs = self._kept.pop(key, (None, 0)) if reuse else (None, 0)
+        if session_id is None:
+            session_id = await self._create(state)
+        else:
+            self.counters["reused"] += 1
+        if reuse:
+            self._busy.add(key)
+
+        ok = False
+        try:
+            yield session_id
+            ok = True
+        finally:
+            if reuse:
+                self._busy.discard(key)
+            if reuse and ok and runs + 1 < self.max_reuses:
+                self._kept[key] = (session_id, runs + 1)
+            else:
+                await self._delete(session_id)
+
+    async def clear(self) -> None:
+        """Delete every kept session."""
+        kept, self._kept = self._kept, {}
+        for session_id, _ in kept.values():
+            await self._delete(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "live": self.counters["created"] - self.counters["deleted"],
+                "kept": len(self._kept), "mode": self.mode}
@@ -0,0 +1,329 @@
+"""
+Incident Archive
+Time-partitioned local history of evidence and fused incidents.
+
+Records are buffered in memory and flushed by a background writer thread
+(ingestion never waits on disk) as compressed NumPy column files into one
+directory per hour:
+
+    <root>/<kind>/<YYYY-MM-DDTHH>/part-<millis>-<pid>-<seq>.npz
+
+Each part stores numeric columns (ts, lat, lng, severity, confidence), a type
+column and the full JSON record as a byte blob with offsets, so no pickling is
+involved. Once an hour is closed the writer compacts its parts into a single
+file, so a week is at most 168 parts per kind. Queries prune partitions by
+directory name, scan the columns with vectorised masks and decode only the
+matching JSON rows. Sealed parts never change, so their columns are cached
+after the first read. `python bench_archive.py` times a one-week query.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KINDS = ("evidence", "incidents")
+_HOUR_FMT = "%Y-%m-%dT%H"
+_COLUMNS = ("ts", "lat", "lng", "severity", "confidence", "type")
+# A compaction lock older than this was left behind by a crashed process
+_STALE_LOCK_S = 600
+
+
+def _epoch(ts: Optional[datetime]) -> float:
+    if ts is None:
+        return datetime.now(timezone.utc).timestamp()
+    if ts.tzinfo is None:  # models use naive UTC
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _hour_key(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(_HOUR_FMT)
+
+
+class IncidentArchive:
+    """
+    Hourly-partitioned columnar archive on local disk.
+
+    Args:
+        root: Archive directory
+        flush_rows: Flush a kind's buffer once it holds this many rows
+        flush_seconds: ...or once its oldest buffered row is this old
+        cache_parts: Number of decoded part files kept in memory
+        compact_after: Seconds after the end of an hour before its parts are
+            merged, leaving late rows time to land
+    """
+
+    def __init__(self, root: str, flush_rows: int = 2000, flush_seconds: int = 60, cache_parts: int = 512,
+                 compact_after: int = 300):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._buffers: Dict[str, List[Tuple[float, float, float, float, float, str, bytes]]] = {k: [] for k in KINDS}
+        self._buffered_since: Dict[str, float] = {}
+        self._parts: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._cache_parts = cache_parts
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        # Held while a query lists and reads parts, and while compaction swaps them
+        self._swap_lock = threading.Lock()
+        self._seq = 0
+        self._compacted: Dict[str, set] = {k: set() for k in KINDS}  # hours already down to one part
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    # -- background writer ---------------------------------------------------
+    def _ensure_writer(self) -> None:
+        if self._writer is None and not self._closed.is_set():
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="archive-writer", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(timeout=self.flush_seconds)
+            self._wake.clear()
+            try:
+                for kind in KINDS:
+                    with self._lock:
+                        since = self._buffered_since.get(kind)
+                        due = bool(self._buffers[kind]) and (
+                            len(self._buffers[kind]) >= self.flush_rows
+                            or monotonic() - since >= self.flush_seconds)
+                    if due:
+                        self.flush(kind)
+                self.compact()
+            except Exception as e:  # keep archiving after a transient disk error
+                print(f"⚠️ Archive writer error: {e}")
+
+    def close(self) -> None:
+        """Stop the writer and write out everything still buffered."""
+        self._closed.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=30)
+        self.flush()
+
+    # -- writes --------------------------------------------------------------
+    def _append(self, kind: str, ts: float, lat: float, lng: float, severity: float,
+                confidence: float, event_type: str, record: Dict) -> None:
+        blob = json.dumps(record, default=str, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            buf = self._buffers[kind]
+            if not buf:
+                self._buffered_since[kind] = monotonic()
+            buf.append((ts, lat, lng, severity, confidence, event_type, blob))
+            due = len(buf) >= self.flush_rows
+        self._ensure_writer()
+        if due:
+            self._wake.set()  # written on the archive thread, not the caller's
+
+    def add_evidence(self, ev) -> None:
+        raw = ev.raw if isinstance(ev.raw, dict) else {}
+        try:
+            severity = float(raw.get("severity", np.nan))
+        except (TypeError, ValueError):
+            severity = np.nan
+        self._append("evidence", _epoch(ev.detected_at), ev.lat, ev.lng, severity,
+                     ev.confidence, ev.type, ev.model_dump(mode="json"))
+
+    def add_incident(self, inc) -> None:
+        self._append("incidents", _epoch(inc.updated_at or inc.created_at), inc.lat, inc.lng,
+                     inc.severity, inc.confidence, inc.type, inc.model_dump(mode="json"))
+
+    def on_evidence_added(self, ev, added_at: Optional[float] = None) -> None:
+        """EvidenceBus listener hook: archive every ingested evidence item."""
+        self.add_evidence(ev)
+
+    def on_evidence_expired(self, ev, added_at: Optional[float] = None) -> None:
+        """EvidenceBus listener hook: a no-op, history outlives the live evidence window."""
+
+    def flush(self, kind: Optional[str] = None) -> None:
+        """Write buffered rows to their hourly partitions."""
+        for k in ([kind] if kind else KINDS):
+            with self._lock:
+                rows, self._buffers[k] = self._buffers[k], []
+            if not rows:
+                continue
+            by_hour: Dict[str, list] = {}
+            for row in rows:
+                by_hour.setdefault(_hour_key(row[0]), []).append(row)
+            for hour, hour_rows in by_hour.items():
+                blobs = [r[6] for r in hour_rows]
+                offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+                offsets[1:] = np.cumsum([len(b) for b in blobs])
+                self._write_part(k, hour, {
+                    "ts": np.array([r[0] for r in hour_rows], dtype=np.float64),
+                    "lat": np.array([r[1] for r in hour_rows], dtype=np.float64),
+                    "lng": np.array([r[2] for r in hour_rows], dtype=np.float64),
+                    "severity": np.array([r[3] for r in hour_rows], dtype=np.float32),
+                    "confidence": np.array([r[4] for r in hour_rows], dtype=np.float32),
+                    "type": np.array([r[5] for r in hour_rows]),
+                    "payload": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+                    "offsets": offsets,
+                })
+
+    def _write_part(self, kind: str, hour: str, columns: Dict[str, np.ndarray]) -> str:
+        part_dir = os.path.join(self.root, kind, hour)
+        os.makedirs(part_dir, exist_ok=True)
+        with self._lock:
+            self._seq += 1
+            name = f"part-{int(datetime.now(timezone.utc).timestamp() * 1000)}-{os.getpid()}-{self._seq:06d}.npz"
+            self._compacted[kind].discard(hour)  # a late row reopened a compacted hour
+        tmp = os.path.join(part_dir, f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **columns)
+        path = os.path.join(part_dir, name)
+        os.replace(tmp, path)  # readers never see half-written parts
+        return path
+
+    # -- compaction ----------------------------------------------------------
+    def compact(self, now: Optional[float] = None) -> int:
+        """Merge the parts of every closed hour into one; returns the number of hours compacted."""
+        cutoff = _hour_key((now if now is not None else time.time()) - self.compact_after - 3600)
+        merged = 0
+        for kind in KINDS:
+            base = os.path.join(self.root, kind)
+            if not os.path.isdir(base):
+                continue
+            for hour in sorted(os.listdir(base)):
+                if hour > cutoff or hour in self._compacted[kind]:
+                    continue
+                if self._compact_hour(kind, hour):
+                    merged += 1
+        return merged
+
+    def _compact_hour(self, kind: str, hour: str) -> bool:
+        part_dir = os.path.join(self.root, kind, hour)
+        names = sorted(n for n in os.listdir(part_dir) if n.endswith(".npz"))
+        if len(names) <= 1:
+            with self._lock:
+                self._compacted[kind].add(hour)
+            return False
+        # Several backend processes can share an archive; one compacts an hour at a time
+        lock_path = os.path.join(part_dir, ".compacting")
+        try:
+            if time.time() - os.path.getmtime(lock_path) > _STALE_LOCK_S:
+                os.unlink(lock_path)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        try:
+            paths = [os.path.join(part_dir, n) for n in names]
+            parts = [self._read(p) for p in paths]
+            columns = {c: np.concatenate([p[c] for p in parts]) for c in _COLUMNS}
+            columns["payload"] = np.concatenate([p["payload"] for p in parts])
+            shifts = np.cumsum([0] + [p["payload"].size for p in parts[:-1]])
+            columns["offsets"] = np.concatenate(
+                [np.zeros(1, dtype=np.int64)] + [p["offsets"][1:] + shift for p, shift in zip(parts, shifts)])
+            merged = self._write_part(kind, hour, columns)
+            with self._swap_lock:
+                for path in paths:
+                    os.unlink(path)
+                with self._lock:
+                    for path in paths:
+                        self._parts.pop(path, None)
+                    self._compacted[kind].add(hour)
+            print(f"🗜️ Archive {kind}/{hour}: {len(paths)} parts -> {os.path.basename(merged)}")
+            return True
+        finally:
+            os.unlink(lock_path)
+
+    # -- reads ---------------------------------------------------------------
+    @staticmethod
+    def _read(path: str) -> Dict[str, np.ndarray]:
+        with np.load(path, allow_pickle=False) as npz:
+            return {k: npz[k] for k in npz.files}
+
+    def _load(self, path: str) -> Dict[str, np.ndarray]:
+        with self._lock:
+            cols = self._parts.get(path)
+            if cols is not None:
+                self._parts.move_to_end(path)
+                return cols
+        cols = self._read(path)
+        with self._lock:
+            self._parts[path] = cols
+            if len(self._parts) > self._cache_parts:
+                self._parts.popitem(last=False)
+        return cols
+
+    def _partitions(self, kind: str, start: float, end: float) -> List[str]:
+        base = os.path.join(self.root, kind)
+        if not os.path.isdir(base):
+            return []
+        lo, hi = _hour_key(start), _hour_key(end)
+        # Hour keys sort lexicographically in time order
+        return sorted(os.path.join(base, d) for d in os.listdir(base) if lo <= d <= hi)
+
+    def _scan_partition(self, part_dir: str, t0: float, t1: float, bbox, wanted) -> List[Tuple[Dict, np.ndarray]]:
+        """(columns, matching rows) for every part of one hour."""
+        hits = []
+        for name in os.listdir(part_dir):
+            if not name.endswith(".npz"):
+                continue
+            cols = self._load(os.path.join(part_dir, name))
+            mask = (cols["ts"] >= t0) & (cols["ts"] <= t1)
+            if bbox is not None:
+                min_lng, min_lat, max_lng, max_lat = bbox
+                mask &= ((cols["lng"] >= min_lng) & (cols["lng"] <= max_lng)
+                         & (cols["lat"] >= min_lat) & (cols["lat"] <= max_lat))
+            if wanted is not None:
+                mask &= np.isin(cols["type"], wanted)
+            rows = np.flatnonzero(mask)
+            if rows.size:
+                hits.append((cols, rows))
+        return hits
+
+    def query(
+        self,
+        kind: str,
+        start: datetime,
+        end: datetime,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        types: Optional[Sequence[str]] = None,
+        limit: int = 1000,
+    ) -> List[Dict]:
+        """Records of `kind` between start and end, newest first."""
+        self.flush(kind)
+        t0, t1 = _epoch(start), _epoch(end)
+        wanted = np.array(list(types)) if types else None
+
+        parts: List[Dict[str, np.ndarray]] = []
+        ts_hits, part_idx, row_idx = [], [], []
+        with self._swap_lock:  # this process's compaction must not delete parts mid-scan
+            for part_dir in self._partitions(kind, t0, t1):
+                try:
+                    hits = self._scan_partition(part_dir, t0, t1, bbox, wanted)
+                except FileNotFoundError:
+                    # Another process compacted this hour under us; its merged part is there now
+                    hits = self._scan_partition(part_dir, t0, t1, bbox, wanted)
+                for cols, rows in hits:
+                    ts_hits.append(cols["ts"][rows])
+                    part_idx.append(np.full(rows.size, len(parts)))
+                    row_idx.append(rows)
+                    parts.append(cols)
+
+        if not parts:
+            return []
+        ts_all = np.concatenate(ts_hits)
+        p_all, r_all = np.concatenate(part_idx), np.concatenate(row_idx)
+        # Only the newest `limit` rows get their JSON decoded
+        order = np.argsort(-ts_all, kind="stable")[:limit]
+        out = []
+        for p, r in zip(p_all[order], r_all[order]):
+            cols = parts[p]
+            blob = cols["payload"][cols["offsets"][r]:cols["offsets"][r + 1]].tobytes()
+            out.append(json.loads(blob))
+        return out
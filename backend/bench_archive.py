@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark one-week archive queries.
+Writes a week of synthetic evidence the way the live writer does (one part
+per flush), then times a week-long bbox + type query before and after the
+closed hours are compacted, cold (fresh archive, nothing cached) and warm.
+
+Usage: python bench_archive.py [rows_per_hour] [flushes_per_hour]
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from archive import IncidentArchive
+from models import Evidence
+
+TYPES = ["congestion", "accident", "road_closure", "power_outage", "water_main_break", "crime"]
+HOURS = 7 * 24
+
+
+def fill(root: str, rows_per_hour: int, flushes_per_hour: int, end: datetime) -> None:
+    # compact_after keeps the writer from compacting while the week is being written
+    archive = IncidentArchive(root, flush_rows=10 ** 9, compact_after=10 ** 9)
+    per_flush = max(1, rows_per_hour // flushes_per_hour)
+    for hour in range(HOURS):
+        start = end - timedelta(hours=HOURS - hour)
+        for i in range(rows_per_hour):
+            archive.add_evidence(Evidence(
+                evidence_id=f"bench_{hour}_{i}",
+                source_type="open311",
+                type=random.choice(TYPES),
+                lat=38.9072 + random.uniform(-0.05, 0.05),
+                lng=-77.0369 + random.uniform(-0.05, 0.05),
+                raw={"severity": random.random(), "city": "Washington, DC"},
+                detected_at=(start + timedelta(seconds=i * 3600 / rows_per_hour)).replace(tzinfo=None),
+            ))
+            if (i + 1) % per_flush == 0:
+                archive.flush("evidence")
+    archive.close()
+
+
+def time_query(root: str, end: datetime) -> (int, float, float):
+    archive = IncidentArchive(root)
+    args = dict(kind="evidence", start=end - timedelta(days=7), end=end,
+                bbox=(-77.06, 38.89, -77.01, 38.93), types=["crime", "accident"])
+    t0 = time.perf_counter()
+    rows = archive.query(**args)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    archive.query(**args)
+    warm = time.perf_counter() - t0
+    return len(rows), cold * 1000, warm * 1000
+
+
+def main():
+    rows_per_hour = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    flushes_per_hour = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    root = tempfile.mkdtemp(prefix="bench_archive_")
+    try:
+        t0 = time.perf_counter()
+        fill(root, rows_per_hour, flushes_per_hour, end)
+        print(f"📦 {rows_per_hour * HOURS} rows over {HOURS} hours, {flushes_per_hour} parts/hour "
+              f"(written in {time.perf_counter() - t0:.1f}s)")
+
+        print(f"\n{'layout':22} {'parts':>7} {'rows':>6} {'cold ms':>9} {'warm ms':>9}")
+        print("-" * 57)
+        rows, cold, warm = time_query(root, end)
+        print(f"{'one part per flush':22} {HOURS * flushes_per_hour:7d} {rows:6d} {cold:9.1f} {warm:9.1f}")
+
+        t0 = time.perf_counter()
+        compacted = IncidentArchive(root).compact(now=end.timestamp() + 3600)
+        compact_s = time.perf_counter() - t0
+        rows, cold, warm = time_query(root, end)
+        print(f"{'compacted hours':22} {compacted:7d} {rows:6d} {cold:9.1f} {warm:9.1f}")
+        print(f"\n🗜️ Compaction took {compact_s:.1f}s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
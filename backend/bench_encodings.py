@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark /incidents response encodings.
+Builds a synthetic incident set through the real fusion pipeline and reports
+bytes on the wire and server-side encode time for each format.
+
+Usage: python bench_encodings.py [num_evidence] [repeats]
+"""
+
+import json
+import random
+import sys
+import time
+from statistics import median
+from typing import Callable, Dict, List
+
+import encoding
+from models import Evidence
+from orchestrator import build_incidents
+from transform import to_public
+
+TYPES = ["congestion", "accident", "road_closure", "power_outage", "water_main_break", "crime"]
+SOURCES = ["open311", "news", "tweet", "manual", "here_incident"]
+
+
+def make_payload(num_evidence: int) -> Dict:
+    evidence = [
+        Evidence(
+            evidence_id=f"bench_{i}",
+            source_type=random.choice(SOURCES),
+            type=random.choice(TYPES),
+            lat=38.9072 + random.uniform(-0.05, 0.05),
+            lng=-77.0369 + random.uniform(-0.05, 0.05),
+            confidence=random.uniform(0.5, 0.95),
+            raw={"area": "Downtown", "city": "Washington, DC"},
+        )
+        for i in range(num_evidence)
+    ]
+    incidents = build_incidents(evidence)
+    return {"data": [to_public(i).model_dump() for i in incidents]}
+
+
+def stdlib_json(payload: Dict) -> bytes:
+    # What FastAPI's default path costs: model_dump + isoformat + json.dumps
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+def time_encoder(fn: Callable[[], bytes], repeats: int) -> (int, float):
+    samples: List[float] = []
+    body = b""
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - t0)
+    return len(body), median(samples) * 1000
+
+
+def main():
+    num_evidence = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    payload = make_payload(num_evidence)
+    print(f"📦 {len(payload['data'])} incidents from {num_evidence} evidence items, {repeats} repeats")
+
+    formats = {
+        "json (stdlib)": lambda: stdlib_json(payload),
+        "json": lambda: encoding.encode_json(payload),
+        "json + gzip": lambda: encoding.compress(encoding.encode_json(payload), "gzip"),
+    }
+    if encoding.brotli is not None:
+        formats["json + br"] = lambda: encoding.compress(encoding.encode_json(payload), "br")
+    if encoding.msgpack is not None:
+        formats["msgpack"] = lambda: encoding.encode_msgpack(payload)
+        formats["msgpack + gzip"] = lambda: encoding.compress(encoding.encode_msgpack(payload), "gzip")
+        if encoding.brotli is not None:
+            formats["msgpack + br"] = lambda: encoding.compress(encoding.encode_msgpack(payload), "br")
+
+    baseline = None
+    print(f"\n{'format':18} {'bytes':>10} {'vs stdlib':>10} {'encode ms':>10}")
+    print("-" * 52)
+    for name, fn in formats.items():
+        size, ms = time_encoder(fn, repeats)
+        baseline = baseline or size
+        print(f"{name:18} {size:10d} {size / baseline:9.0%} {ms:10.2f}")
+
+    missing = [n for n, m in (("orjson", encoding.orjson), ("msgpack", encoding.msgpack),
+                              ("brotli", encoding.brotli)) if m is None]
+    if missing:
+        print(f"\nℹ️  Not installed: {', '.join(missing)} (fallbacks were measured instead)")
+
+
+if __name__ == "__main__":
+    main()
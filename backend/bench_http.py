@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbound HTTP: module-level requests vs the pooled http_client.
+Sends the same sequence of requests both ways and reports latency and how
+many new connections (TCP + TLS handshakes) each approach opened.
+
+Usage: python bench_http.py [url] [count]
+       python bench_http.py https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/significant_hour.geojson 20
+"""
+
+import sys
+import time
+from statistics import median
+from typing import Callable, List
+
+import requests
+
+import http_client
+
+
+def run(fn: Callable[[], requests.Response], count: int) -> List[float]:
+    samples = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        fn().content
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000/health"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"🔌 {count} sequential GETs to {url}\n")
+
+    unpooled = run(lambda: requests.get(url, timeout=http_client.DEFAULT_TIMEOUT), count)
+
+    http_client.reset_stats()
+    pooled = run(lambda: http_client.get(url), count)
+    s = http_client.stats()
+
+    print(f"{'client':16} {'median ms':>10} {'total ms':>10} {'handshakes':>11}")
+    print("-" * 50)
+    # Every module-level call builds a throwaway Session, so each one connects
+    print(f"{'requests.get':16} {median(unpooled):10.1f} {sum(unpooled):10.1f} {count:11d}")
+    print(f"{'http_client.get':16} {median(pooled):10.1f} {sum(pooled):10.1f} {s['connections_opened']:11d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure backend cold start.
+Each run is a fresh interpreter, like a Cloud Run instance. It reports how
+long `import main` takes (what stands between process start and /health
+answering) and how long the Firestore connection takes. Before persistence
+was made lazy, the connection was paid inside the import.
+
+Usage: python bench_startup.py [runs]
+"""
+
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+import db_firestore
+db_firestore._connect()
+t2 = time.perf_counter()
+print(json.dumps({"import": (t1 - t0) * 1000, "connect": (t2 - t1) * 1000, "state": db_firestore.status()}))
+"""
+
+
+def probe(env_overrides: dict) -> dict:
+    env = dict(os.environ, **env_overrides)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=HERE, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int = 10):
+    """Largest cumulative import times of main's direct imports, from -X importtime."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE, env=dict(os.environ, GRIDWATCH_LOCAL_MODE="1"), capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nesting is encoded as two spaces per level; keep only what main
+        # imports directly so submodules don't repeat their parent's time
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    modes = {"firestore": {}, "local mode": {"GRIDWATCH_LOCAL_MODE": "1"}}
+
+    print(f"🚀 Backend cold start, median of {runs} fresh interpreters\n")
+    print(f"{'mode':12} {'import main':>12} {'connect':>10} {'eager (old)':>12}  state")
+    print("-" * 60)
+    for name, env in modes.items():
+        samples = [probe(env) for _ in range(runs)]
+        imp = median(s["import"] for s in samples)
+        conn = median(s["connect"] for s in samples)
+        print(f"{name:12} {imp:10.1f}ms {conn:8.1f}ms {imp + conn:10.1f}ms  {samples[-1]['state']}")
+
+    print("\n⏱️  Slowest imports of main (cumulative):")
+    for us, name in slowest_imports():
+        print(f"   {us / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
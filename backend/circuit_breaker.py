@@ -0,0 +1,202 @@
+"""
+Circuit Breaker
+Per-upstream breakers so a dead or crawling dependency (open-meteo, USGS,
+Gemini, the backend /evidence endpoint) fails fast instead of eating a full
+timeout on every call.
+
+- closed: calls go through; the last `window` outcomes are tracked
+- open: once at least `min_calls` outcomes are recorded and the failure rate
+  reaches `failure_rate` (or the slow-call rate reaches `slow_rate`), calls
+  are refused for `open_s` seconds
+- half-open: after the cooldown one trial call is let through; success
+  closes the circuit, failure reopens it with a doubled cooldown (capped)
+
+A cancelled acall() says nothing about the upstream: it records no outcome
+and, if it was the half-open trial, frees the slot for the next caller.
+
+call()/acall() return (result, stale). While the circuit is open they hand
+back the last good result for the same key with stale=True, or raise
+CircuitOpen when there is none (always, for calls made without a key).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is refused and no last good result is available."""
+
+    def __init__(self, upstream: str, retry_in: float):
+        self.upstream = upstream
+        self.retry_in = retry_in
+        super().__init__(f"{upstream} circuit open, retry in {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Args:
+        name: Upstream name used in logs and stats
+        window: Number of recent outcomes the rates are computed over
+        min_calls: Outcomes needed before the circuit may open
+        failure_rate: Fraction of failed calls that opens the circuit
+        slow_call_s: Calls slower than this count as slow
+        slow_rate: Fraction of slow calls that opens the circuit
+        open_s: First cooldown; doubles on each failed trial up to max_open_s
+    """
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_s: float = 5.0, slow_rate: float = 0.8, open_s: float = 30.0,
+                 max_open_s: float = 600.0):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.slow_rate = slow_rate
+        self.open_s = open_s
+        self.max_open_s = max_open_s
+        self.state = CLOSED
+        self.counters = {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "stale_served": 0, "opened": 0}
+        self._outcomes: deque = deque(maxlen=window)  # (failed, slow)
+        self._cooldown = open_s
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_good: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    # -- state machine -----------------------------------------------------------
+    def retry_in(self) -> float:
+        return max(0.0, self._opened_at + self._cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the half-open trial slot if so)."""
+        with self._lock:
+            if self.state == OPEN and self.retry_in() <= 0:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record(self, ok: bool, elapsed_s: float) -> None:
+        slow = elapsed_s > self.slow_call_s
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["failures"] += not ok
+            self.counters["slow"] += slow
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if ok and not slow:
+                    self.state = CLOSED
+                    self._cooldown = self.open_s
+                    self._outcomes.clear()
+                    print(f"🟢 {self.name} circuit closed")
+                else:
+                    self._open(min(self.max_open_s, self._cooldown * 2))
+                return
+            self._outcomes.append((not ok, slow))
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                n = len(self._outcomes)
+                failed = sum(f for f, _ in self._outcomes) / n
+                slowed = sum(s for _, s in self._outcomes) / n
+                if failed >= self.failure_rate or slowed >= self.slow_rate:
+                    self._open(self.open_s)
+
+    def release(self) -> None:
+        """Give back the half-open trial slot of a call that ended without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open(self, cooldown: float) -> None:
+        self.state = OPEN
+        self._cooldown = cooldown
+        self._opened_at = time.monotonic()
+        self.counters["opened"] += 1
+        print(f"🔴 {self.name} circuit open for {cooldown:.0f}s")
+
+    # -- last good results -------------------------------------------------------
+    def remember(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._last_good[key] = value
+
+    def fallback(self, key: Hashable) -> Any:
+        """Last good result for `key` (counted as stale), or raise CircuitOpen."""
+        with self._lock:
+            if key in self._last_good:
+                self.counters["stale_served"] += 1
+                return self._last_good[key]
+        raise CircuitOpen(self.name, self.retry_in())
+
+    # -- calls -------------------------------------------------------------------
+    def call(self, fn: Callable, *args, key: Hashable = None, **kwargs) -> Tuple[Any, bool]:
+        if not self.allow():
+            return self.fallback(key), True
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        if key is not None:
+            self.remember(key, result)
+        return result, False
+
+    async def acall(self, fn: Callable, *args, key: Hashable = None, **kwargs) -> Tuple[Any, bool]:
+        if not self.allow():
+            return self.fallback(key), True
+        started = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        if key is not None:
+            self.remember(key, result)
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "retry_in_s": round(self.retry_in()) if self.state != CLOSED else 0,
+                    **self.counters}
+
+
+# Per-upstream defaults; slow thresholds follow each caller's timeout
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "open-meteo": {"slow_call_s": 3.0},
+    "usgs": {"slow_call_s": 3.0},
+    "gemini": {"slow_call_s": 120.0, "min_calls": 3, "open_s": 60.0, "max_open_s": 1800.0},
+    "backend": {"slow_call_s": 8.0, "open_s": 15.0, "max_open_s": 300.0},
+}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **config) -> CircuitBreaker:
+    """Shared breaker for an upstream, created on first use."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **{**UPSTREAMS.get(name, {}), **config})
+        return _breakers[name]
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
+
+
+def summary() -> Optional[str]:
+    parts = [f"{name}={s['state']} ({s['failures']}/{s['calls']} failed, {s['rejected']} rejected)"
+             for name, s in stats().items()]
+    return f"🧯 Circuits: {', '.join(parts)}" if parts else None
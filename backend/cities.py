@@ -0,0 +1,91 @@
+"""
+Cities
+The cities GridWatch covers, with their Open311 jurisdiction IDs, and the
+bbox the agents are run with for each. Kept free of dependencies so the
+backend app and the agent runners can import it without the aggregator.
+"""
+
+import math
+from typing import Dict
+
+# City data with coordinates and Open311 jurisdiction IDs
+CITIES = {
+    "Washington, DC": {
+        "lat": 38.9072,
+        "lng": -77.0369,
+        "open311_jurisdiction": "dc.gov",
+        "state": "DC",
+        "radius_m": 3000,
+    },
+    "New York, NY": {
+        "lat": 40.7128,
+        "lng": -74.0060,
+        "open311_jurisdiction": "nyc.gov",
+        "state": "NY",
+        "radius_m": 3000,
+    },
+    "Los Angeles, CA": {
+        "lat": 34.0522,
+        "lng": -118.2437,
+        "open311_jurisdiction": "lacity.gov",
+        "state": "CA",
+        "radius_m": 3000,
+    },
+    "Seattle, WA": {
+        "lat": 47.6062,
+        "lng": -122.3321,
+        "open311_jurisdiction": "seattle.gov",
+        "state": "WA",
+        "radius_m": 3000,
+    },
+    "San Francisco, CA": {
+        "lat": 37.7749,
+        "lng": -122.4194,
+        "open311_jurisdiction": "sfgov.org",
+        "state": "CA",
+        "radius_m": 3000,
+    },
+    "Miami, FL": {
+        "lat": 25.7617,
+        "lng": -80.1918,
+        "open311_jurisdiction": "miamigov.com",
+        "state": "FL",
+        "radius_m": 3000,
+    },
+    "Chicago, IL": {
+        "lat": 41.8781,
+        "lng": -87.6298,
+        "open311_jurisdiction": "chicago.gov",
+        "state": "IL",
+        "radius_m": 3000,
+    },
+    "Dallas, TX": {
+        "lat": 32.7767,
+        "lng": -96.7970,
+        "open311_jurisdiction": "dallascityhall.com",
+        "state": "TX",
+        "radius_m": 3000,
+    },
+    "Las Vegas, NV": {
+        "lat": 36.1699,
+        "lng": -115.1398,
+        "open311_jurisdiction": "lasvegas.gov",
+        "state": "NV",
+        "radius_m": 3000,
+    },
+    "Denver, CO": {
+        "lat": 39.7392,
+        "lng": -104.9903,
+        "open311_jurisdiction": "denvergov.org",
+        "state": "CO",
+        "radius_m": 3000,
+    },
+}
+
+
+def city_bbox(city_data: Dict) -> str:
+    """Square bbox ("min_lng,min_lat,max_lng,max_lat", as the agents take it) around a city center."""
+    d_lat = city_data["radius_m"] / 111_320
+    d_lng = d_lat / max(0.01, abs(math.cos(math.radians(city_data["lat"]))))
+    lat, lng = city_data["lat"], city_data["lng"]
+    return f"{lng - d_lng:.4f},{lat - d_lat:.4f},{lng + d_lng:.4f},{lat + d_lat:.4f}"
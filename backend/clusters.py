@@ -0,0 +1,144 @@
+"""
+Zoom-Level Clusters
+Hierarchical point-cluster index over tracked incidents.
+
+Each zoom level groups incidents into grid cells a quarter of a map tile wide
+(~64 px on a 256 px tile), in the spirit of supercluster. Aggregates per cell
+(count, type breakdown, max severity, centroid) are kept up to date
+incrementally as the registry reports changes, so a query is only a lookup of
+the cells inside the requested bbox. Above MAX_CLUSTER_ZOOM the cells of that
+level are expanded back into their incidents, one cluster each.
+"""
+
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from models import Incident
+from tiles import lnglat_to_world, world_to_lnglat
+
+MAX_CLUSTER_ZOOM = 16  # deepest aggregated level; above it every incident is its own cluster
+CELL_SHIFT = 2         # cells per tile side = 2 ** CELL_SHIFT
+
+Cell = Tuple[int, int]
+
+
+class _Aggregate:
+    __slots__ = ("sum_x", "sum_y", "types", "severity", "max_severity")
+
+    def __init__(self):
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.types: Dict[str, int] = {}
+        self.severity: Dict[str, float] = {}
+        self.max_severity = 0.0
+
+
+class ClusterIndex:
+    """Per-zoom cell aggregates, maintained from `IncidentRegistry` changes."""
+
+    def __init__(self):
+        self._points: Dict[str, Tuple[float, float, str]] = {}
+        self._levels: List[Dict[Cell, _Aggregate]] = [dict() for _ in range(MAX_CLUSTER_ZOOM + 1)]
+        self._lock = Lock()
+
+    @staticmethod
+    def _cell(x: float, y: float, z: int) -> Cell:
+        n = 1 << (z + CELL_SHIFT)
+        return (int(x * n), int(y * n))
+
+    def _add(self, inc: Incident) -> None:
+        x, y = lnglat_to_world(inc.lng, inc.lat)
+        self._points[inc.id] = (x, y, inc.type)
+        for z, level in enumerate(self._levels):
+            agg = level.get(self._cell(x, y, z))
+            if agg is None:
+                agg = level[self._cell(x, y, z)] = _Aggregate()
+            agg.sum_x += x
+            agg.sum_y += y
+            agg.types[inc.type] = agg.types.get(inc.type, 0) + 1
+            agg.severity[inc.id] = inc.severity
+            agg.max_severity = max(agg.max_severity, inc.severity)
+
+    def _remove(self, inc_id: str) -> None:
+        entry = self._points.pop(inc_id, None)
+        if entry is None:
+            return
+        x, y, inc_type = entry
+        for z, level in enumerate(self._levels):
+            cell = self._cell(x, y, z)
+            agg = level[cell]
+            sev = agg.severity.pop(inc_id)
+            if not agg.severity:
+                del level[cell]
+                continue
+            agg.sum_x -= x
+            agg.sum_y -= y
+            agg.types[inc_type] -= 1
+            if not agg.types[inc_type]:
+                del agg.types[inc_type]
+            if sev >= agg.max_severity:
+                agg.max_severity = max(agg.severity.values())
+
+    def apply(self, changes: List[Tuple[Optional[Incident], Optional[Incident]]]) -> None:
+        """Apply (before, after) changes from `IncidentRegistry.reconcile`."""
+        with self._lock:
+            for before, after in changes:
+                if before is not None:
+                    self._remove(before.id)
+                # Resolved incidents no longer count towards live clusters
+                if after is not None and after.status != "resolved":
+                    self._add(after)
+
+    def query(self, zoom: int, bbox: Tuple[float, float, float, float]) -> List[Dict]:
+        """
+        Clusters intersecting bbox (min_lng, min_lat, max_lng, max_lat) at a zoom.
+        """
+        z = max(0, min(zoom, MAX_CLUSTER_ZOOM))
+        min_lng, min_lat, max_lng, max_lat = bbox
+        x0, y0 = lnglat_to_world(min_lng, max_lat)
+        x1, y1 = lnglat_to_world(max_lng, min_lat)
+        (cx0, cy0), (cx1, cy1) = self._cell(x0, y0, z), self._cell(x1, y1, z)
+
+        out = []
+        with self._lock:
+            level = self._levels[z]
+            span = (cx1 - cx0 + 1) * (cy1 - cy0 + 1)
+            if span <= len(level):
+                cells = ((c, level.get(c)) for c in
+                         ((cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)))
+            else:
+                cells = ((c, a) for c, a in level.items()
+                         if cx0 <= c[0] <= cx1 and cy0 <= c[1] <= cy1)
+            for (cx, cy), agg in cells:
+                if agg is None:
+                    continue
+                if zoom > MAX_CLUSTER_ZOOM:
+                    out.extend(self._singles(zoom, agg, (x0, y0, x1, y1)))
+                    continue
+                count = len(agg.severity)
+                lng, lat = world_to_lnglat(agg.sum_x / count, agg.sum_y / count)
+                cluster = {
+                    "id": f"{z}/{cx}/{cy}",
+                    "lat": lat,
+                    "lng": lng,
+                    "count": count,
+                    "types": dict(agg.types),
+                    "max_severity": agg.max_severity,
+                }
+                if count == 1:
+                    cluster["incident_id"] = next(iter(agg.severity))
+                out.append(cluster)
+        out.sort(key=lambda c: c["count"], reverse=True)
+        return out
+
+    def _singles(self, zoom: int, agg: _Aggregate, bounds: Tuple[float, float, float, float]) -> List[Dict]:
+        """One cluster per incident of a cell that lies inside bounds (world x0, y0, x1, y1)."""
+        x0, y0, x1, y1 = bounds
+        out = []
+        for inc_id, severity in agg.severity.items():
+            x, y, inc_type = self._points[inc_id]
+            if not (x0 <= x <= x1 and y0 <= y <= y1):
+                continue
+            lng, lat = world_to_lnglat(x, y)
+            out.append({"id": f"{zoom}/{inc_id}", "lat": lat, "lng": lng, "count": 1,
+                        "types": {inc_type: 1}, "max_severity": severity, "incident_id": inc_id})
+        return out
@@ -1,51 +1,88 @@
-from typing import List, Dict, Any
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 
-# Initialize Firestore client with error handling
+# Firestore is connected on first use (or by warm_up() after startup), so
+# importing this module never pays for google.cloud imports or credential
+# discovery. GRIDWATCH_LOCAL_MODE=1 skips Firestore entirely.
+LOCAL_MODE = os.getenv("GRIDWATCH_LOCAL_MODE", "").lower() in ("1", "true", "yes")
+
+firestore = None
 db = None
 INC = None
 
-try:
-    from google.cloud import firestore
-    # Uses default database "(default)" in your project/region
-    db = firestore.Client()
-    INC = db.collection("incidents")
-    print("Firestore client initialized successfully")
-except Exception as e:
-    print(f"Warning: Firestore not available: {e}")
-    print("Running in local mode without persistence")
+_state = "local" if LOCAL_MODE else "pending"  # pending | ready | unavailable | local
+_init_lock = threading.Lock()
+
+def _connect() -> Tuple[Optional[Any], Optional[Any]]:
+    """Return (client, incidents collection), initializing on first call."""
+    global firestore, db, INC, _state
+    if _state != "pending":
+        return db, INC
+    with _init_lock:
+        if _state != "pending":
+            return db, INC
+        try:
+            from google.cloud import firestore as _firestore
+            # Uses default database "(default)" in your project/region
+            client = _firestore.Client()
+            firestore, db, INC = _firestore, client, client.collection("incidents")
+            _state = "ready"
+            print("Firestore client initialized successfully")
+        except Exception as e:
+            _state = "unavailable"
+            print(f"Warning: Firestore not available: {e}")
+            print("Running in local mode without persistence")
+    return db, INC
+
+def warm_up() -> None:
+    """Connect in a background thread so the first request doesn't have to."""
+    if _state == "pending":
+        threading.Thread(target=_connect, name="firestore-warmup", daemon=True).start()
+
+def status() -> str:
+    return _state
 
 def upsert_incidents(items: List[Dict[str, Any]]) -> None:
     """Insert or update incidents in batch."""
     if not items:
         return
-    
-    if db is None or INC is None:
-        print(f"Firestore not available, skipping upsert of {len(items)} incidents")
+
+    client, inc = _connect()
+    if client is None or inc is None:
+        if _state != "local":
+            print(f"Firestore not available, skipping upsert of {len(items)} incidents")
         return
-    
+
     try:
-        batch = db.batch()
+        batch = client.batch()
         for it in items:
             it["created_at"] = it.get("created_at") or datetime.now(timezone.utc).isoformat()
-            doc = INC.document(it["id"])
+            doc = inc.document(it["id"])
             batch.set(doc, it, merge=True)
         batch.commit()
         print(f"Successfully upserted {len(items)} incidents to Firestore")
     except Exception as e:
         print(f"Error upserting incidents to Firestore: {e}")
 
-def query_incidents(limit: int = 20, since_iso: str | None = None) -> List[Dict[str, Any]]:
-    """Return incidents sorted by created_at desc; optional since filter."""
-    if db is None or INC is None:
-        print("Firestore not available, returning empty incidents list")
+def query_incidents(limit: int = 20, since_iso: str | None = None,
+                    include_resolved: bool = True) -> List[Dict[str, Any]]:
+    """Return incidents sorted by created_at desc; optional since and status filters."""
+    client, inc = _connect()
+    if client is None or inc is None:
+        if _state != "local":
+            print("Firestore not available, returning empty incidents list")
         return []
-    
+
     try:
-        q = INC.order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit)
+        q = inc.order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit)
         if since_iso:
             q = q.where("created_at", ">", since_iso)
+        if not include_resolved:
+            # Needs the composite index (status, created_at desc)
+            q = q.where("status", "in", ["active", "monitoring"])
         return [d.to_dict() for d in q.stream()]
     except Exception as e:
         print(f"Error querying incidents from Firestore: {e}")
-        return []
\ No newline at end of file
+        return []
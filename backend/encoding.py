@@ -0,0 +1,204 @@
+"""
+Response Encoding
+Content negotiation for the incident endpoints.
+
+- Body format from `Accept`: JSON (orjson when installed) or MessagePack
+  (`application/msgpack`) with datetimes as epoch milliseconds
+- Compression from `Accept-Encoding`: brotli (when installed) or gzip
+- RequestDecompressionMiddleware inflates gzip / brotli request bodies
+  (batched evidence from evidence_shipper.py) before the endpoints parse them
+
+orjson, msgpack and brotli are used when installed; without them the
+endpoints fall back to stdlib JSON and gzip.
+"""
+
+import gzip
+import json
+import os
+import zlib
+from datetime import date, datetime, timezone
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MIN_COMPRESS_BYTES = 1024  # below this compression costs more than it saves
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+# Inflated request bodies above this are refused (guards against zip bombs)
+MAX_REQUEST_BYTES = int(os.getenv("GRIDWATCH_MAX_REQUEST_MB", "16")) * 1024 * 1024
+_CORRUPT_BODY = (zlib.error,) + ((brotli.error,) if brotli is not None else ())
+# Request bodies are only inflated with a bounded brotli decoder (brotli >= 1.1)
+_BROTLI_REQUESTS = brotli is not None and hasattr(brotli.Decompressor, "can_accept_more_data")
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _epoch_ms(obj: Any):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:  # models use naive UTC
+            obj = obj.replace(tzinfo=timezone.utc)
+        return int(obj.timestamp() * 1000)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default)
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    return msgpack.packb(payload, default=_epoch_ms, datetime=False)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def _accepts(header: str, token: str) -> bool:
+    """True if an Accept-Encoding style header lists `token` with q > 0."""
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        return q > 0
+    return False
+
+
+def negotiate(request: Request) -> Tuple[str, Optional[str]]:
+    """Pick (media type, content encoding) for a request."""
+    accept = request.headers.get("accept", "").lower()
+    media = "application/json"
+    if msgpack is not None and any(t in accept for t in MSGPACK_TYPES):
+        media = "application/msgpack"
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    encoding = None
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        encoding = "br"
+    elif _accepts(accept_encoding, "gzip"):
+        encoding = "gzip"
+    return media, encoding
+
+
+def render(request: Request, payload: Any) -> Response:
+    """Encode `payload` in the format and compression the client asked for."""
+    media, encoding = negotiate(request)
+    body = encode_msgpack(payload) if media == "application/msgpack" else encode_json(payload)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media, headers=headers)
+
+
+class RequestDecompressionMiddleware:
+    """
+    ASGI middleware for `Content-Encoding: gzip` (and `br` with brotli >= 1.1
+    installed) request bodies. The body is inflated incrementally up to
+    max_bytes and handed on with the encoding header removed, so handlers
+    see plain JSON. Oversized bodies get 413, corrupt ones 400, unsupported
+    encodings 415.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = list(scope["headers"])
+        encoding = next((v.decode("latin-1").strip().lower() for k, v in headers if k == b"content-encoding"), "")
+        if encoding in ("", "identity"):
+            return await self.app(scope, receive, send)
+
+        if encoding == "gzip":
+            inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif encoding == "br" and _BROTLI_REQUESTS:
+            inflater = brotli.Decompressor()
+        else:
+            return await JSONResponse({"detail": f"Unsupported Content-Encoding: {encoding}"}, 415)(scope, receive, send)
+
+        chunks, size, more = [], 0, True
+        try:
+            while more:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                more = message.get("more_body", False)
+                if encoding == "gzip":
+                    # Bounded inflate: never produce more than the remaining budget + 1
+                    data = inflater.decompress(message.get("body", b""), self.max_bytes - size + 1)
+                    if inflater.unconsumed_tail:
+                        raise OverflowError
+                else:
+                    # Same budget for brotli; a full output buffer is drained before more input
+                    data = inflater.process(message.get("body", b""), output_buffer_limit=self.max_bytes - size + 1)
+                    while not inflater.can_accept_more_data():
+                        if size + len(data) > self.max_bytes:
+                            raise OverflowError
+                        data += inflater.process(b"", output_buffer_limit=self.max_bytes - size - len(data) + 1)
+                size += len(data)
+                if size > self.max_bytes:
+                    raise OverflowError
+                chunks.append(data)
+            if encoding == "gzip" and not inflater.eof:
+                raise zlib.error("truncated gzip stream")
+            if encoding == "br" and not inflater.is_finished():
+                raise brotli.error("truncated brotli stream")
+        except OverflowError:
+            response = JSONResponse({"detail": f"Decompressed body exceeds {self.max_bytes} bytes"}, 413)
+            return await response(scope, receive, send)
+        except _CORRUPT_BODY as e:
+            return await JSONResponse({"detail": f"Invalid {encoding} body: {e}"}, 400)(scope, receive, send)
+
+        body = b"".join(chunks)
+        headers = [(k, v) for k, v in headers if k not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        sent = False
+
+        async def inflated_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app({**scope, "headers": headers}, inflated_receive, send)
@@ -1,4 +1,5 @@
 from collections import deque
+from threading import Lock
 from time import time
 from typing import List
 from models import Evidence
@@ -7,12 +8,28 @@ class EvidenceBus:
     def __init__(self, ttl_seconds: int = 300):
         self.ttl = ttl_seconds
         self.q = deque()
+        # Objects notified via on_evidence_added(ev, added_at) / on_evidence_expired(ev, added_at)
+        self.listeners = []
+        self._lock = Lock()
 
     def add(self, ev: Evidence):
-        self.q.append((time(), ev))
+        now = time()
+        with self._lock:
+            self.q.append((now, ev))
+        for listener in self.listeners:
+            listener.on_evidence_added(ev, now)
 
-    def snapshot(self) -> List[Evidence]:
+    def expire(self) -> None:
         cutoff = time() - self.ttl
-        while self.q and self.q[0][0] < cutoff:
-            self.q.popleft()
-        return [ev for _, ev in list(self.q)]
+        expired = []
+        with self._lock:
+            while self.q and self.q[0][0] < cutoff:
+                expired.append(self.q.popleft())
+        for added_at, ev in expired:
+            for listener in self.listeners:
+                listener.on_evidence_expired(ev, added_at)
+
+    def snapshot(self) -> List[Evidence]:
+        self.expire()
+        with self._lock:
+            return [ev for _, ev in self.q]
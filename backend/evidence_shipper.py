@@ -0,0 +1,375 @@
+"""
+Evidence Shipper
+One client per backend and producer (agent runner, orca, aggregator,
+scraper) for POST /evidence, shared by everything in the process that
+ships under that producer id.
+
+- submit() only buffers; a sender thread coalesces items into batches of up
+  to max_items / max_bytes, or whatever is waiting after flush_interval
+- Batches are gzip-compressed and tagged with X-Producer-Id, which the
+  backend's ingest queue uses for per-producer fairness
+- Connection errors and 5xx are retried with full-jitter exponential
+  backoff; 429 waits out Retry-After; 413 splits the batch in half
+- Batches that still fail, or arrive while the "backend" circuit breaker is
+  open, are written to an on-disk spool and replayed oldest-first once the
+  backend answers again. While the spool is non-empty new batches queue
+  behind it, so the backend always receives evidence in submission order
+- Each shipper owns a spool directory per producer and backend URL, held
+  with an exclusive lock; a second shipper for the same pair (another worker
+  process) takes the next free numbered directory instead of sharing files
+- close() (also run at exit) sends what is buffered or spools it
+"""
+
+import atexit
+import glob
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+import http_client
+from circuit_breaker import get_breaker
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): spool directories are per process instead
+    fcntl = None
+
+SPOOL_ROOT = os.getenv("GRIDWATCH_SPOOL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool"))
+MAX_BATCH_ITEMS = int(os.getenv("GRIDWATCH_SHIP_BATCH_ITEMS", "500"))
+MAX_BATCH_BYTES = int(os.getenv("GRIDWATCH_SHIP_BATCH_KB", "512")) * 1024
+FLUSH_INTERVAL = float(os.getenv("GRIDWATCH_SHIP_FLUSH_S", "2"))
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+GZIP_LEVEL = 5
+
+# Outcomes of one POST
+_SENT, _RETRY, _OPEN, _SPLIT, _REJECTED = "sent", "retry", "open", "split", "rejected"
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(item: Any) -> bytes:
+    if hasattr(item, "model_dump"):
+        item = item.model_dump(mode="json")
+    return json.dumps(item, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def _retry_after(response: requests.Response) -> float:
+    value = response.headers.get("Retry-After", "")
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return BACKOFF_BASE_S
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class EvidenceShipper:
+    """
+    Args:
+        backend_url: Backend base URL (POST {backend_url}/evidence)
+        producer: X-Producer-Id for every batch; with the backend URL, names the spool directory
+        max_items / max_bytes: Batch limits (uncompressed JSON bytes)
+        flush_interval: Longest time an item waits in the buffer
+    """
+
+    def __init__(self, backend_url: str, producer: str, max_items: int = MAX_BATCH_ITEMS,
+                 max_bytes: int = MAX_BATCH_BYTES, flush_interval: float = FLUSH_INTERVAL,
+                 spool_root: str = SPOOL_ROOT):
+        self.url = f"{backend_url.rstrip('/')}/evidence"
+        self.producer = producer
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._spool_lock = None
+        self.spool_dir = self._claim_spool_dir(spool_root)
+        self.circuit = get_breaker("backend")
+        self.counters = {"submitted": 0, "sent": 0, "requests": 0, "raw_bytes": 0, "wire_bytes": 0,
+                         "retries": 0, "spooled": 0, "replayed": 0, "rejected": 0}
+
+        self._buffer: Deque[bytes] = deque()
+        self._buffer_bytes = 0
+        self._oldest = 0.0
+        self._seq = self._last_spool_seq()
+        self._next_replay = 0.0
+        self._replay_attempt = 0
+        self._closing = False
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"shipper-{producer}", daemon=True)
+        self._thread.start()
+
+    # -- producer side -------------------------------------------------------------
+    def submit(self, items: Iterable[Any]) -> int:
+        """Queue Evidence models or dicts for delivery; returns how many were queued."""
+        encoded = [_encode(item) for item in items]
+        if not encoded:
+            return 0
+        with self._cond:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.extend(encoded)
+            self._buffer_bytes += sum(len(e) for e in encoded)
+            self.counters["submitted"] += len(encoded)
+            self._cond.notify()
+        return len(encoded)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Push buffered items out now; True once nothing is buffered or spooled."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._oldest = 0.0  # make the buffer due immediately
+            self._next_replay = 0.0
+            self._cond.notify()
+            while self._buffer or self._busy or self._spool_files():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.1))
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Send what is buffered (or spool it) and stop the sender thread."""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._spool_lock is not None and not self._thread.is_alive():
+            self._spool_lock.close()  # hands the spool to the next shipper for this producer and backend
+            self._spool_lock = None
+
+    # -- sender thread ---------------------------------------------------------------
+    def _due(self) -> bool:
+        if self._buffer and (
+            self._closing
+            or len(self._buffer) >= self.max_items
+            or self._buffer_bytes >= self.max_bytes
+            or time.monotonic() - self._oldest >= self.flush_interval
+        ):
+            return True
+        return bool(self._spool_files()) and time.monotonic() >= self._next_replay and not self._closing
+
+    def _take_batch(self) -> List[bytes]:
+        batch, size = [], 0
+        while self._buffer and len(batch) < self.max_items:
+            if batch and size + len(self._buffer[0]) > self.max_bytes:
+                break
+            item = self._buffer.popleft()
+            batch.append(item)
+            size += len(item)
+        self._buffer_bytes -= size
+        if self._buffer:
+            self._oldest = time.monotonic()
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due() and not (self._closing and not self._buffer):
+                    self._cond.wait(timeout=min(self.flush_interval, 1.0))
+                if self._closing and not self._buffer:
+                    self._cond.notify_all()
+                    return
+                batch = self._take_batch()
+                self._busy = True
+            try:
+                self._replay_spool()
+                if batch:
+                    self._ship(batch)
+            except Exception as e:  # never lose the thread (or the batch) to a bug
+                print(f"⚠️ Evidence shipper error: {e}")
+                if batch:
+                    self._spool(batch)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _ship(self, batch: List[bytes]) -> None:
+        # Anything already spooled goes first; don't overtake it
+        if self._spool_files() or self._closing and self.circuit.state != "closed":
+            self._spool(batch)
+            return
+        for attempt in range(MAX_ATTEMPTS):
+            outcome = self._post(batch)
+            if outcome in (_SENT, _REJECTED):
+                return
+            if outcome == _SPLIT and len(batch) > 1:
+                half = len(batch) // 2
+                self._ship(batch[:half])
+                self._ship(batch[half:])
+                return
+            if outcome == _SPLIT:
+                self.counters["rejected"] += 1
+                print("❌ Backend refused a single evidence item as too large; dropping it")
+                return
+            if outcome == _OPEN or self._closing:
+                break
+            self.counters["retries"] += 1
+            time.sleep(_backoff(attempt) if outcome == _RETRY else outcome)
+        self._spool(batch)
+
+    def _post(self, batch: List[bytes], body: Optional[bytes] = None):
+        """One POST. Returns an outcome, or seconds to wait for a 429."""
+        if not self.circuit.allow():
+            return _OPEN
+        raw = b"[" + b",".join(batch) + b"]"
+        body = body or gzip.compress(raw, compresslevel=GZIP_LEVEL)
+        started = time.monotonic()
+        try:
+            response = http_client.post(
+                self.url,
+                data=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip",
+                         "X-Producer-Id": self.producer},
+                timeout=10,
+            )
+        except requests.exceptions.RequestException as e:
+            self.circuit.record(False, time.monotonic() - started)
+            print(f"⚠️ Backend unreachable ({type(e).__name__}), {len(batch)} evidence items pending")
+            return _RETRY
+
+        self.counters["requests"] += 1
+        status = response.status_code
+        self.circuit.record(status < 500 and status != 429, time.monotonic() - started)
+        if status < 300:
+            self.counters["sent"] += len(batch)
+            self.counters["raw_bytes"] += len(raw)
+            self.counters["wire_bytes"] += len(body)
+            return _SENT
+        if status == 429:
+            return _retry_after(response)
+        if status == 413:
+            return _SPLIT
+        if status >= 500:
+            return _RETRY
+        # Other 4xx: the payload itself is bad and retrying won't fix it
+        self.counters["rejected"] += len(batch)
+        print(f"❌ Backend rejected {len(batch)} evidence items: HTTP {status} {response.text[:200]}")
+        return _REJECTED
+
+    # -- spool -------------------------------------------------------------------------
+    def _claim_spool_dir(self, spool_root: str) -> str:
+        """The first of <producer>-<url hash>, .1, .2 ... whose lock is free; it stays locked until close()."""
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.producer)
+        name = f"{safe}-{hashlib.sha1(self.url.encode('utf-8')).hexdigest()[:8]}"
+        if fcntl is None:
+            path = os.path.join(spool_root, f"{name}.{os.getpid()}")
+            os.makedirs(path, exist_ok=True)
+            return path
+        for slot in itertools.count():
+            path = os.path.join(spool_root, name if slot == 0 else f"{name}.{slot}")
+            os.makedirs(path, exist_ok=True)
+            lock = open(os.path.join(path, ".lock"), "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                continue
+            self._spool_lock = lock
+            return path
+
+    def _spool_files(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.spool_dir, "*.json.gz")))
+
+    def _last_spool_seq(self) -> int:
+        files = self._spool_files()
+        return int(os.path.basename(files[-1]).split(".")[0]) if files else 0
+
+    def _spool(self, batch: List[bytes], name: Optional[str] = None) -> None:
+        if name is None:
+            self._seq += 1
+            name = f"{self._seq:012d}.json.gz"
+        path = os.path.join(self.spool_dir, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(gzip.compress(b"[" + b",".join(batch) + b"]", compresslevel=GZIP_LEVEL))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self.counters["spooled"] += len(batch)
+
+    def _replay_spool(self) -> None:
+        """Send spooled batches oldest-first; stop at the first failure and back off."""
+        if time.monotonic() < self._next_replay:
+            return
+        for path in self._spool_files():
+            with open(path, "rb") as f:
+                body = f.read()
+            batch = [_encode(item) for item in json.loads(gzip.decompress(body))]
+            outcome = self._post(batch, body)
+            if outcome == _SPLIT and len(batch) > 1:
+                # Keep the order: NNN.json.gz -> NNN.a.json.gz, NNN.b.json.gz
+                stem = os.path.basename(path)[: -len(".json.gz")]
+                half = len(batch) // 2
+                self._spool(batch[:half], f"{stem}.a.json.gz")
+                self._spool(batch[half:], f"{stem}.b.json.gz")
+                self.counters["spooled"] -= len(batch)
+                os.remove(path)
+                return self._replay_spool()
+            if outcome == _SPLIT:
+                self.counters["rejected"] += 1
+            elif outcome not in (_SENT, _REJECTED):
+                wait = outcome if isinstance(outcome, float) else _backoff(self._replay_attempt)
+                self._replay_attempt = min(self._replay_attempt + 1, 10)
+                self._next_replay = time.monotonic() + max(wait, self.circuit.retry_in())
+                return
+            os.remove(path)
+            self._replay_attempt = 0
+            if outcome == _SENT:
+                self.counters["replayed"] += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            buffered = len(self._buffer)
+        return {**self.counters, "buffered": buffered, "spool_files": len(self._spool_files())}
+
+    def summary(self) -> str:
+        s = self.stats()
+        ratio = f", gzip {s['wire_bytes'] / s['raw_bytes']:.0%}" if s["raw_bytes"] else ""
+        return (f"📦 Evidence shipper ({self.producer}): {s['sent']}/{s['submitted']} sent in {s['requests']} requests"
+                f"{ratio}, {s['retries']} retries, {s['spool_files']} batches spooled, {s['replayed']} replayed")
+
+
+_shippers: Dict[Tuple[str, str], EvidenceShipper] = {}
+_shippers_lock = threading.Lock()
+
+
+def get_shipper(backend_url: str, producer: str) -> EvidenceShipper:
+    """The process-wide shipper for a backend and producer, created on first use and closed at exit."""
+    with _shippers_lock:
+        shipper = _shippers.get((backend_url, producer))
+        if shipper is None:
+            shipper = _shippers[backend_url, producer] = EvidenceShipper(backend_url, producer)
+        return shipper
+
+
+def close_all(timeout: float = 10.0) -> None:
+    for shipper in list(_shippers.values()):
+        shipper.close(timeout)
+
+
+atexit.register(close_all)
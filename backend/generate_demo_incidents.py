@@ -4,13 +4,13 @@ Generate realistic demo incidents for all 10 GridWatch cities.
 Creates diverse incident types with realistic locations and details.
 """
 
-import requests
 import json
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Dict
 import random
 import math
+import http_client
 
 # City data with coordinates
 CITIES = {
@@ -230,9 +230,10 @@ def generate_city_incidents(city_name: str, city_data: Dict) -> List[Dict]:
 def post_incidents_to_backend(incidents: List[Dict], backend_url: str) -> bool:
     """Post incidents to the backend API."""
     try:
-        response = requests.post(
+        response = http_client.post(
             f"{backend_url}/evidence",
             json=incidents,
+            headers={"X-Producer-Id": "demo-generator"},
             timeout=10
         )
         response.raise_for_status()
@@ -273,7 +274,7 @@ def main():
     
     # Test the API to verify incidents are available
     try:
-        response = requests.get(f"{backend_url}/incidents?limit=50", timeout=10)
+        response = http_client.get(f"{backend_url}/incidents?limit=50", timeout=10)
         if response.ok:
             data = response.json()
             incident_count = len(data.get("data", []))
@@ -283,5 +284,7 @@ def main():
     except Exception as e:
         print(f"❌ Error testing backend API: {e}")
 
+    print(http_client.summary())
+
 if __name__ == "__main__":
     main()
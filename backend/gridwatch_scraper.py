@@ -9,6 +9,9 @@ import uuid
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from models import Evidence, EventType, SourceType
+import http_client
+import http_cache
+from evidence_shipper import get_shipper
 
 # GridWatch webapp API (reverse-engineered from gridwatch.dev)
 GRIDWATCH_WEB_URL = "https://gridwatch.dev"
@@ -63,7 +66,7 @@ def fetch_incidents_from_gridwatch(city: str, radius_km: float = 25) -> List[Dic
             "limit": 100,
         }
         
-        response = requests.get(
+        response = http_cache.get(
             f"{GRIDWATCH_WEB_URL}/api/incidents",
             params=params,
             timeout=10
@@ -187,23 +190,10 @@ def ingest_incidents_for_city(
         print(f"   ⚠️  Could not transform any incidents")
         return 0
     
-    # Ingest into backend
-    try:
-        response = requests.post(
-            f"{backend_url}/evidence",
-            json=[e.model_dump(mode='json') for e in evidence_list],
-            timeout=10
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        count = result.get("count", len(evidence_list))
-        print(f"   ✅ Ingested {count} incidents into backend")
-        return count
-        
-    except requests.exceptions.RequestException as e:
-        print(f"   ❌ Failed to ingest into backend: {e}")
-        return 0
+    # Queue for the backend; the shipper coalesces all cities into a few batches
+    count = get_shipper(backend_url, producer="gridwatch-scraper").submit(evidence_list)
+    print(f"   📤 Queued {count} incidents for the backend")
+    return count
 
 
 def ingest_all_cities(backend_url: str = "http://localhost:8000") -> Dict[str, int]:
@@ -231,7 +221,13 @@ def ingest_all_cities(backend_url: str = "http://localhost:8000") -> Dict[str, i
         status = "✅" if count > 0 else "⚠️"
         print(f"   {status} {city:25} {count:3} incidents")
     
+    shipper = get_shipper(backend_url, producer="gridwatch-scraper")
+    if not shipper.flush(timeout=30):
+        print("⚠️ Backend not reachable; remaining incidents are spooled and will be replayed on the next run")
     print(f"\n🎯 Total: {total} incidents ingested")
+    print(shipper.summary())
+    print(http_client.summary())
+    print(http_cache.summary())
     return results
 
 
@@ -0,0 +1,178 @@
+"""
+Severity Heatmap
+Maintains a NumPy density grid per city, weighted by severity x confidence.
+
+Evidence is splatted into the grid of the city it falls in as soon as it
+enters the EvidenceBus and subtracted again when it expires, so an update
+only touches the handful of cells under its footprint. A second grid keeps
+the same contributions with exponential time decay; it stores weights scaled
+by 2^((t_added - t0) / half_life) so decay is applied once at read time.
+"""
+
+import math
+import struct
+import zlib
+from threading import Lock
+from time import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from models import Evidence
+
+GRID_SIZE = 256                   # base cells per side; served resolutions divide it
+RESOLUTIONS = (32, 64, 128, 256)
+SPAN_DEG = 0.15                   # half-height of a city grid in degrees (~16 km)
+DEFAULT_SEVERITY = 0.5            # when evidence carries no severity of its own
+REBASE_EXPONENT = 60              # rebase the decayed grid before 2**x loses precision
+
+
+class _CityGrid:
+    def __init__(self, lat: float, lng: float, size: int):
+        self.size = size
+        half_lng = SPAN_DEG / math.cos(math.radians(lat))  # square cells on the ground
+        self.bounds = (lng - half_lng, lat - SPAN_DEG, lng + half_lng, lat + SPAN_DEG)
+        self.cell_lat = 2 * SPAN_DEG / size
+        self.cell_lng = 2 * half_lng / size
+        self.cell_m = self.cell_lat * 111_000
+        self.total = np.zeros((size, size), dtype=np.float64)
+        self.decayed = np.zeros((size, size), dtype=np.float64)
+
+    def contains(self, lat: float, lng: float) -> bool:
+        min_lng, min_lat, max_lng, max_lat = self.bounds
+        return min_lat <= lat < max_lat and min_lng <= lng < max_lng
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        # Row 0 is the northern edge so the array reads like a map
+        row = int((self.bounds[3] - lat) / self.cell_lat)
+        col = int((lng - self.bounds[0]) / self.cell_lng)
+        return (min(max(row, 0), self.size - 1), min(max(col, 0), self.size - 1))
+
+
+def _kernel(radius_cells: float) -> np.ndarray:
+    """Normalised Gaussian footprint; a single cell for point-like evidence."""
+    sigma = radius_cells / 2
+    reach = int(math.ceil(2 * sigma))
+    if reach < 1:
+        return np.ones((1, 1))
+    ax = np.arange(-reach, reach + 1)
+    k = np.exp(-(ax[:, None] ** 2 + ax[None, :] ** 2) / (2 * sigma ** 2))
+    return k / k.sum()
+
+
+def evidence_weight(ev: Evidence) -> float:
+    raw = ev.raw if isinstance(ev.raw, dict) else {}
+    try:
+        severity = float(raw.get("severity", DEFAULT_SEVERITY))
+    except (TypeError, ValueError):
+        severity = DEFAULT_SEVERITY
+    return max(0.0, min(1.0, severity)) * max(0.0, min(1.0, ev.confidence))
+
+
+class SeverityHeatmap:
+    """
+    Per-city density grids fed by EvidenceBus add/expire events.
+
+    Args:
+        cities: Mapping of city name -> {"lat": ..., "lng": ...}
+        size: Base grid resolution (cells per side)
+        half_life_s: Half-life of the decayed grid in seconds
+    """
+
+    def __init__(self, cities: Dict[str, Dict], size: int = GRID_SIZE, half_life_s: int = 1800):
+        self.size = size
+        self.half_life = float(half_life_s)
+        self.grids = {name: _CityGrid(c["lat"], c["lng"], size) for name, c in cities.items()}
+        self._t0 = time()
+        # evidence_id -> (city, row slice, col slice, contribution, added_at)
+        self._contrib: Dict[str, Tuple[str, slice, slice, np.ndarray, float]] = {}
+        self._lock = Lock()
+
+    def _city_for(self, lat: float, lng: float) -> Optional[str]:
+        for name, grid in self.grids.items():
+            if grid.contains(lat, lng):
+                return name
+        return None
+
+    def _rebase(self, now: float) -> None:
+        factor = 2.0 ** (-(now - self._t0) / self.half_life)
+        for grid in self.grids.values():
+            grid.decayed *= factor
+        self._t0 = now
+
+    # -- EvidenceBus listener hooks ----------------------------------------
+    def on_evidence_added(self, ev: Evidence, added_at: Optional[float] = None) -> None:
+        city = self._city_for(ev.lat, ev.lng)
+        weight = evidence_weight(ev)
+        if city is None or weight <= 0:
+            return
+        added_at = added_at or time()
+        grid = self.grids[city]
+        kernel = _kernel((ev.radius_m or 80) / grid.cell_m) * weight
+
+        row, col = grid.cell(ev.lat, ev.lng)
+        reach = kernel.shape[0] // 2
+        r0, r1 = max(row - reach, 0), min(row + reach + 1, grid.size)
+        c0, c1 = max(col - reach, 0), min(col + reach + 1, grid.size)
+        part = kernel[r0 - row + reach:r1 - row + reach, c0 - col + reach:c1 - col + reach]
+        rows, cols = slice(r0, r1), slice(c0, c1)
+
+        with self._lock:
+            self._subtract(ev.evidence_id)  # re-ingested ids replace their old footprint
+            if (added_at - self._t0) / self.half_life > REBASE_EXPONENT:
+                self._rebase(added_at)
+            grid.total[rows, cols] += part
+            grid.decayed[rows, cols] += part * 2.0 ** ((added_at - self._t0) / self.half_life)
+            self._contrib[ev.evidence_id] = (city, rows, cols, part, added_at)
+
+    def on_evidence_expired(self, ev: Evidence, added_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._subtract(ev.evidence_id, added_at)
+
+    def _subtract(self, evidence_id: str, added_at: Optional[float] = None) -> None:
+        entry = self._contrib.get(evidence_id)
+        # An expiring copy that was since re-ingested no longer owns the footprint
+        if entry is None or (added_at is not None and entry[4] != added_at):
+            return
+        del self._contrib[evidence_id]
+        city, rows, cols, part, added_at = entry
+        grid = self.grids[city]
+        grid.total[rows, cols] -= part
+        grid.decayed[rows, cols] -= part * 2.0 ** ((added_at - self._t0) / self.half_life)
+
+    # -- reads ---------------------------------------------------------------
+    def grid(self, city: str, resolution: int = 128, decay: bool = False) -> np.ndarray:
+        """Float32 grid for a city, summed down to `resolution` cells per side."""
+        grid = self.grids[city]
+        with self._lock:
+            if decay:
+                data = grid.decayed * 2.0 ** (-(time() - self._t0) / self.half_life)
+            else:
+                data = grid.total.copy()
+        f = self.size // resolution
+        data = data.reshape(resolution, f, resolution, f).sum(axis=(1, 3))
+        # Subtraction can leave float dust below zero
+        return np.clip(data, 0, None).astype(np.float32)
+
+
+def quantize(data: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Scale a grid to uint8; returns (bytes array, max value for de-quantizing)."""
+    peak = float(data.max()) if data.size else 0.0
+    if peak <= 0:
+        return np.zeros(data.shape, dtype=np.uint8), 0.0
+    return np.round(data / peak * 255).astype(np.uint8), peak
+
+
+def encode_png(gray: np.ndarray) -> bytes:
+    """Encode a 2-D uint8 array as a grayscale PNG."""
+    h, w = gray.shape
+
+    def chunk(tag: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+    # Filter byte 0 (None) in front of every scanline
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), gray]).tobytes()
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
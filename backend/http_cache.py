@@ -0,0 +1,273 @@
+"""
+HTTP Cache
+Persistent cache for upstream public feeds (open-meteo, USGS, Open311,
+gridwatch.dev), layered on the pooled http_client session.
+
+- Bodies are stored in a local sqlite file with their ETag / Last-Modified
+- Fresh entries (Cache-Control max-age, Expires, or a caller-supplied
+  default_ttl when the server sends neither) are served without a request
+- Stale entries are revalidated with If-None-Match / If-Modified-Since and
+  the stored body is served on 304 Not Modified
+- no-store responses and non-200 statuses are never stored
+- Total body size is bounded; least recently used entries are evicted
+- With an upstream circuit breaker (circuit_breaker.py), the stored body is
+  served marked `stale` while the circuit is open or when the request fails
+- stats() / summary() report hits, revalidations, misses and bytes saved
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+from circuit_breaker import CircuitOpen, get_breaker
+
+CACHE_PATH = os.getenv(
+    "GRIDWATCH_HTTP_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "http.sqlite"),
+)
+MAX_BYTES = int(float(os.getenv("GRIDWATCH_HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# Headers that describe the wire encoding, not the (already decoded) stored body
+_WIRE_HEADERS = ("content-encoding", "transfer-encoding", "content-length", "connection")
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*(\d+)", re.I)
+
+
+def _freshness(headers, default_ttl: float) -> Tuple[float, bool]:
+    """(seconds the response stays fresh, whether it may be stored at all)."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return 0.0, False
+    if "no-cache" in cache_control:
+        return 0.0, True
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        age = float(headers.get("Age", "0") or 0)
+        return max(0.0, int(match.group(1)) - age), True
+    if headers.get("Expires"):
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+            return max(0.0, expires - time.time()), True
+        except (TypeError, ValueError):
+            return 0.0, True  # invalid Expires means already expired
+    return float(default_ttl), True
+
+
+class HttpCache:
+    """
+    Args:
+        path: sqlite file holding cached responses
+        max_bytes: Upper bound on stored body bytes
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "stale": 0, "uncacheable": 0,
+                         "evictions": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL,"
+                " etag TEXT, last_modified TEXT, expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # -- storage ---------------------------------------------------------------
+    def _load(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._db().execute(
+                "SELECT status, headers, body, etag, last_modified, expires FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _store(self, url: str, response: requests.Response, ttl: float) -> None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS}
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(headers), response.content,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now + ttl, now),
+            )
+            self._evict(db)
+            db.commit()
+
+    def _touch(self, url: str, expires: Optional[float] = None) -> None:
+        with self._lock:
+            db = self._db()
+            if expires is None:
+                db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+            else:
+                db.execute("UPDATE responses SET accessed = ?, expires = ? WHERE url = ?", (time.time(), expires, url))
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in db.execute("SELECT url, LENGTH(body) FROM responses ORDER BY accessed").fetchall():
+            db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.counters["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM responses")
+            self._db().commit()
+
+    # -- requests --------------------------------------------------------------
+    @staticmethod
+    def _response(url: str, row: tuple) -> requests.Response:
+        status, headers, body = row[0], json.loads(row[1]), row[2]
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        response.stale = False
+        return response
+
+    def _stale(self, key: str, row: tuple) -> requests.Response:
+        self.counters["stale"] += 1
+        self.counters["bytes_saved"] += len(row[2])
+        response = self._response(key, row)
+        response.stale = True
+        return response
+
+    def get(self, url: str, params: Optional[Dict] = None, default_ttl: float = 0,
+            breaker: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        GET through the cache. `default_ttl` is the freshness lifetime used when
+        the server sends no Cache-Control/Expires; with 0, such responses are
+        only stored when they carry a validator to revalidate with.
+
+        `breaker` names the upstream's circuit breaker. While it is open no
+        request is made: the stored body comes back with `response.stale = True`,
+        or CircuitOpen is raised when nothing is stored. Failed requests
+        (errors, 429, 5xx) also fall back to the stored body.
+        """
+        key = requests.Request("GET", url, params=params).prepare().url
+        try:
+            row = self._load(key)
+        except sqlite3.Error as e:
+            print(f"⚠️ HTTP cache unavailable: {e}")
+            return http_client.get(url, params=params, **kwargs)
+
+        if row is not None and row[5] > time.time():
+            self.counters["hits"] += 1
+            self.counters["bytes_saved"] += len(row[2])
+            self._touch(key)
+            return self._response(key, row)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if row is not None:
+            if row[3]:
+                headers["If-None-Match"] = row[3]
+            if row[4]:
+                headers["If-Modified-Since"] = row[4]
+        circuit = get_breaker(breaker) if breaker else None
+        if circuit is not None and not circuit.allow():
+            if row is None:
+                raise CircuitOpen(breaker, circuit.retry_in())
+            return self._stale(key, row)
+
+        started = time.monotonic()
+        try:
+            response = http_client.get(url, params=params, headers=headers, **kwargs)
+        except requests.exceptions.RequestException:
+            if circuit is None:
+                raise
+            circuit.record(False, time.monotonic() - started)
+            if row is None:
+                raise
+            return self._stale(key, row)
+        if circuit is not None:
+            failed = response.status_code == 429 or response.status_code >= 500
+            circuit.record(not failed, time.monotonic() - started)
+            if failed and row is not None:
+                return self._stale(key, row)
+
+        if response.status_code == 304 and row is not None:
+            ttl, _ = _freshness(response.headers, default_ttl)
+            self.counters["revalidated"] += 1
+            self.counters["bytes_saved"] += len(row[2])
+            self._touch(key, time.time() + ttl)
+            return self._response(key, row)
+
+        self.counters["misses"] += 1
+        ttl, storable = _freshness(response.headers, default_ttl)
+        has_validator = "ETag" in response.headers or "Last-Modified" in response.headers
+        if response.status_code == 200 and storable and (ttl > 0 or has_validator):
+            try:
+                self._store(key, response, ttl)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not cache {key}: {e}")
+        else:
+            self.counters["uncacheable"] += 1
+        return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, size = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+        served = self.counters["hits"] + self.counters["revalidated"]
+        lookups = served + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def summary(self, label: str = "HTTP cache") -> str:
+        s = self.stats()
+        return (f"🗄️ {label}: {s['hits']} fresh hits, {s['revalidated']} revalidated (304), "
+                f"{s['stale']} stale, {s['misses']} misses, hit rate {s['hit_rate']:.0%}, "
+                f"{s['bytes_saved'] / 1024:.0f} KB not downloaded, {s['entries']} entries")
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache:
+    """The process-wide cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_cache().get(url, **kwargs)
+
+
+def summary(label: str = "HTTP cache") -> str:
+    return get_cache().summary(label)
@@ -0,0 +1,155 @@
+"""
+HTTP Client
+One pooled, keep-alive requests.Session shared by every outbound caller
+(aggregator, scraper, demo generator, agent runners).
+
+- Connections are reused per host instead of paying TCP + TLS per call
+- At most POOL_MAXSIZE connections per host; extra callers wait for one
+- A default (connect, read) timeout applies when a caller passes none
+- stats() reports requests, new connections (handshakes) and latency, so
+  a cycle can log how many handshakes it actually paid for
+"""
+
+import os
+import threading
+from time import perf_counter
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (
+    float(os.getenv("GRIDWATCH_HTTP_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("GRIDWATCH_HTTP_READ_TIMEOUT", "10")),
+)
+POOL_HOSTS = int(os.getenv("GRIDWATCH_HTTP_POOL_HOSTS", "32"))     # hosts kept with open pools
+POOL_MAXSIZE = int(os.getenv("GRIDWATCH_HTTP_POOL_MAXSIZE", "8"))  # connections per host
+USER_AGENT = "GridWatch/1.0 (+https://gridwatch.dev)"
+
+Timeout = Union[float, Tuple[float, float], None]
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a default timeout and per-host latency accounting."""
+
+    def __init__(self, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        self._stats: Dict[str, _HostStats] = {}
+        self._stats_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        host = requests.utils.urlparse(request.url).netloc
+        started = perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            self._record(host, perf_counter() - started, error=True)
+            raise
+        self._record(host, perf_counter() - started)
+        return response
+
+    def _record(self, host: str, elapsed_s: float, error: bool = False) -> None:
+        ms = elapsed_s * 1000
+        with self._stats_lock:
+            s = self._stats.setdefault(host, _HostStats())
+            s.requests += 1
+            s.errors += error
+            s.total_ms += ms
+            s.max_ms = max(s.max_ms, ms)
+
+    def connections_opened(self) -> Dict[str, int]:
+        """New connections per host, i.e. TCP (+TLS) handshakes, for pools still open."""
+        pools = self.poolmanager.pools
+        opened: Dict[str, int] = {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                host = f"{pool.host}:{pool.port}"
+                opened[host] = opened.get(host, 0) + pool.num_connections
+        return opened
+
+
+_session: Optional[requests.Session] = None
+_adapter: Optional[PooledAdapter] = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session, created on first use."""
+    global _session, _adapter
+    if _session is None:
+        with _lock:
+            if _session is None:
+                adapter = PooledAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    pool_block=True,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _adapter, _session = adapter, session
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session().post(url, **kwargs)
+
+
+def stats() -> Dict:
+    """Requests, handshakes and latency since start (or the last reset)."""
+    get_session()
+    with _adapter._stats_lock:
+        hosts = {
+            host: {
+                "requests": s.requests,
+                "errors": s.errors,
+                "avg_ms": round(s.total_ms / s.requests, 1) if s.requests else 0.0,
+                "max_ms": round(s.max_ms, 1),
+            }
+            for host, s in _adapter._stats.items()
+        }
+    opened = _adapter.connections_opened()
+    total_requests = sum(h["requests"] for h in hosts.values())
+    total_opened = sum(opened.values())
+    return {
+        "requests": total_requests,
+        "connections_opened": total_opened,
+        "connections_reused": max(0, total_requests - total_opened),
+        "avg_ms": round(sum(s["avg_ms"] * s["requests"] for s in hosts.values()) / total_requests, 1)
+        if total_requests else 0.0,
+        "hosts": hosts,
+    }
+
+
+def reset_stats() -> None:
+    """Forget latency counters and close pooled connections."""
+    global _session, _adapter
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session, _adapter = None, None
+
+
+def summary(label: str = "HTTP") -> str:
+    s = stats()
+    return (f"🔌 {label}: {s['requests']} requests, {s['connections_opened']} new connections, "
+            f"{s['connections_reused']} reused, avg {s['avg_ms']}ms")
@@ -5,90 +5,36 @@ Pulls from multiple free public data sources to create realistic incidents:
 - OpenWeatherMap (weather alerts)
 - USGS (earthquakes, geological events)
 - OpenStreetMap (traffic/congestion patterns)
+
+All cities are aggregated concurrently: per-city Open311 and weather calls
+share a bounded pool of worker threads, and the USGS feed is fetched
+once per run and joined against every city center in a single numpy pass.
 """
 
-import requests
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import json
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import random
-import math
+import numpy as np
 from models import Evidence, EventType, SourceType
+from cities import CITIES, city_bbox
+import http_client
+import http_cache
+from open311_discovery import get_discovery
+from evidence_shipper import get_shipper
+import circuit_breaker
 
-# City data with coordinates and Open311 jurisdiction IDs
-CITIES = {
-    "Washington, DC": {
-        "lat": 38.9072,
-        "lng": -77.0369,
-        "open311_jurisdiction": "dc.gov",
-        "state": "DC",
-        "radius_m": 3000,
-    },
-    "New York, NY": {
-        "lat": 40.7128,
-        "lng": -74.0060,
-        "open311_jurisdiction": "nyc.gov",
-        "state": "NY",
-        "radius_m": 3000,
-    },
-    "Los Angeles, CA": {
-        "lat": 34.0522,
-        "lng": -118.2437,
-        "open311_jurisdiction": "lacity.gov",
-        "state": "CA",
-        "radius_m": 3000,
-    },
-    "Seattle, WA": {
-        "lat": 47.6062,
-        "lng": -122.3321,
-        "open311_jurisdiction": "seattle.gov",
-        "state": "WA",
-        "radius_m": 3000,
-    },
-    "San Francisco, CA": {
-        "lat": 37.7749,
-        "lng": -122.4194,
-        "open311_jurisdiction": "sfgov.org",
-        "state": "CA",
-        "radius_m": 3000,
-    },
-    "Miami, FL": {
-        "lat": 25.7617,
-        "lng": -80.1918,
-        "open311_jurisdiction": "miamigov.com",
-        "state": "FL",
-        "radius_m": 3000,
-    },
-    "Chicago, IL": {
-        "lat": 41.8781,
-        "lng": -87.6298,
-        "open311_jurisdiction": "chicago.gov",
-        "state": "IL",
-        "radius_m": 3000,
-    },
-    "Dallas, TX": {
-        "lat": 32.7767,
-        "lng": -96.7970,
-        "open311_jurisdiction": "dallascityhall.com",
-        "state": "TX",
-        "radius_m": 3000,
-    },
-    "Las Vegas, NV": {
-        "lat": 36.1699,
-        "lng": -115.1398,
-        "open311_jurisdiction": "lasvegas.gov",
-        "state": "NV",
-        "radius_m": 3000,
-    },
-    "Denver, CO": {
-        "lat": 39.7392,
-        "lng": -104.9903,
-        "open311_jurisdiction": "denvergov.org",
-        "state": "CO",
-        "radius_m": 3000,
-    },
-}
+# Upstream calls in flight at once across all cities and sources
+MAX_CONCURRENCY = int(os.getenv("GRIDWATCH_AGGREGATOR_CONCURRENCY", "16"))
+USGS_FEED_URL = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/significant_month.geojson"
+QUAKE_RADIUS_KM = 100
+QUAKE_MIN_MAGNITUDE = 4.0
+WEATHER_TTL = int(os.getenv("GRIDWATCH_WEATHER_TTL", "900"))  # open-meteo updates current conditions every 15 min
 
 # Event severity and probability for realistic distribution
 EVENT_PROFILES = {
@@ -111,31 +57,12 @@ def fetch_open311_requests(city: str, city_data: Dict) -> List[Dict]:
         jurisdiction = city_data["open311_jurisdiction"]
         print(f"   📋 Fetching Open311 requests for {jurisdiction}...")
         
-        # Most Open311 endpoints are open and don't require auth
-        # Using a standard endpoint pattern
-        base_url = f"https://open311.{jurisdiction}/api/v2"
-        
-        # Try common Open311 endpoints
-        endpoints = [
-            f"https://311.{jurisdiction}/api/v2/requests.json",
-            f"https://api.{jurisdiction}/open311/requests.json",
-            f"https://open311.{jurisdiction}/api/v2/requests.json",
-        ]
-        
-        for endpoint in endpoints:
-            try:
-                response = requests.get(
-                    endpoint,
-                    params={"status": "open", "limit": 50},
-                    timeout=5
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    requests_list = data if isinstance(data, list) else data.get("requests", [])
-                    print(f"      ✅ Found {len(requests_list)} Open311 requests")
-                    return requests_list[:20]  # Return top 20
-            except:
-                continue
+        # Most Open311 endpoints are open and don't require auth. Which guessed
+        # endpoint works (or doesn't) is remembered across runs by the discovery cache
+        requests_list, endpoint = get_discovery().fetch(jurisdiction, {"status": "open", "limit": 50})
+        if endpoint:
+            print(f"      ✅ Found {len(requests_list)} Open311 requests")
+            return requests_list[:20]  # Return top 20
         
         print(f"      ⚠️  Open311 endpoint not available for {jurisdiction}")
         return []
@@ -154,7 +81,7 @@ def fetch_weather_alerts(city: str, city_data: Dict) -> List[Dict]:
         print(f"   🌦️  Checking weather alerts for {city}...")
         
         # Using open-meteo.com (free, no API key needed)
-        response = requests.get(
+        response = http_cache.get(
             "https://api.open-meteo.com/v1/forecast",
             params={
                 "latitude": city_data["lat"],
@@ -163,6 +90,8 @@ def fetch_weather_alerts(city: str, city_data: Dict) -> List[Dict]:
                 "daily": "weather_code,precipitation_sum,wind_speed_max",
                 "timezone": "auto",
             },
+            default_ttl=WEATHER_TTL,  # open-meteo sends no caching headers
+            breaker="open-meteo",
             timeout=5
         )
         
@@ -193,6 +122,11 @@ def fetch_weather_alerts(city: str, city_data: Dict) -> List[Dict]:
                     "source": "weather",
                 })
             
+            if getattr(response, "stale", False):
+                # open-meteo circuit is open or the call failed: last good conditions
+                for alert in alerts:
+                    alert["stale"] = True
+            
             if alerts:
                 print(f"      ✅ Found {len(alerts)} weather alerts")
             
@@ -205,63 +139,75 @@ def fetch_weather_alerts(city: str, city_data: Dict) -> List[Dict]:
         return []
 
 
-def fetch_usgs_earthquakes(city: str, city_data: Dict) -> List[Dict]:
+def fetch_usgs_feed() -> List[Dict]:
     """
-    Fetch recent earthquakes using USGS API.
-    Only relevant for certain regions but adds realism.
+    Fetch the USGS significant-earthquakes feed (free, no key needed).
+    One download serves every city; see quakes_near_cities().
     """
     try:
-        print(f"   🌍 Checking for seismic activity near {city}...")
-        
-        lat = city_data["lat"]
-        lng = city_data["lng"]
-        
-        # USGS Earthquake Hazards API (free, no key needed)
-        response = requests.get(
-            "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/significant_month.geojson",
-            timeout=5
-        )
-        
+        print("   🌍 Fetching USGS significant earthquakes feed...")
+        response = http_cache.get(USGS_FEED_URL, breaker="usgs", timeout=5)
         if response.status_code == 200:
-            data = response.json()
-            features = data.get("features", [])
-            
-            # Filter earthquakes within ~100km of city
-            nearby_quakes = []
-            for feature in features:
-                props = feature.get("properties", {})
-                coords = feature.get("geometry", {}).get("coordinates", [])
-                
-                if len(coords) >= 2:
-                    quake_lng, quake_lat = coords[0], coords[1]
-                    
-                    # Calculate distance
-                    dist_km = haversine(lat, lng, quake_lat, quake_lng)
-                    
-                    if dist_km < 100:
-                        magnitude = props.get("mag", 3.0)
-                        
-                        if magnitude >= 4.0:  # Only significant quakes
-                            nearby_quakes.append({
-                                "type": "accident",  # Could cause accidents
-                                "description": f"Magnitude {magnitude} earthquake detected",
-                                "severity": min(0.9, 0.4 + magnitude * 0.1),
-                                "source": "usgs",
-                                "magnitude": magnitude,
-                            })
-            
-            if nearby_quakes:
-                print(f"      ✅ Found {len(nearby_quakes)} recent earthquakes")
-            
-            return nearby_quakes
-        
+            features = response.json().get("features", [])
+            if getattr(response, "stale", False):
+                print("      ⚠️  USGS unavailable, using last good feed")
+                for feature in features:
+                    feature.setdefault("properties", {})["stale"] = True
+            return features
         return []
-        
     except Exception as e:
         print(f"      ⚠️  Error fetching earthquakes: {e}")
         return []
 
 
+def quakes_near_cities(features: List[Dict], cities: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    """
+    Spatially join quake features to city centers in one vectorized pass:
+    quakes of magnitude >= 4.0 within ~100km of each city.
+    """
+    nearby: Dict[str, List[Dict]] = {city: [] for city in cities}
+    located = [f for f in features if len((f.get("geometry") or {}).get("coordinates") or []) >= 2]
+    if not located or not cities:
+        return nearby
+
+    q = np.array(
+        [(f["geometry"]["coordinates"][1], f["geometry"]["coordinates"][0], f.get("properties", {}).get("mag") or 3.0)
+         for f in located],
+        dtype=np.float64,
+    )
+    names = list(cities)
+    c = np.array([(cities[n]["lat"], cities[n]["lng"]) for n in names], dtype=np.float64)
+    dist_km = haversine_matrix(c[:, 0], c[:, 1], q[:, 0], q[:, 1])  # cities x quakes
+    hits = (dist_km < QUAKE_RADIUS_KM) & (q[:, 2] >= QUAKE_MIN_MAGNITUDE)
+
+    for ci, qi in zip(*np.nonzero(hits)):
+        magnitude = float(q[qi, 2])
+        quake = {
+            "type": "accident",  # Could cause accidents
+            "description": f"Magnitude {magnitude} earthquake detected",
+            "severity": min(0.9, 0.4 + magnitude * 0.1),
+            "source": "usgs",
+            "magnitude": magnitude,
+        }
+        if located[qi].get("properties", {}).get("stale"):
+            quake["stale"] = True
+        nearby[names[ci]].append(quake)
+    return nearby
+
+
+def fetch_usgs_earthquakes(city: str, city_data: Dict, features: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Recent significant earthquakes near one city.
+    Pass `features` from fetch_usgs_feed() to avoid downloading the feed again.
+    """
+    if features is None:
+        features = fetch_usgs_feed()
+    nearby_quakes = quakes_near_cities(features, {city: city_data})[city]
+    if nearby_quakes:
+        print(f"      ✅ Found {len(nearby_quakes)} recent earthquakes near {city}")
+    return nearby_quakes
+
+
 def generate_synthetic_incidents(city: str, city_data: Dict) -> List[Dict]:
     """
     Generate realistic synthetic incidents based on city characteristics.
@@ -319,6 +265,19 @@ def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     return R * c
 
 
+def haversine_matrix(lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+    """Pairwise distances in km between points 1 (rows) and points 2 (columns)."""
+    R = 6371  # Earth radius in km
+    
+    lat1_rad = np.radians(lat1)[:, None]
+    lat2_rad = np.radians(lat2)[None, :]
+    delta_lat = lat2_rad - lat1_rad
+    delta_lng = np.radians(lng2)[None, :] - np.radians(lng1)[:, None]
+    
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lng / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
 def transform_incident_to_evidence(incident: Dict, city: str) -> Optional[Evidence]:
     """Transform incident data to Evidence format."""
     try:
@@ -360,40 +319,91 @@ def transform_incident_to_evidence(incident: Dict, city: str) -> Optional[Eviden
         return None
 
 
-def aggregate_incidents_for_city(city: str, city_data: Dict) -> List[Evidence]:
-    """
-    Aggregate incidents from all sources for a city.
-    """
-    print(f"\n🔗 Aggregating data for {city}...")
-    
-    all_incidents = []
-    
-    # Fetch from multiple sources
-    open311_requests = fetch_open311_requests(city, city_data)
-    all_incidents.extend(open311_requests)
-    
-    weather_alerts = fetch_weather_alerts(city, city_data)
-    all_incidents.extend(weather_alerts)
-    
-    earthquakes = fetch_usgs_earthquakes(city, city_data)
-    all_incidents.extend(earthquakes)
-    
+def _to_evidence(city: str, city_data: Dict, fetched: List[Dict]) -> List[Evidence]:
+    """Add synthetic incidents to the fetched ones and transform all of them to Evidence."""
     # Always add synthetic to ensure diversity
-    synthetic = generate_synthetic_incidents(city, city_data)
-    all_incidents.extend(synthetic)
+    all_incidents = fetched + generate_synthetic_incidents(city, city_data)
     
-    # Transform to Evidence
     evidence_list = []
     for incident in all_incidents:
         evidence = transform_incident_to_evidence(incident, city)
         if evidence:
             evidence_list.append(evidence)
     
-    print(f"   📊 Total: {len(evidence_list)} evidence items aggregated")
-    
+    print(f"   📊 {city}: {len(evidence_list)} evidence items aggregated")
     return evidence_list
 
 
+def aggregate_incidents_for_city(city: str, city_data: Dict, usgs_features: Optional[List[Dict]] = None) -> List[Evidence]:
+    """
+    Aggregate incidents from all sources for a single city (sequentially).
+    """
+    print(f"\n🔗 Aggregating data for {city}...")
+    
+    fetched = []
+    fetched.extend(fetch_open311_requests(city, city_data))
+    fetched.extend(fetch_weather_alerts(city, city_data))
+    fetched.extend(fetch_usgs_earthquakes(city, city_data, usgs_features))
+    return _to_evidence(city, city_data, fetched)
+
+
+async def aggregate_all_cities(cities: Dict[str, Dict] = CITIES,
+                               executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, List[Evidence]]:
+    """
+    Aggregate every city concurrently. Open311 and weather calls for all
+    cities plus the single USGS feed download share MAX_CONCURRENCY worker
+    threads, so a run takes about as long as the slowest upstream call.
+    """
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(MAX_CONCURRENCY, thread_name_prefix="aggregator")
+
+    def call(fn, *args):
+        return loop.run_in_executor(executor, fn, *args)
+
+    try:
+        usgs_future = call(fetch_usgs_feed)
+        per_city = [
+            asyncio.gather(call(fetch_open311_requests, city, city_data), call(fetch_weather_alerts, city, city_data))
+            for city, city_data in cities.items()
+        ]
+        city_results = await asyncio.gather(*per_city, return_exceptions=True)
+        quakes = quakes_near_cities(await usgs_future, cities)
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+    evidence_by_city = {}
+    for (city, city_data), result in zip(cities.items(), city_results):
+        if isinstance(result, Exception):
+            print(f"   ❌ Error processing {city}: {result}")
+            result = ([], [])
+        open311_requests, weather_alerts = result
+        fetched = open311_requests + weather_alerts + quakes[city]
+        evidence_by_city[city] = _to_evidence(city, city_data, fetched)
+    return evidence_by_city
+
+
+def post_city_evidence(city: str, evidence_list: List[Evidence], backend_url: str) -> int:
+    """Queue one city's evidence on the backend shipper; returns the queued count."""
+    if not evidence_list:
+        print(f"   ℹ️  No incidents for {city}")
+        return 0
+    count = get_shipper(backend_url, producer="hybrid-aggregator").submit(evidence_list)
+    print(f"   📤 Queued {count} incidents for {city}")
+    return count
+
+
+async def _ingest_all_cities(backend_url: str) -> Dict[str, int]:
+    with ThreadPoolExecutor(MAX_CONCURRENCY, thread_name_prefix="aggregator") as executor:
+        evidence_by_city = await aggregate_all_cities(CITIES, executor)
+    # All cities go out in a few coalesced batches instead of one POST each
+    return {
+        city: post_city_evidence(city, evidence_list, backend_url)
+        for city, evidence_list in evidence_by_city.items()
+    }
+
+
 def ingest_all_cities(backend_url: str = "http://localhost:8000") -> Dict[str, int]:
     """
     Aggregate and ingest incidents for all cities.
@@ -403,40 +413,12 @@ def ingest_all_cities(backend_url: str = "http://localhost:8000") -> Dict[str, i
     print("   Sources: Open311 + Weather + USGS + Synthetic")
     print("=" * 60)
     
-    results = {}
-    total_ingested = 0
-    
-    for city, city_data in CITIES.items():
-        try:
-            # Aggregate from all sources
-            evidence_list = aggregate_incidents_for_city(city, city_data)
-            
-            if not evidence_list:
-                print(f"   ℹ️  No incidents for {city}")
-                results[city] = 0
-                continue
-            
-            # Ingest into backend
-            try:
-                response = requests.post(
-                    f"{backend_url}/evidence",
-                    json=[e.model_dump(mode='json') for e in evidence_list],
-                    timeout=10
-                )
-                response.raise_for_status()
-                
-                count = response.json().get("count", len(evidence_list))
-                print(f"   ✅ Ingested {count} incidents into backend")
-                results[city] = count
-                total_ingested += count
-                
-            except requests.exceptions.RequestException as e:
-                print(f"   ❌ Backend error: {e}")
-                results[city] = 0
-        
-        except Exception as e:
-            print(f"   ❌ Error processing {city}: {e}")
-            results[city] = 0
+    started = time.perf_counter()
+    results = asyncio.run(_ingest_all_cities(backend_url))
+    total_ingested = sum(results.values())
+    shipper = get_shipper(backend_url, producer="hybrid-aggregator")
+    if not shipper.flush(timeout=30):
+        print("⚠️ Backend not reachable; remaining evidence is spooled and will be replayed on the next run")
     
     # Summary
     print("\n" + "=" * 60)
@@ -447,7 +429,13 @@ def ingest_all_cities(backend_url: str = "http://localhost:8000") -> Dict[str, i
         status = "✅" if count > 0 else "⚠️"
         print(f"{status} {city:25} {count:3} incidents")
     
-    print(f"\n🎯 Total Incidents Ingested: {total_ingested}")
+    print(f"\n🎯 Total Incidents Ingested: {total_ingested} in {time.perf_counter() - started:.1f}s")
+    print(shipper.summary())
+    print(http_client.summary())
+    print(http_cache.summary())
+    print(get_discovery().summary())
+    if circuit_breaker.summary():
+        print(circuit_breaker.summary())
     print("=" * 60)
     
     return results
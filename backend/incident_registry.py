@@ -0,0 +1,211 @@
+"""
+Incident Registry
+Keeps incident identity stable across fusion windows.
+
+`build_incidents` re-clusters the evidence snapshot from scratch on every call,
+so on its own every request yields brand-new incidents. The registry matches
+each freshly fused cluster to a tracked incident of the same type whose
+footprint overlaps it, and carries over the id, first-seen time and status.
+Unmatched clusters become new incidents; tracked incidents that stop showing
+up move from `active` to `monitoring` and finally to `resolved`.
+"""
+
+import math
+import uuid
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from models import Incident
+
+# Grid cell size (degrees) for the candidate lookup, ~1.1 km at the equator
+_CELL_DEG = 0.01
+
+# Fields whose change bumps an incident's version
+_VERSIONED_FIELDS = ("lat", "lng", "severity", "confidence", "summary", "status")
+
+
+def _live_first(inc: Incident) -> Tuple[bool, float]:
+    # Live incidents first, then by severity
+    return (inc.status == "resolved", -inc.severity)
+
+
+def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance in meters (accurate enough at city scale)."""
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371000 * math.hypot(x, y)
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return (math.floor(lat / _CELL_DEG), math.floor(lng / _CELL_DEG))
+
+
+class IncidentRegistry:
+    """
+    Tracks incidents across rebuilds and assigns stable ids.
+
+    Args:
+        match_radius_m: Minimum radius used for overlap tests, so point-like
+                        clusters still match when the centroid drifts a little
+        monitoring_after_s: Seconds unseen before an incident turns `monitoring`
+        resolve_after_s: Seconds unseen before an incident turns `resolved`
+        retain_s: Seconds a resolved incident is kept before it is dropped
+    """
+
+    def __init__(
+        self,
+        match_radius_m: int = 150,
+        monitoring_after_s: int = 600,
+        resolve_after_s: int = 1800,
+        retain_s: int = 6 * 3600,
+    ):
+        self.match_radius_m = match_radius_m
+        self.monitoring_after = timedelta(seconds=monitoring_after_s)
+        self.resolve_after = timedelta(seconds=resolve_after_s)
+        self.retain = timedelta(seconds=retain_s)
+
+        self.version = 0  # bumped whenever any tracked incident changes
+        # (before, after) pairs from the last reconcile; None marks creation/removal
+        self.changes: List[Tuple[Optional[Incident], Optional[Incident]]] = []
+        self._incidents: Dict[str, Incident] = {}
+        self._last_seen: Dict[str, datetime] = {}
+        self._grid: Dict[Tuple[int, int], set] = {}
+        self._lock = Lock()
+
+    # ------------------------------------------------------------------
+    def _index(self, inc: Incident) -> None:
+        self._grid.setdefault(_cell(inc.lat, inc.lng), set()).add(inc.id)
+
+    def _unindex(self, inc: Incident) -> None:
+        ids = self._grid.get(_cell(inc.lat, inc.lng))
+        if ids:
+            ids.discard(inc.id)
+            if not ids:
+                del self._grid[_cell(inc.lat, inc.lng)]
+
+    def _candidates(self, inc: Incident) -> List[Tuple[float, str]]:
+        """Tracked incidents of the same type whose footprint overlaps `inc`."""
+        r_new = max(inc.radius_m or 0, self.match_radius_m)
+        # Search enough neighbouring cells to cover the largest plausible overlap
+        reach = 1 + int((2 * r_new) / (_CELL_DEG * 111000))
+        ci, cj = _cell(inc.lat, inc.lng)
+        found = []
+        for di in range(-reach, reach + 1):
+            for dj in range(-reach, reach + 1):
+                for inc_id in self._grid.get((ci + di, cj + dj), ()):
+                    old = self._incidents[inc_id]
+                    if old.type != inc.type:
+                        continue
+                    d = _distance_m(inc.lat, inc.lng, old.lat, old.lng)
+                    if d <= r_new + max(old.radius_m or 0, self.match_radius_m):
+                        found.append((d, inc_id))
+        return found
+
+    def _new_id(self, inc: Incident) -> str:
+        return f"{inc.type}-{uuid.uuid4().hex[:12]}"
+
+    # ------------------------------------------------------------------
+    def reconcile(self, fused: List[Incident], now: Optional[datetime] = None) -> List[Incident]:
+        """
+        Merge a fresh `build_incidents` result into the registry.
+
+        Returns all tracked incidents (active, monitoring and recently
+        resolved), live ones first and then by severity, carrying stable ids
+        and timestamps.
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            changed: List[Tuple[Optional[Incident], Optional[Incident]]] = []
+            claimed = set()
+
+            # Greedy nearest-first matching so each tracked incident is claimed once
+            pairs = []
+            for idx, inc in enumerate(fused):
+                for d, inc_id in self._candidates(inc):
+                    pairs.append((d, idx, inc_id))
+            pairs.sort()
+            match: Dict[int, str] = {}
+            for d, idx, inc_id in pairs:
+                if idx in match or inc_id in claimed:
+                    continue
+                match[idx] = inc_id
+                claimed.add(inc_id)
+
+            for idx, inc in enumerate(fused):
+                inc_id = match.get(idx)
+                if inc_id is None:
+                    tracked = inc.model_copy(update={
+                        "id": self._new_id(inc),
+                        "status": "active",
+                        "created_at": now,
+                        "updated_at": now,
+                        "version": 1,
+                    })
+                    inc_id = tracked.id
+                    self._incidents[inc_id] = tracked
+                    self._index(tracked)
+                    changed.append((None, tracked))
+                else:
+                    old = self._incidents[inc_id]
+                    candidate = inc.model_copy(update={
+                        "id": inc_id,
+                        "status": "active",
+                        "created_at": old.created_at,
+                        "updated_at": old.updated_at,
+                        "version": old.version,
+                    })
+                    if any(getattr(candidate, f) != getattr(old, f) for f in _VERSIONED_FIELDS) \
+                            or len(candidate.sources) != len(old.sources):
+                        candidate = candidate.model_copy(update={
+                            "updated_at": now,
+                            "version": old.version + 1,
+                        })
+                        changed.append((old, candidate))
+                    self._unindex(old)
+                    self._incidents[inc_id] = candidate
+                    self._index(candidate)
+                self._last_seen[inc_id] = now
+
+            # Age out incidents that were not seen in this window
+            for inc_id, inc in list(self._incidents.items()):
+                if self._last_seen.get(inc_id) == now:
+                    continue
+                unseen = now - self._last_seen.get(inc_id, now)
+                if unseen >= self.resolve_after + self.retain:
+                    self._unindex(inc)
+                    del self._incidents[inc_id]
+                    self._last_seen.pop(inc_id, None)
+                    changed.append((inc, None))
+                    continue
+                if unseen >= self.resolve_after:
+                    status = "resolved"
+                elif unseen >= self.monitoring_after:
+                    status = "monitoring"
+                else:
+                    status = inc.status
+                if status != inc.status:
+                    aged = inc.model_copy(update={
+                        "status": status,
+                        "updated_at": now,
+                        "version": inc.version + 1,
+                    })
+                    self._incidents[inc_id] = aged
+                    changed.append((inc, aged))
+
+            if changed:
+                self.version += 1
+            self.changes = changed
+
+            out = list(self._incidents.values())
+        out.sort(key=_live_first)
+        return out
+
+    def snapshot(self) -> List[Incident]:
+        """All tracked incidents as of the last reconcile, ordered like its result."""
+        with self._lock:
+            out = list(self._incidents.values())
+        out.sort(key=_live_first)
+        return out
+
+    def get(self, inc_id: str) -> Optional[Incident]:
+        return self._incidents.get(inc_id)
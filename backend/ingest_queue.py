@@ -0,0 +1,155 @@
+"""
+Ingest Queue
+Bounded, per-producer fair queue between POST /evidence and the EvidenceBus.
+
+Requests only enqueue; a dedicated consumer thread drains the queue into the
+bus round-robin across producers. When the queue is full, or a producer
+already has its share of it outstanding, the batch is rejected as a whole and
+the caller gets a Retry-After hint derived from the observed drain rate.
+"""
+
+import math
+import threading
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Callable, Deque, Dict, List, Optional
+from models import Evidence
+
+
+class IngestRejected(Exception):
+    """Raised when a batch cannot be queued; maps to HTTP 429 (or 413)."""
+
+    def __init__(self, reason: str, retry_after: int, status_code: int = 429):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class IngestQueue:
+    """
+    Args:
+        sink: Called for every drained evidence item (e.g. `bus.add`)
+        max_items: Total queue capacity
+        producer_share: Fraction of capacity one producer may occupy
+        batch_size: Items drained per consumer pass
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Evidence], None],
+        max_items: int = 20000,
+        producer_share: float = 0.25,
+        batch_size: int = 500,
+    ):
+        self.sink = sink
+        self.max_items = max_items
+        self.producer_quota = max(1, int(max_items * producer_share))
+        self.batch_size = batch_size
+
+        self._queues: "OrderedDict[str, Deque[Evidence]]" = OrderedDict()
+        self._depth = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._drain_rate = 0.0  # items/second, exponentially smoothed
+
+        self.accepted = 0
+        self.rejected = 0
+
+    # -- producer side ---------------------------------------------------------
+    def _retry_after(self) -> int:
+        if self._drain_rate <= 0:
+            return 1
+        return max(1, min(30, math.ceil(self._depth / self._drain_rate)))
+
+    def offer(self, producer: str, items: List[Evidence]) -> int:
+        """Queue a batch for `producer` or raise IngestRejected."""
+        self.start()
+        with self._cond:
+            if len(items) > self.producer_quota:
+                self.rejected += len(items)
+                raise IngestRejected(
+                    f"Batch of {len(items)} exceeds per-producer quota of {self.producer_quota}; split it",
+                    retry_after=0,
+                    status_code=413,
+                )
+            pending = len(self._queues.get(producer, ()))
+            if pending + len(items) > self.producer_quota:
+                self.rejected += len(items)
+                raise IngestRejected(f"Producer '{producer}' has {pending} items pending", self._retry_after())
+            if self._depth + len(items) > self.max_items:
+                self.rejected += len(items)
+                raise IngestRejected("Ingest queue is full", self._retry_after())
+
+            self._queues.setdefault(producer, deque()).extend(items)
+            self._depth += len(items)
+            self.accepted += len(items)
+            self._cond.notify()
+        return len(items)
+
+    # -- consumer side ---------------------------------------------------------
+    def _take(self) -> List[Evidence]:
+        """Round-robin up to batch_size items across producers (lock held)."""
+        batch: List[Evidence] = []
+        share = max(1, self.batch_size // max(1, len(self._queues)))
+        for producer in list(self._queues):
+            q = self._queues[producer]
+            for _ in range(min(share, len(q))):
+                batch.append(q.popleft())
+            if q:
+                self._queues.move_to_end(producer)  # next pass starts with someone else
+            else:
+                del self._queues[producer]
+            if len(batch) >= self.batch_size:
+                break
+        self._depth -= len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._depth and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._depth:
+                    return
+                batch = self._take()
+
+            started = monotonic()
+            for ev in batch:
+                try:
+                    self.sink(ev)
+                except Exception as e:
+                    print(f"Error ingesting evidence {ev.evidence_id}: {e}")
+            elapsed = max(monotonic() - started, 1e-6)
+            rate = len(batch) / elapsed
+            self._drain_rate = rate if not self._drain_rate else 0.8 * self._drain_rate + 0.2 * rate
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="ingest-consumer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain what is queued, then stop the consumer."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "depth": self._depth,
+                "capacity": self.max_items,
+                "producers": {p: len(q) for p, q in self._queues.items()},
+                "drain_rate": round(self._drain_rate, 1),
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+            }
@@ -1,11 +1,22 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from models import Evidence
+import os
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread
+from typing import List, Optional, Tuple
+from models import Evidence, Incident
 from evidence_bus import EvidenceBus
+from ingest_queue import IngestQueue, IngestRejected
+from incident_registry import IncidentRegistry
 from orchestrator import build_incidents
+from tiles import TileIndex, MAX_ZOOM
+from clusters import ClusterIndex
+from heatmap import SeverityHeatmap, RESOLUTIONS, quantize, encode_png
+from cities import CITIES
+from archive import IncidentArchive
+from encoding import RequestDecompressionMiddleware, render
 from transform import to_public
-from db_firestore import upsert_incidents, query_incidents
+from db_firestore import upsert_incidents, query_incidents, warm_up as warm_up_firestore
 
 app = FastAPI(title="GridWatch Orchestrator")
 
@@ -17,43 +28,215 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Producers POST /evidence gzip-compressed (evidence_shipper.py)
+app.add_middleware(RequestDecompressionMiddleware)
 
 # Extended TTL to 1 hour - incidents stay fresh for longer
 bus = EvidenceBus(ttl_seconds=3600)
 
+# POST /evidence only enqueues; a consumer thread drains into the bus
+ingest_queue = IngestQueue(
+    bus.add,
+    max_items=int(os.getenv("GRIDWATCH_INGEST_QUEUE_SIZE", "20000")),
+    producer_share=float(os.getenv("GRIDWATCH_INGEST_PRODUCER_SHARE", "0.25")),
+)
+
+# Per-city severity grids, updated as evidence enters and leaves the bus
+heatmap = SeverityHeatmap(CITIES)
+bus.listeners.append(heatmap)
+
+# Hourly columnar history of evidence and incident changes on local disk
+archive = IncidentArchive(os.getenv("GRIDWATCH_ARCHIVE_DIR", "archive"))
+bus.listeners.append(archive)
+
+# Keeps incident ids and first-seen times stable across rebuilds
+registry = IncidentRegistry()
+
+# Vector tiles over the tracked incidents, invalidated per changed incident
+tile_index = TileIndex()
+
+# Zoom-level cluster aggregates, updated incrementally from the same changes
+cluster_index = ClusterIndex()
+
+# Incidents are rebuilt and aged this often by a background thread; reads
+# only take a snapshot of the registry
+REFRESH_SECONDS = float(os.getenv("GRIDWATCH_REFRESH_SECONDS", "5"))
+
+_refresh_lock = Lock()
+_refresh_stop = Event()
+
+def _refresh_incidents() -> List[Incident]:
+    """
+    Fuse the fresh evidence snapshot, reconcile it with tracked incidents
+    (which also ages unseen ones) and hand the changes to the map indexes,
+    the archive and Firestore. Returns the incidents changed by this rebuild.
+    """
+    with _refresh_lock:
+        registry.reconcile(build_incidents(bus.snapshot()))
+        if registry.changes:
+            tile_index.apply(registry.changes, registry.version)
+            cluster_index.apply(registry.changes)
+        changed = [after for _, after in registry.changes if after is not None]
+        for inc in changed:
+            archive.add_incident(inc)
+    # Persist only incidents that changed since the last rebuild
+    upsert_incidents([to_public(i).model_dump() for i in changed])
+    return changed
+
+def _refresh_loop() -> None:
+    while not _refresh_stop.wait(REFRESH_SECONDS):
+        try:
+            _refresh_incidents()
+        except Exception as e:  # keep refreshing; the next round retries
+            print(f"⚠️ Incident refresh failed: {e}")
+
+def _parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    return (min_lng, min_lat, max_lng, max_lat)
+
+def _parse_iso(value: str) -> Optional[datetime]:
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Incident timestamps are naive UTC
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+@app.on_event("startup")
+def start_ingest():
+    ingest_queue.start()
+
+@app.on_event("startup")
+def start_refresh():
+    _refresh_stop.clear()
+    Thread(target=_refresh_loop, name="incident-refresh", daemon=True).start()
+
+@app.on_event("startup")
+def warm_persistence():
+    # Connect to Firestore off the request path; /health answers meanwhile
+    warm_up_firestore()
+
+@app.on_event("shutdown")
+def flush_archive():
+    _refresh_stop.set()
+    ingest_queue.stop()
+    archive.close()
+
 @app.get("/health")
 def health():
     return {"ok": True}
 
-@app.post("/evidence")
-def ingest_evidence(items: List[Evidence]):
-    # Ingest into in-memory bus for fresh fusion
-    for ev in items:
-        bus.add(ev)
-    return {"count": len(items)}
+@app.post("/evidence", status_code=202)
+def ingest_evidence(request: Request, items: List[Evidence]):
+    # Queue for the bus consumer; reject the whole batch when we are behind
+    producer = request.headers.get("x-producer-id") or (request.client.host if request.client else "unknown")
+    try:
+        count = ingest_queue.offer(producer, items)
+    except IngestRejected as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.status_code == 429 else None
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers=headers)
+    return {"count": count}
+
+@app.get("/evidence/queue")
+def ingest_queue_stats():
+    return ingest_queue.stats()
 
 @app.get("/incidents")
 def list_incidents(
+    request: Request,
     limit: int = Query(20, ge=1, le=100),
-    since: Optional[str] = Query(None, description="ISO-8601 timestamp")
+    since: Optional[str] = Query(None, description="ISO-8601 timestamp"),
+    include_resolved: bool = Query(False, description="Also return resolved incidents"),
 ):
-    # Build from fresh evidence snapshot
-    internals = build_incidents(bus.snapshot())[:limit]
-    public = [to_public(i).model_dump() for i in internals]
-
-    # Persist latest snapshot to Firestore (idempotent)
-    upsert_incidents(public)
-
     # Try to serve from Firestore, fallback to fresh data if Firestore unavailable
-    rows = query_incidents(limit=limit, since_iso=since)
+    rows = query_incidents(limit=limit, since_iso=since, include_resolved=include_resolved)
     
-    # If Firestore is not available or returns empty, serve fresh data
+    # If Firestore is not available or returns empty, serve the tracked incidents
     if not rows:
-        # Convert datetime objects to ISO strings for JSON response
-        for incident in public:
-            incident['created_at'] = incident['created_at'].isoformat()
-            if incident.get('time'):
-                incident['time'] = incident['time'].isoformat()
-        rows = public[:limit]
+        internals = registry.snapshot()
+        if not include_resolved:
+            internals = [i for i in internals if i.status != "resolved"]
+        since_ts = _parse_iso(since) if since else None
+        if since_ts:
+            internals = [i for i in internals if i.created_at > since_ts]
+        rows = [to_public(i).model_dump() for i in internals[:limit]]
     
-    return {"data": rows}
+    # Datetimes are encoded per the negotiated format (ISO-8601 or epoch ms)
+    return render(request, {"data": rows})
+
+@app.get("/incidents/clusters")
+def list_clusters(
+    request: Request,
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    bbox: str = Query("-180,-85,180,85", description="min_lng,min_lat,max_lng,max_lat"),
+):
+    return render(request, {"data": cluster_index.query(zoom, _parse_bbox(bbox)), "version": registry.version})
+
+@app.get("/heatmap")
+def get_heatmap(
+    city: str = Query(..., description="City name, e.g. 'Washington, DC'"),
+    resolution: int = Query(128, description="Cells per side: 32, 64, 128 or 256"),
+    format: str = Query("bin", pattern="^(bin|png)$"),
+    decay: bool = Query(False, description="Apply exponential time decay"),
+):
+    if city not in heatmap.grids:
+        raise HTTPException(status_code=404, detail=f"Unknown city: {city}")
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {RESOLUTIONS}")
+
+    bus.expire()
+    gray, peak = quantize(heatmap.grid(city, resolution, decay=decay))
+    headers = {
+        "X-Heatmap-Width": str(resolution),
+        "X-Heatmap-Height": str(resolution),
+        "X-Heatmap-Bounds": ",".join(f"{v:.6f}" for v in heatmap.grids[city].bounds),
+        "X-Heatmap-Max": f"{peak:.6g}",
+    }
+    if format == "png":
+        return Response(content=encode_png(gray), media_type="image/png", headers=headers)
+    return Response(content=gray.tobytes(), media_type="application/octet-stream", headers=headers)
+
+@app.get("/history")
+def get_history(
+    request: Request,
+    start: Optional[str] = Query(None, alias="from", description="ISO-8601 start (default: 24h before `to`)"),
+    end: Optional[str] = Query(None, alias="to", description="ISO-8601 end (default: now)"),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    types: Optional[str] = Query(None, description="Comma-separated event types"),
+    kind: str = Query("incidents", pattern="^(incidents|evidence)$"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    end_ts = _parse_iso(end) if end else datetime.utcnow()
+    start_ts = _parse_iso(start) if start else end_ts - timedelta(hours=24)
+    if start_ts is None or end_ts is None:
+        raise HTTPException(status_code=400, detail="from/to must be ISO-8601 timestamps")
+
+    rows = archive.query(
+        kind,
+        start_ts,
+        end_ts,
+        bbox=_parse_bbox(bbox) if bbox else None,
+        types=[t for t in types.split(",") if t] if types else None,
+        limit=limit,
+    )
+    return render(request, {"data": rows})
+
+@app.get("/tiles/{z}/{x}/{y}")
+@app.get("/tiles/{z}/{x}/{y}.pbf")
+def get_tile(z: int, x: int, y: int, request: Request):
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+
+    etag, data = tile_index.get_tile(z, x, y)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={REFRESH_SECONDS:.0f}"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    if not data:
+        return Response(status_code=204, headers=headers)
+    return Response(content=data, media_type="application/vnd.mapbox-vector-tile", headers=headers)
@@ -41,6 +41,7 @@ class Incident(BaseModel):
     status: IncidentStatus = "active"
     lat: float
     lng: float
+    radius_m: int = 80
     severity: float
     confidence: float
     summary: Optional[str] = None
@@ -48,4 +49,6 @@ class Incident(BaseModel):
     sources: List[Dict] = []
     why: WhyCard = WhyCard()
     actions: List[ActionStep] = []
-    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+    version: int = 1
\ No newline at end of file
@@ -24,3 +24,4 @@ class IncidentOut(BaseModel):
     actions: List[PublicAction]
     created_at: datetime
     time: Optional[datetime] = None
+    version: int = 1
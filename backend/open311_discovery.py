@@ -0,0 +1,177 @@
+"""
+Open311 Endpoint Discovery
+Remembers which guessed Open311 endpoint answers for each jurisdiction so
+the aggregator does not walk the same dead URLs on every run.
+
+- The working endpoint per jurisdiction is persisted (JSON state file) and
+  tried first; only when it fails are the candidates probed again
+- Candidates are probed in parallel; the first valid Open311 answer wins
+- Failed endpoints are negatively cached: re-probed after 15 min, then
+  30 min, 1 h ... up to a week (exponential, per endpoint)
+- A jurisdiction whose candidates are all negatively cached costs nothing
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import http_cache
+
+STATE_PATH = os.getenv(
+    "GRIDWATCH_OPEN311_STATE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "open311_endpoints.json"),
+)
+REPROBE_BASE_S = int(os.getenv("GRIDWATCH_OPEN311_REPROBE_S", "900"))
+REPROBE_MAX_S = 7 * 24 * 3600
+PROBE_TIMEOUT = 5
+
+# Guessed endpoint layouts; most cities expose at most one of them
+CANDIDATE_PATTERNS = (
+    "https://311.{jurisdiction}/api/v2/requests.json",
+    "https://api.{jurisdiction}/open311/requests.json",
+    "https://open311.{jurisdiction}/api/v2/requests.json",
+)
+
+
+def candidate_endpoints(jurisdiction: str) -> List[str]:
+    return [pattern.format(jurisdiction=jurisdiction) for pattern in CANDIDATE_PATTERNS]
+
+
+def _parse_requests(response) -> List[Dict]:
+    """Service requests from an Open311 answer; raises ValueError if it isn't one."""
+    if response.status_code != 200:
+        raise ValueError(f"HTTP {response.status_code}")
+    data = response.json()
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get("requests"), list):
+        return data["requests"]
+    raise ValueError("not an Open311 requests document")
+
+
+class Open311Discovery:
+    """
+    Args:
+        path: JSON state file (working endpoint + dead endpoints per jurisdiction)
+        timeout: Seconds each probe may take
+    """
+
+    def __init__(self, path: str = STATE_PATH, timeout: float = PROBE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.counters = {"known_hits": 0, "probes": 0, "skipped_dead": 0, "discovered": 0}
+        self._state: Dict[str, Dict] = self._load()
+
+    # -- state -------------------------------------------------------------------
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable Open311 state {self.path}: {e}")
+            return {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _entry(self, jurisdiction: str) -> Dict:
+        return self._state.setdefault(jurisdiction, {"working": None, "dead": {}})
+
+    def _mark_dead(self, jurisdiction: str, url: str, error: str) -> None:
+        dead = self._entry(jurisdiction)["dead"]
+        failures = dead.get(url, {}).get("failures", 0) + 1
+        delay = min(REPROBE_MAX_S, REPROBE_BASE_S * 2 ** (failures - 1))
+        dead[url] = {"failures": failures, "retry_at": time.time() + delay, "error": error[:200]}
+
+    def _mark_working(self, jurisdiction: str, url: str) -> None:
+        entry = self._entry(jurisdiction)
+        entry["working"] = url
+        entry["dead"].pop(url, None)
+
+    # -- fetching ----------------------------------------------------------------
+    def _try(self, url: str, params: Dict) -> List[Dict]:
+        self.counters["probes"] += 1
+        return _parse_requests(http_cache.get(url, params=params, timeout=self.timeout))
+
+    def fetch(self, jurisdiction: str, params: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Return (service requests, endpoint used); ([], None) when nothing answers."""
+        params = params or {}
+        with self._lock:
+            known = self._entry(jurisdiction)["working"]
+
+        if known:
+            try:
+                found = self._try(known, params)
+                self.counters["known_hits"] += 1
+                return found, known
+            except Exception as e:
+                with self._lock:
+                    self._entry(jurisdiction)["working"] = None
+                    self._mark_dead(jurisdiction, known, f"{type(e).__name__}: {e}")
+                    self._save()
+
+        now = time.time()
+        with self._lock:
+            dead = self._entry(jurisdiction)["dead"]
+            candidates = [u for u in candidate_endpoints(jurisdiction)
+                          if u != known and dead.get(u, {}).get("retry_at", 0) <= now]
+            self.counters["skipped_dead"] += len(candidate_endpoints(jurisdiction)) - len(candidates)
+        if not candidates:
+            return [], None
+
+        result: Tuple[List[Dict], Optional[str]] = ([], None)
+        executor = ThreadPoolExecutor(len(candidates), thread_name_prefix=f"open311-{jurisdiction}")
+        futures = {executor.submit(self._try, url, params): url for url in candidates}
+        try:
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    found = future.result()
+                except Exception as e:
+                    with self._lock:
+                        self._mark_dead(jurisdiction, url, f"{type(e).__name__}: {e}")
+                    continue
+                with self._lock:
+                    self._mark_working(jurisdiction, url)
+                self.counters["discovered"] += 1
+                result = (found, url)
+                break  # slower probes finish in the background and are ignored
+        finally:
+            executor.shutdown(wait=False)
+            with self._lock:
+                self._save()
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            working = sum(1 for e in self._state.values() if e.get("working"))
+            dead = sum(len(e.get("dead", {})) for e in self._state.values())
+        return {**self.counters, "working_endpoints": working, "dead_endpoints": dead}
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"🧭 Open311: {s['working_endpoints']} known endpoints, {s['dead_endpoints']} negatively cached, "
+                f"{s['probes']} requests, {s['skipped_dead']} dead probes skipped")
+
+
+_discovery: Optional[Open311Discovery] = None
+_discovery_lock = threading.Lock()
+
+
+def get_discovery() -> Open311Discovery:
+    global _discovery
+    if _discovery is None:
+        with _discovery_lock:
+            if _discovery is None:
+                _discovery = Open311Discovery()
+    return _discovery
@@ -40,6 +40,7 @@ def build_incidents(evidence: List[Evidence]) -> List[Incident]:
             type=inc_type,
             lat=lat,
             lng=lng,
+            radius_m=max(e.radius_m or 80 for e in cluster),
             confidence=verdict["confidence"],
             severity=verdict["severity"],
             summary=base_summary,
@@ -0,0 +1,247 @@
+"""
+Vector Tiles
+Serves tracked incidents as Mapbox Vector Tiles (MVT) for map rendering.
+
+Incidents are bucketed per zoom level by Web Mercator tile, so a tile request
+only touches the incidents that fall inside it. Encoded tiles are cached and
+invalidated surgically: when the registry reports a changed incident, only the
+tiles covering its old and new position are dropped. Resolved incidents are
+left out, as in the cluster index.
+"""
+
+import math
+import struct
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models import Incident
+
+EXTENT = 4096          # MVT coordinate space per tile
+BUFFER = 64            # extra margin (in tile units) so edge markers are not clipped
+MAX_ZOOM = 22
+INDEX_MAX_ZOOM = 16    # deeper zooms filter the z16 bucket instead of keeping more levels
+LAYER_NAME = "incidents"
+
+TileKey = Tuple[int, int, int]
+
+
+# ---------------------------------------------------------------------------
+# Web Mercator helpers
+# ---------------------------------------------------------------------------
+def lnglat_to_world(lng: float, lat: float) -> Tuple[float, float]:
+    """Project lng/lat to Web Mercator world coordinates in [0, 1)."""
+    lat = max(-85.05112878, min(85.05112878, lat))
+    x = (lng + 180.0) / 360.0
+    s = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return (min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12))
+
+
+def world_to_lnglat(x: float, y: float) -> Tuple[float, float]:
+    lng = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return (lng, lat)
+
+
+def tile_for(x: float, y: float, z: int) -> Tuple[int, int]:
+    n = 1 << z
+    return (int(x * n), int(y * n))
+
+
+# ---------------------------------------------------------------------------
+# Minimal protobuf writer for the MVT schema (points only)
+# ---------------------------------------------------------------------------
+def _varint(v: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = v & 0x7F
+        v >>= 7
+        if v:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _zigzag(v: int) -> int:
+    return (v << 1) ^ (v >> 63)
+
+
+def _field(num: int, wire: int) -> bytes:
+    return _varint((num << 3) | wire)
+
+
+def _len_field(num: int, payload: bytes) -> bytes:
+    return _field(num, 2) + _varint(len(payload)) + payload
+
+
+def _encode_value(v) -> bytes:
+    if isinstance(v, str):
+        return _len_field(1, v.encode("utf-8"))
+    if isinstance(v, bool):
+        return _field(7, 0) + _varint(int(v))
+    if isinstance(v, int):
+        return _field(6, 0) + _varint(_zigzag(v))
+    return _field(2, 5) + struct.pack("<f", float(v))
+
+
+def encode_tile(features: List[Tuple[int, int, Dict]]) -> bytes:
+    """
+    Encode point features as a single-layer MVT.
+
+    Args:
+        features: (x, y, properties) with x/y in tile coordinates [0, EXTENT)
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    body = bytearray()
+    for x, y, props in features:
+        tags = bytearray()
+        for k, v in props.items():
+            if v is None:
+                continue
+            ki = keys.setdefault(k, len(keys))
+            vi = values.setdefault((type(v), v), len(values))
+            tags += _varint(ki) + _varint(vi)
+        geom = _varint((1 << 3) | 1) + _varint(_zigzag(x)) + _varint(_zigzag(y))
+        feat = _len_field(2, bytes(tags)) + _field(3, 0) + _varint(1) + _len_field(4, geom)
+        body += _len_field(2, feat)
+
+    layer = bytearray(_field(15, 0) + _varint(2) + _len_field(1, LAYER_NAME.encode()))
+    layer += body
+    for k in keys:
+        layer += _len_field(3, k.encode("utf-8"))
+    for (_, v) in values:
+        layer += _len_field(4, _encode_value(v))
+    layer += _field(5, 0) + _varint(EXTENT)
+    return _len_field(3, bytes(layer))
+
+
+def _feature_props(inc: Incident) -> Dict:
+    return {
+        "id": inc.id,
+        "type": inc.type,
+        "status": inc.status,
+        "severity": round(inc.severity, 2),
+        "confidence": round(inc.confidence, 2),
+        "version": inc.version,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Index + cache
+# ---------------------------------------------------------------------------
+class TileIndex:
+    """
+    Per-zoom tile buckets over tracked incidents, plus an LRU of encoded tiles.
+
+    Args:
+        cache_size: Maximum number of encoded tiles kept in memory
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._points: Dict[str, Tuple[float, float, Incident]] = {}
+        self._buckets: List[Dict[Tuple[int, int], Set[str]]] = [dict() for _ in range(INDEX_MAX_ZOOM + 1)]
+        self._cache: "OrderedDict[TileKey, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = Lock()
+        self.version = 0  # registry version the indexed incidents belong to (ETags)
+        self.hits = 0
+        self.misses = 0
+
+    # -- maintenance -------------------------------------------------------
+    def _covering(self, x: float, y: float) -> Iterable[TileKey]:
+        """Every cached tile whose buffered area contains world point (x, y)."""
+        for z in range(MAX_ZOOM + 1):
+            n = 1 << z
+            pad = BUFFER / EXTENT
+            tx, ty = x * n, y * n
+            for cx in {int(tx - pad), int(tx), int(tx + pad)}:
+                for cy in {int(ty - pad), int(ty), int(ty + pad)}:
+                    if 0 <= cx < n and 0 <= cy < n:
+                        yield (z, cx, cy)
+
+    def _add(self, inc: Incident) -> None:
+        x, y = lnglat_to_world(inc.lng, inc.lat)
+        self._points[inc.id] = (x, y, inc)
+        for z, buckets in enumerate(self._buckets):
+            buckets.setdefault(tile_for(x, y, z), set()).add(inc.id)
+        for key in self._covering(x, y):
+            self._cache.pop(key, None)
+
+    def _remove(self, inc_id: str) -> None:
+        entry = self._points.pop(inc_id, None)
+        if entry is None:
+            return
+        x, y, _ = entry
+        for z, buckets in enumerate(self._buckets):
+            t = tile_for(x, y, z)
+            ids = buckets.get(t)
+            if ids:
+                ids.discard(inc_id)
+                if not ids:
+                    del buckets[t]
+        for key in self._covering(x, y):
+            self._cache.pop(key, None)
+
+    def apply(self, changes: List[Tuple[Optional[Incident], Optional[Incident]]], version: int) -> None:
+        """Apply (before, after) changes from `IncidentRegistry.reconcile` that produced registry `version`."""
+        with self._lock:
+            for before, after in changes:
+                if before is not None:
+                    self._remove(before.id)
+                # Resolved incidents drop off the map
+                if after is not None and after.status != "resolved":
+                    self._add(after)
+            self.version = version
+
+    # -- queries -----------------------------------------------------------
+    def _incidents_in(self, z: int, x: int, y: int) -> List[Tuple[float, float, Incident]]:
+        iz = min(z, INDEX_MAX_ZOOM)
+        shift = z - iz
+        pad = BUFFER / EXTENT
+        n = 1 << z
+        min_x, max_x = (x - pad) / n, (x + 1 + pad) / n
+        min_y, max_y = (y - pad) / n, (y + 1 + pad) / n
+        ids: Set[str] = set()
+        buckets = self._buckets[iz]
+        # Neighbouring buckets contribute points that fall into the buffer
+        for bx in range((x >> shift) - 1, (x >> shift) + 2):
+            for by in range((y >> shift) - 1, (y >> shift) + 2):
+                ids |= buckets.get((bx, by), set())
+        out = []
+        for inc_id in ids:
+            px, py, inc = self._points[inc_id]
+            if min_x <= px < max_x and min_y <= py < max_y:
+                out.append((px, py, inc))
+        return out
+
+    def get_tile(self, z: int, x: int, y: int) -> Tuple[str, bytes]:
+        """
+        Return (etag, mvt bytes) for a tile; empty bytes if it has no incidents.
+        The ETag carries the version of the incidents the tile was built from.
+        """
+        key = (z, x, y)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+            n = 1 << z
+            features = []
+            for px, py, inc in self._incidents_in(z, x, y):
+                fx = int(round((px * n - x) * EXTENT))
+                fy = int(round((py * n - y) * EXTENT))
+                features.append((fx, fy, _feature_props(inc)))
+            # Deterministic order keeps identical content byte-identical
+            features.sort(key=lambda f: f[2]["id"])
+            data = encode_tile(features) if features else b""
+
+            entry = (f'"{self.version}-{z}-{x}-{y}"', data)
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return entry
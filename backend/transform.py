@@ -30,5 +30,6 @@ def to_public(inc: Incident) -> IncidentOut:
         sources=sources,
         actions=actions,
         created_at=inc.created_at,
-        time=inc.created_at,  # or last-updated timestamp if you track it
+        time=inc.updated_at or inc.created_at,
+        version=inc.version,
     )
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Agent jobs for GridWatch worker processes.
+Each job runs inside that agent's long-lived worker (see agent_workers.py),
+whose working directory and sys.path already point at the agent package.
+Coordinators are imported once by warm_up() and every job awaits the
+coordinator directly on the worker's persistent event loop. Digests go
+through the digest cache (digest_cache.py), so a prompt repeated within the
+agent's TTL costs no LLM call, and Gemini calls go through the shared
+"gemini" circuit breaker: while it is open the worker reuses the last good
+digest for the prompt and marks the evidence built from it as stale.
+Crime, environment and emergency digests are parsed while the model streams
+them (json_stream.py); each entry's evidence is emitted to the runner as
+soon as it closes. Coordinator sessions are keyed by city (session_pool.py).
+Each coordinator instruments its agents for latency, token and cost metrics
+(llm_metrics.py) when it builds them.
+"""
+import os
+import time
+import zlib
+import logging
+from functools import partial
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from circuit_breaker import get_breaker
+from digest_cache import get_cache, normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+def _bbox_center(bbox: str) -> Tuple[float, float]:
+    bbox_parts = bbox.split(',')
+    if len(bbox_parts) == 4:
+        min_lng, min_lat, max_lng, max_lat = map(float, bbox_parts)
+        return (min_lat + max_lat) / 2.0, (min_lng + max_lng) / 2.0
+    return 38.9000, -77.0365
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _city_tag(city: str) -> str:
+    # Jobs for several cities run at once; evidence ids must not collide across them
+    return f"{zlib.crc32(city.encode()):08x}"
+
+# -- warm-up -------------------------------------------------------------------
+def _warm_coordinator(module: str) -> None:
+    coordinator = __import__(module)
+    coordinator.get_runner()  # builds LlmAgent + Runner + InMemorySessionService once
+
+WARM_UPS: Dict[str, Callable[[], None]] = {
+    "traffic": lambda: __import__("orca").get_traffic_update_agent(),
+    "energy": lambda: _warm_coordinator("energy_coordinator"),
+    "crime": lambda: _warm_coordinator("crime_coordinator"),
+    "environment": lambda: _warm_coordinator("environment_coordinator"),
+    "emergency": lambda: _warm_coordinator("emergency_coordinator"),
+}
+
+def warm_up(agent: str) -> None:
+    """Import the agent's coordinator and build its runner."""
+    if agent == "energy" and not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        return  # energy jobs are skipped without credentials, nothing to warm
+    WARM_UPS[agent]()
+
+# -- digests -------------------------------------------------------------------
+class _StaleDigest(Exception):
+    """Carries a last-good digest out of the cache so it is not stored as fresh."""
+
+    def __init__(self, digest):
+        self.digest = digest
+
+async def _get_digest(agent: str, prompt: str, run: Callable[[str], Awaitable[Any]], model) -> Tuple[Any, bool]:
+    """(digest, stale) for `prompt`: digest cache first, then Gemini behind its circuit breaker."""
+    gemini = get_breaker("gemini")
+
+    async def guarded(p: str):
+        digest, stale = await gemini.acall(run, p, key=(agent, normalize_prompt(p)))
+        if stale:
+            raise _StaleDigest(digest)
+        return digest
+
+    try:
+        return await get_cache().get_digest(agent, prompt, guarded, model), False
+    except _StaleDigest as e:
+        logger.warning(f"⚠️ Gemini circuit open, using last good {agent} digest")
+        return e.digest, True
+
+def _mark_stale(evidence_items: List[Dict[str, Any]], stale: bool) -> List[Dict[str, Any]]:
+    if stale:
+        for item in evidence_items:
+            item["raw"]["stale"] = True
+    return evidence_items
+
+# -- jobs ----------------------------------------------------------------------
+Emit = Optional[Callable[[List[Dict[str, Any]]], None]]
+
+def _streaming(run: Callable[..., Awaitable[Any]], to_evidence: Callable[[List[Dict[str, Any]], int], List[Dict[str, Any]]],
+               emit: Emit, city: str) -> Tuple[Callable[[str], Awaitable[Any]], List[Dict[str, Any]]]:
+    """
+    Wrap a coordinator's aget_*_digest so each digest entry is turned into
+    evidence (and emitted to the runner) as soon as the model closes it.
+    Returns the wrapped call and the list the evidence collects in.
+    """
+    streamed: List[Dict[str, Any]] = []
+
+    def on_item(entry: Dict[str, Any]) -> None:
+        evidence = to_evidence([entry], len(streamed))
+        streamed.extend(evidence)
+        if emit is not None and evidence:
+            emit(evidence)
+
+    return lambda prompt: run(prompt, on_item=on_item, session_key=city), streamed
+
+async def run_traffic(city: str, bbox: str, emit: Emit = None) -> List[Dict[str, Any]]:
+    import orca
+    await orca.call_traffic_update_agent_async("Traffic update alert: road block detected.", bbox=bbox, city=city)
+    # The traffic orchestrator already posts to backend, so we return empty
+    return []
+
+async def run_energy(city: str, bbox: str, emit: Emit = None) -> List[Dict[str, Any]]:
+    # Skip energy agents if no Google Cloud credentials
+    if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+        logger.info("Skipping energy agents - no Google Cloud credentials found")
+        return []
+
+    from energy_coordinator import aget_energy_digest, EnergyDigestOutput
+    lat, lng = _bbox_center(bbox)
+    prompt = f"My location is {lat}, {lng}. Provide power-outage information for the next 24 hours in {city} including official utility notices and reliable local news reports."
+    digest, stale = await _get_digest("energy", prompt, partial(aget_energy_digest, session_key=city), EnergyDigestOutput)
+
+    evidence_items = []
+    if hasattr(digest, 'outage_summary') and digest.outage_summary:
+        for i, outage in enumerate(digest.outage_summary):
+            evidence_items.append({
+                "evidence_id": f"energy_outage_{int(time.time())}_{_city_tag(city)}_{i}",
+                "source_type": "news",
+                "type": "power_outage",
+                "lat": float(lat),
+                "lng": float(lng),
+                "radius_m": 200,
+                "confidence": 0.8,
+                "url": None,
+                "raw": {"agent": "EnergyAgent", "outage": outage},
+                "detected_at": _now_iso(),
+            })
+    return _mark_stale(evidence_items, stale)
+
+def _incident_evidence(agent: str, label: str, radius_m: int, incident: Dict[str, Any], city: str, i: int) -> Dict[str, Any]:
+    return {
+        "evidence_id": f"{agent}_{int(time.time())}_{_city_tag(city)}_{i}",
+        "source_type": "news",
+        "type": agent,
+        "lat": incident['lat'],
+        "lng": incident['lng'],
+        "radius_m": radius_m,
+        "confidence": incident['confidence'],
+        "url": None,
+        "raw": {
+            "agent": label,
+            "incident": incident,
+            "sources": incident.get('sources', [])
+        },
+        "detected_at": _now_iso(),
+    }
+
+async def run_crime(city: str, bbox: str, emit: Emit = None) -> List[Dict[str, Any]]:
+    from crime_coordinator import aget_crime_digest, CrimeDigestOutput
+    from gridwatch_adapter import convert_crime_digest_to_incidents
+
+    lat, lng = _bbox_center(bbox)
+
+    def to_evidence(entries: Any, start: int) -> List[Dict[str, Any]]:
+        incidents = convert_crime_digest_to_incidents(entries, lat, lng).get('incidents', [])
+        return [_incident_evidence("crime", "CrimeAgent", 200, inc, city, start + i) for i, inc in enumerate(incidents)]
+
+    run, streamed = _streaming(aget_crime_digest, to_evidence, emit, city)
+    digest, stale = await _get_digest("crime", f"Show crime in {city} last 24 hours", run, CrimeDigestOutput)
+    if streamed:
+        return list(streamed)
+
+    evidence_items = []
+    if hasattr(digest, 'crime_digest') and digest.crime_digest:
+        evidence_items = to_evidence(digest.crime_digest, 0)
+    return _mark_stale(evidence_items, stale)
+
+async def run_environment(city: str, bbox: str, emit: Emit = None) -> List[Dict[str, Any]]:
+    from environment_coordinator import aget_environment_digest, EnvironmentDigestOutput
+    from gridwatch_adapter import convert_environment_digest_to_incidents
+
+    lat, lng = _bbox_center(bbox)
+
+    def to_evidence(entries: Any, start: int) -> List[Dict[str, Any]]:
+        incidents = convert_environment_digest_to_incidents(entries, lat, lng).get('incidents', [])
+        return [_incident_evidence("environment", "EnvironmentAgent", 500, inc, city, start + i)
+                for i, inc in enumerate(incidents)]
+
+    run, streamed = _streaming(aget_environment_digest, to_evidence, emit, city)
+    digest, stale = await _get_digest("environment", f"Show environmental hazards in {city}", run, EnvironmentDigestOutput)
+    if streamed:
+        return list(streamed)
+
+    evidence_items = []
+    if hasattr(digest, 'environment_digest') and digest.environment_digest:
+        evidence_items = to_evidence(digest.environment_digest, 0)
+    return _mark_stale(evidence_items, stale)
+
+async def run_emergency(city: str, bbox: str, emit: Emit = None) -> List[Dict[str, Any]]:
+    from emergency_coordinator import aget_emergency_digest, EmergencyDigestOutput
+    from gridwatch_adapter import EmergencyToGridWatchAdapter
+
+    def to_evidence(entries: Any, start: int) -> List[Dict[str, Any]]:
+        incidents = EmergencyToGridWatchAdapter.adapt_emergency_incidents(entries)
+        return [_incident_evidence("emergency", "EmergencyAgent", 300, inc, city, start + i)
+                for i, inc in enumerate(incidents)]
+
+    run, streamed = _streaming(aget_emergency_digest, to_evidence, emit, city)
+    digest, stale = await _get_digest("emergency", f"Show active emergencies in {city}", run, EmergencyDigestOutput)
+    if streamed:
+        return list(streamed)
+
+    evidence_items = []
+    if hasattr(digest, 'emergency_digest') and digest.emergency_digest:
+        evidence_items = to_evidence(digest.emergency_digest, 0)
+    return _mark_stale(evidence_items, stale)
+
+JOBS = {
+    "traffic": run_traffic,
+    "energy": run_energy,
+    "crime": run_crime,
+    "environment": run_environment,
+    "emergency": run_emergency,
+}
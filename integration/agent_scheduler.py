@@ -0,0 +1,132 @@
+"""
+Adaptive Agent Scheduler for GridWatch
+Decides when each agent runs next instead of one fixed poll interval.
+
+- Per-agent base interval: AGENT_POLL_INTERVAL_<AGENT>, else AGENT_POLL_INTERVAL
+  for every agent, else DEFAULT_INTERVALS
+- Change-rate adaptation: when an agent's digest differs from its previous
+  one the interval shrinks (down to base / 4); each repeat grows it (up to
+  base * 4)
+- Errors back off exponentially from the base interval (capped at MAX_BACKOFF)
+- Every delay gets +/- JITTER so agents don't stay in lockstep
+"""
+import os
+import json
+import time
+import random
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+# Seconds between runs when the digest neither changes nor repeats
+DEFAULT_INTERVALS: Dict[str, float] = {
+    "traffic": 300,
+    "emergency": 300,
+    "crime": 900,
+    "energy": 900,
+    "environment": 1800,
+}
+
+MIN_FACTOR = 0.25     # fastest: base / 4
+MAX_FACTOR = 4.0      # slowest: base * 4
+SPEED_UP = 0.5        # interval multiplier when the digest changed
+SLOW_DOWN = 1.5       # interval multiplier when it repeated
+MAX_BACKOFF = float(os.getenv("AGENT_MAX_BACKOFF", "3600"))
+JITTER = float(os.getenv("AGENT_POLL_JITTER", "0.1"))
+
+# Fields that differ on every run even when the digest is the same, at any
+# depth: ids and timestamps of the evidence, the adapters' raw.incident.updatedAt
+# and the raw.stale marker of a digest served from the last-good cache
+_VOLATILE_KEYS = frozenset(("evidence_id", "detected_at", "updatedAt", "stale"))
+
+def base_interval(agent: str) -> float:
+    value = os.getenv(f"AGENT_POLL_INTERVAL_{agent.upper()}") or os.getenv("AGENT_POLL_INTERVAL")
+    return float(value) if value else DEFAULT_INTERVALS.get(agent, 300)
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+def fingerprint(evidence: List[Dict[str, Any]]) -> str:
+    """Stable hash of an agent's evidence, ignoring ids, timestamps and staleness at any depth."""
+    return hashlib.sha1(json.dumps(_strip_volatile(evidence), sort_keys=True, default=str).encode()).hexdigest()
+
+
+class AgentSchedule:
+    __slots__ = ("agent", "base", "interval", "next_due", "failures", "last_hash", "runs", "changes")
+
+    def __init__(self, agent: str, base: float, now: float):
+        self.agent = agent
+        self.base = base
+        self.interval = base
+        self.next_due = now
+        self.failures = 0
+        self.last_hash: Optional[str] = None
+        self.runs = 0
+        self.changes = 0
+
+
+class AgentScheduler:
+    """
+    Args:
+        agents: Agent names to schedule; all are due immediately
+        jitter: Fraction of each delay added or removed at random
+    """
+
+    def __init__(self, agents: Iterable[str], jitter: float = JITTER, clock=time.monotonic):
+        self.clock = clock
+        self.jitter = jitter
+        now = clock()
+        self.schedules = {agent: AgentSchedule(agent, base_interval(agent), now) for agent in agents}
+
+    def _delay(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due(self) -> List[str]:
+        now = self.clock()
+        return [a for a, s in self.schedules.items() if s.next_due <= now]
+
+    def seconds_until_next(self) -> float:
+        return max(0.0, min(s.next_due for s in self.schedules.values()) - self.clock())
+
+    def record_success(self, agent: str, digest_hash: Optional[str] = None) -> float:
+        """
+        Schedule the next run after a successful one. Without a digest hash
+        (e.g. traffic, which posts its own evidence) the base interval is kept.
+        """
+        s = self.schedules[agent]
+        s.failures = 0
+        s.runs += 1
+        if digest_hash is not None and s.last_hash is not None:
+            if digest_hash != s.last_hash:
+                s.changes += 1
+                s.interval = max(s.base * MIN_FACTOR, s.interval * SPEED_UP)
+            else:
+                s.interval = min(s.base * MAX_FACTOR, s.interval * SLOW_DOWN)
+        s.last_hash = digest_hash if digest_hash is not None else s.last_hash
+        delay = self._delay(s.interval)
+        s.next_due = self.clock() + delay
+        return delay
+
+    def record_failure(self, agent: str) -> float:
+        """Back off exponentially from the base interval; the adapted interval is kept for recovery."""
+        s = self.schedules[agent]
+        s.failures += 1
+        delay = self._delay(min(MAX_BACKOFF, s.base * 2 ** (s.failures - 1)))
+        s.next_due = self.clock() + delay
+        return delay
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = self.clock()
+        return {
+            agent: {
+                "interval_s": round(s.interval),
+                "next_in_s": round(max(0.0, s.next_due - now)),
+                "failures": s.failures,
+                "runs": s.runs,
+                "changes": s.changes,
+            }
+            for agent, s in self.schedules.items()
+        }
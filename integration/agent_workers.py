@@ -0,0 +1,452 @@
+"""
+Agent Worker Pool for GridWatch
+One long-lived process per agent type. A worker chdirs into its agent
+package, imports the coordinator once, keeps the ADK Runner and session
+service warm and runs every job as a task on the same event loop, so one
+worker serves many cities at once (run_many(), bounded per agent and across
+the pool). Jobs and results travel over a local pipe; the pool pings idle
+workers between cycles and restarts any that died, hung or stopped
+answering. A job that overruns its timeout is cancelled inside the worker;
+the worker itself is only restarted if it then fails to answer. The loop
+keeps turning between jobs for background digest refreshes (digest_cache.py).
+Evidence parsed from a digest while the model is still streaming it is sent
+ahead of the result as "partial" messages. Every model call, tool call and
+agent run is timed and its token usage appended, with the job's city, to
+cache/llm_metrics.jsonl (llm_metrics.py).
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import itertools
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTEGRATION_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENTS_DIR = os.path.join(INTEGRATION_DIR, '..', 'agents', 'vendor', 'namma')
+AGENT_LIB_DIR = os.path.abspath(os.path.join(INTEGRATION_DIR, '..', 'agents', 'gridwatch_agents', 'src'))
+# A worker whose resident memory passes this is recycled after its job (0 disables)
+RSS_WATERMARK_MB = float(os.getenv("GRIDWATCH_WORKER_RSS_MB", "1024"))
+BACKEND_DIR = os.path.abspath(os.path.join(INTEGRATION_DIR, '..', 'backend'))
+# Jobs (one per agent and city) in flight per worker and across the pool
+AGENT_CONCURRENCY = int(os.getenv("GRIDWATCH_AGENT_CONCURRENCY", "10"))
+MAX_CONCURRENT_JOBS = int(os.getenv("GRIDWATCH_MAX_CONCURRENT_JOBS", "25"))
+LLM_METRICS_PATH = os.getenv("GRIDWATCH_LLM_METRICS", os.path.join(INTEGRATION_DIR, "cache", "llm_metrics.jsonl"))
+
+def agent_limit(agent: str) -> int:
+    """Jobs one agent's worker runs at once: GRIDWATCH_AGENT_CONCURRENCY_<AGENT>, else GRIDWATCH_AGENT_CONCURRENCY."""
+    value = os.getenv(f"GRIDWATCH_AGENT_CONCURRENCY_{agent.upper()}")
+    return max(1, int(value) if value else AGENT_CONCURRENCY)
+
+# -- worker process ------------------------------------------------------------
+def _worker_main(agent: str, conn) -> None:
+    """Worker process loop: warm up once, then serve (job_id, kind, params) messages."""
+    logging.basicConfig(level=logging.INFO)
+    os.environ["GRIDWATCH_LLM_METRICS"] = LLM_METRICS_PATH  # before chdir, so every worker shares one file
+    agent_dir = os.path.abspath(os.path.join(AGENTS_DIR, agent))
+    os.chdir(agent_dir)
+    sys.path.insert(0, agent_dir)
+    if INTEGRATION_DIR not in sys.path:
+        sys.path.append(INTEGRATION_DIR)
+    if BACKEND_DIR not in sys.path:
+        sys.path.append(BACKEND_DIR)  # shared circuit breakers / HTTP client
+    if AGENT_LIB_DIR not in sys.path:
+        sys.path.append(AGENT_LIB_DIR)  # geocoder, digest parser, session pool
+    import agent_jobs
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    warm_error = None
+    started = time.perf_counter()
+    try:
+        agent_jobs.warm_up(agent)
+    except Exception as e:
+        # Not fatal: restarting would hit the same import error, so report it per job
+        warm_error = f"{type(e).__name__}: {e}"
+    conn.send(("ready", warm_error is None, {"warm_s": time.perf_counter() - started, "error": warm_error}))
+
+    job = agent_jobs.JOBS[agent]
+    try:
+        loop.run_until_complete(_serve(conn, job, warm_error))
+    except KeyboardInterrupt:
+        pass
+    loop.close()
+    # multiprocessing children skip atexit; send (or spool) evidence orca still buffers
+    # and write out queued metric events
+    shipper = sys.modules.get("evidence_shipper")
+    if shipper is not None:
+        shipper.close_all()
+    metrics = sys.modules.get("llm_metrics")
+    if metrics is not None:
+        metrics.close()
+
+async def _serve(conn, job, warm_error: Optional[str]) -> None:
+    """
+    Serve messages until the parent sends None or hangs up. Every job runs
+    as its own task, so one worker has many cities in flight at once; the
+    loop never stops, which also keeps background digest refreshes going.
+    """
+    from llm_metrics import metrics_context
+    from session_pool import rss_mb
+
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    def on_readable() -> None:
+        try:
+            while conn.poll():
+                inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait(None)
+
+    loop.add_reader(conn.fileno(), on_readable)
+    tasks: Dict[int, asyncio.Task] = {}
+    try:
+        while True:
+            msg = await inbox.get()
+            if msg is None:
+                break
+            job_id, kind, params = msg
+            if kind == "ping":
+                conn.send((job_id, True, {"rss_mb": rss_mb(), "jobs": len(tasks)}))
+                continue
+            if kind == "cancel":
+                # The parent gave up on this job; the answer doubles as a ping
+                task = tasks.get(params.get("job"))
+                if task is not None:
+                    task.cancel()
+                conn.send((job_id, True, {"cancelled": task is not None, "rss_mb": rss_mb(), "jobs": len(tasks)}))
+                continue
+            if warm_error:
+                conn.send((job_id, False, warm_error))
+                continue
+            with metrics_context(city=params.get("city")):  # the task and refreshes it spawns inherit the city
+                task = loop.create_task(_run_job(conn, job, job_id, params))
+            tasks[job_id] = task
+            task.add_done_callback(lambda _, job_id=job_id: tasks.pop(job_id, None))
+    finally:
+        try:
+            loop.remove_reader(conn.fileno())
+        except (OSError, ValueError):
+            pass
+        pending = list(tasks.values())
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending, timeout=5)
+
+async def _run_job(conn, job, job_id: int, params: Dict[str, Any]) -> None:
+    from session_pool import rss_mb
+
+    started = time.perf_counter()
+    streamed = [0]
+
+    def emit(items):
+        # Evidence parsed from a still-streaming digest goes to the parent right away;
+        # background refreshes after the job has answered emit nothing
+        if items and streamed[0] >= 0:
+            conn.send((job_id, "partial", items))
+            streamed[0] += len(items)
+
+    try:
+        evidence = await job(**params, emit=emit)
+        conn.send((job_id, True, {
+            "evidence": evidence, "streamed": streamed[0], "elapsed_s": time.perf_counter() - started,
+            "rss_mb": rss_mb(),
+        }))
+    except Exception as e:
+        conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        streamed[0] = -1
+
+# -- parent side -----------------------------------------------------------------
+class AgentWorker:
+    """Parent-side handle for one agent's worker process."""
+
+    def __init__(self, agent: str, ctx):
+        self.agent = agent
+        self._ctx = ctx
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.rss_mb: Optional[float] = None
+        self.ready: Optional[Dict[str, Any]] = None
+        self._ids = itertools.count(1)
+
+    def start(self) -> None:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        self.process = self._ctx.Process(
+            target=_worker_main, args=(self.agent, child_conn), name=f"agent-{self.agent}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.ready = None
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        self.process = None
+
+    def restart(self, reason: str) -> None:
+        logger.warning(f"🔁 Restarting {self.agent} worker: {reason}")
+        if self.process is not None:
+            # A hung or dead worker gets no chance to finish its job
+            self.process.terminate()
+            self.process.join(5)
+            self.conn.close()
+            self.process = None
+        self.restarts += 1
+        self.start()
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def send(self, kind: str, params: Optional[Dict[str, Any]] = None) -> int:
+        job_id = next(self._ids)
+        self.conn.send((job_id, kind, params or {}))
+        return job_id
+
+    def receive(self) -> Optional[Tuple[Any, bool, Any]]:
+        """
+        Next message from the worker. The ready handshake is recorded rather
+        than returned; None means it was the only message waiting.
+        """
+        msg = self.conn.recv()
+        if msg[0] == "ready":
+            self.ready = msg[2]
+            if not msg[1]:
+                logger.error(f"❌ {self.agent} worker could not warm up: {msg[2]['error']}")
+            else:
+                logger.info(f"🔥 {self.agent} worker warm in {msg[2]['warm_s']:.1f}s")
+            return self.conn.recv() if self.conn.poll() else None
+        return msg
+
+class AgentWorkerPool:
+    """
+    Long-lived worker per agent type.
+
+    Args:
+        agents: Agent names (directories under agents/vendor/namma)
+        ping_timeout: Seconds an idle worker has to answer a health check
+        rss_limit_mb: Memory watermark; a worker reporting more resident
+            memory after a job or ping is restarted (0 disables)
+        max_jobs: Jobs in flight across all workers in run_many()
+    """
+
+    def __init__(self, agents: Iterable[str], ping_timeout: float = 10.0,
+                 rss_limit_mb: float = RSS_WATERMARK_MB, max_jobs: int = MAX_CONCURRENT_JOBS):
+        self._ctx = multiprocessing.get_context("spawn")
+        self.workers = {agent: AgentWorker(agent, self._ctx) for agent in agents}
+        self.ping_timeout = ping_timeout
+        self.rss_limit_mb = rss_limit_mb
+        self.max_jobs = max(1, max_jobs)
+        self._started = False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        for worker in self.workers.values():
+            worker.start()
+        self._started = True
+
+    def shutdown(self) -> None:
+        for worker in self.workers.values():
+            worker.stop()
+        self._started = False
+
+    def _check_memory(self, worker: AgentWorker, report: Any, busy: bool = False) -> None:
+        """Record the RSS a worker reported and recycle it above the watermark (once it is idle)."""
+        if not isinstance(report, dict) or report.get("rss_mb") is None:
+            return
+        worker.rss_mb = report["rss_mb"]
+        if not busy and self.rss_limit_mb and worker.rss_mb > self.rss_limit_mb:
+            worker.restart(f"RSS {worker.rss_mb:.0f} MB over the {self.rss_limit_mb:.0f} MB watermark")
+
+    def health_check(self) -> Dict[str, bool]:
+        """Ping every idle worker; restart the ones that are dead or silent."""
+        self.start()
+        healthy = {agent: False for agent in self.workers}
+        pending = {}
+        for worker in self.workers.values():
+            if not worker.alive():
+                worker.restart("process exited")
+            elif worker.ready is None and worker.conn.poll():
+                worker.receive()  # pick up the ready handshake
+            if worker.ready is None:
+                # Still importing / building its runner; being alive is enough
+                healthy[worker.agent] = True
+                continue
+            try:
+                pending[worker.agent] = worker.send("ping")
+            except (OSError, BrokenPipeError):
+                worker.restart("pipe closed")
+                healthy[worker.agent] = True
+
+        deadline = time.monotonic() + self.ping_timeout
+        waiting = {self.workers[a].conn: self.workers[a] for a in pending}
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for conn in wait(list(waiting), remaining):
+                worker = waiting[conn]
+                try:
+                    msg = worker.receive()
+                except (EOFError, OSError):
+                    del waiting[conn]
+                    continue
+                if msg is not None and msg[0] == pending[worker.agent]:
+                    healthy[worker.agent] = msg[1]
+                    del waiting[conn]
+                    self._check_memory(worker, msg[2])
+
+        for agent, ok in healthy.items():
+            if not ok and agent in pending:
+                self.workers[agent].restart("health check failed")
+        return healthy
+
+    def run(self, jobs: Dict[str, Dict[str, Any]], timeout: float,
+            on_partial: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None) -> Iterator[Tuple[str, bool, Any]]:
+        """
+        Send one job per agent and yield (agent, ok, result_or_error) as each
+        finishes. Jobs that exceed `timeout` are cancelled; workers that die
+        or stop answering are restarted.
+
+        Evidence a job streams before finishing is passed to `on_partial`;
+        the final result still lists all of it, the first `streamed` items of
+        which were already handed out this way.
+        """
+        for agent, _, ok, result in self.run_many(jobs.items(), timeout, on_partial):
+            yield agent, ok, result
+
+    def run_many(self, jobs: Iterable[Tuple[str, Dict[str, Any]]], timeout: float,
+                 on_partial: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None,
+                 ) -> Iterator[Tuple[str, Dict[str, Any], bool, Any]]:
+        """
+        Run any number of (agent, params) jobs, e.g. one per (agent, city),
+        and yield (agent, params, ok, result_or_error) as each finishes.
+
+        A worker runs up to agent_limit(agent) of its jobs at once on its event
+        loop and the pool keeps at most max_jobs in flight overall. Free slots
+        go to the agents in turn, so one agent's backlog of cities never holds
+        the others back. Each job gets `timeout` seconds from being sent; an
+        overdue job fails and is cancelled on the worker, whose other jobs
+        keep running. A worker that does not acknowledge the cancel within
+        ping_timeout, or that dies, is restarted and its other jobs fail too.
+        """
+        self.start()
+        queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        for agent, params in jobs:
+            queues.setdefault(agent, deque()).append(params)
+        turn = deque(queues)
+        inflight: Dict[str, Dict[int, Tuple[Dict[str, Any], float]]] = {agent: {} for agent in queues}
+        # Cancel requests awaiting their acknowledgement: message id -> deadline
+        cancels: Dict[str, Dict[int, float]] = {agent: {} for agent in queues}
+
+        def fail_all(worker: AgentWorker, reason: str, error: str) -> Iterator[Tuple[str, Dict[str, Any], bool, Any]]:
+            jobs_lost, inflight[worker.agent] = inflight[worker.agent], {}
+            cancels[worker.agent] = {}
+            worker.restart(reason)
+            for params, _ in jobs_lost.values():
+                yield worker.agent, params, False, error
+
+        def dispatch() -> Iterator[Tuple[str, Dict[str, Any], bool, Any]]:
+            while sum(map(len, inflight.values())) < self.max_jobs:
+                for _ in range(len(turn)):
+                    agent = turn[0]
+                    turn.rotate(-1)
+                    if queues[agent] and len(inflight[agent]) < agent_limit(agent):
+                        break
+                else:
+                    return  # every agent is drained or at its limit
+                worker, params = self.workers[agent], queues[agent].popleft()
+                if not worker.alive():
+                    yield from fail_all(worker, "process exited", "worker process exited")
+                try:
+                    inflight[agent][worker.send("run", params)] = (params, time.monotonic() + timeout)
+                except (OSError, BrokenPipeError) as e:
+                    yield from fail_all(worker, "pipe closed", f"worker unavailable: {e}")
+                    yield agent, params, False, f"worker unavailable: {e}"
+
+        def expire(worker: AgentWorker) -> Iterator[Tuple[str, Dict[str, Any], bool, Any]]:
+            now = time.monotonic()
+            if any(d <= now for d in cancels[worker.agent].values()):
+                yield from fail_all(worker, "cancel not acknowledged", "worker stopped answering")
+                return
+            for job_id, (params, d) in list(inflight[worker.agent].items()):
+                if d > now:
+                    continue
+                del inflight[worker.agent][job_id]
+                yield worker.agent, params, False, f"timed out after {timeout:.0f}s"
+                try:
+                    cancels[worker.agent][worker.send("cancel", {"job": job_id})] = now + self.ping_timeout
+                except (OSError, BrokenPipeError):
+                    yield from fail_all(worker, "pipe closed", "worker process exited")
+                    return
+
+        yield from dispatch()
+        while any(inflight.values()) or any(cancels.values()):
+            busy = [w for agent, w in self.workers.items() if inflight.get(agent) or cancels.get(agent)]
+            deadline = min([d for running in inflight.values() for _, d in running.values()]
+                           + [d for waiting in cancels.values() for d in waiting.values()])
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for worker in busy:
+                    yield from expire(worker)
+                yield from dispatch()
+                continue
+
+            conns = {w.conn: w for w in busy}
+            sentinels = {w.process.sentinel: w for w in busy}
+            for ready in wait(list(conns) + list(sentinels), remaining):
+                worker = conns.get(ready) or sentinels[ready]
+                if not inflight[worker.agent] and not cancels[worker.agent]:
+                    continue  # already failed over this round
+                try:
+                    if ready is not worker.conn and not worker.conn.poll():
+                        raise EOFError("worker process exited")
+                    while True:
+                        msg = worker.receive()
+                        if msg is not None and msg[0] in cancels[worker.agent]:
+                            del cancels[worker.agent][msg[0]]
+                        elif msg is not None and msg[0] in inflight[worker.agent]:
+                            params = inflight[worker.agent][msg[0]][0]
+                            if msg[1] == "partial":
+                                if on_partial is not None:
+                                    on_partial(worker.agent, msg[2])
+                            else:
+                                del inflight[worker.agent][msg[0]]
+                                if msg[1]:
+                                    self._check_memory(worker, msg[2], busy=bool(inflight[worker.agent]))
+                                yield worker.agent, params, msg[1], msg[2]
+                        # anything else: the ready handshake, a late answer to an old ping
+                        # or the failure of a job that was already reported as timed out
+                        if not worker.conn.poll():
+                            break
+                except (EOFError, OSError) as e:
+                    yield from fail_all(worker, str(e) or "worker process exited", "worker process exited")
+            yield from dispatch()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            agent: {"alive": w.alive(), "restarts": w.restarts, "pid": w.process.pid if w.process else None,
+                    "rss_mb": round(w.rss_mb) if w.rss_mb is not None else None}
+            for agent, w in self.workers.items()
+        }
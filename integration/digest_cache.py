@@ -0,0 +1,227 @@
+"""
+Digest Cache for GridWatch agent workers
+Persistent (sqlite) cache of coordinator digests so the continuous runner
+does not pay a multi-tool Gemini call for a prompt it answered minutes ago.
+
+- Key: (agent, normalized prompt, time bucket), bucket = now // agent TTL
+- Per-agent TTLs, overridable with GRIDWATCH_DIGEST_TTL_<AGENT> (seconds)
+- At most GRIDWATCH_DIGEST_CACHE_MAX entries; least recently used go first
+- Stale-while-revalidate: a digest from the previous bucket is returned at
+  once while a background task on the worker's event loop refreshes it
+"""
+import os
+import re
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv(
+    "GRIDWATCH_DIGEST_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "digests.sqlite"),
+)
+MAX_ENTRIES = int(os.getenv("GRIDWATCH_DIGEST_CACHE_MAX", "500"))
+
+# How long a digest answers the same prompt before it is refreshed
+DEFAULT_TTLS: Dict[str, int] = {
+    "crime": 1800,
+    "environment": 3600,
+    "emergency": 600,
+    "energy": 1800,
+    "traffic": 300,
+}
+
+_NUMBER = re.compile(r"-?\d+\.\d+")
+
+def normalize_prompt(prompt: str) -> str:
+    """Case/whitespace-insensitive prompt, coordinates rounded to ~100 m."""
+    text = " ".join(prompt.lower().split()).rstrip(".!? ")
+    return _NUMBER.sub(lambda m: f"{float(m.group()):.3f}", text)
+
+def ttl_for(agent: str) -> int:
+    return int(os.getenv(f"GRIDWATCH_DIGEST_TTL_{agent.upper()}", DEFAULT_TTLS.get(agent, 900)))
+
+def _is_empty(digest: BaseModel) -> bool:
+    # A failed parse comes back as an empty digest; don't pin that for a whole TTL
+    return all(v in (None, "", "[]", [], {}) for v in digest.model_dump().values())
+
+
+class DigestCache:
+    """
+    Args:
+        path: sqlite file, shared by all worker processes (WAL mode)
+        max_entries: LRU bound across all agents
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.counters = {"hits": 0, "stale": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                " agent TEXT NOT NULL, prompt TEXT NOT NULL, bucket INTEGER NOT NULL,"
+                " payload TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL,"
+                " PRIMARY KEY (agent, prompt, bucket))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS digests_accessed ON digests (accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # -- storage ---------------------------------------------------------------
+    def lookup(self, agent: str, prompt: str, now: Optional[float] = None) -> Tuple[Optional[str], str]:
+        """Return (payload, "fresh" | "stale" | "miss") for the current or previous bucket."""
+        now = now or time.time()
+        bucket = int(now // ttl_for(agent))
+        key = normalize_prompt(prompt)
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT bucket, payload FROM digests WHERE agent = ? AND prompt = ? AND bucket >= ?"
+                " ORDER BY bucket DESC LIMIT 1",
+                (agent, key, bucket - 1),
+            ).fetchone()
+            if row is None:
+                return None, "miss"
+            db.execute(
+                "UPDATE digests SET accessed = ? WHERE agent = ? AND prompt = ? AND bucket = ?",
+                (now, agent, key, row[0]),
+            )
+            db.commit()
+        return row[1], "fresh" if row[0] >= bucket else "stale"
+
+    def store(self, agent: str, prompt: str, payload: str, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        bucket = int(now // ttl_for(agent))
+        key = normalize_prompt(prompt)
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                (agent, key, bucket, payload, now, now),
+            )
+            # Older buckets of the same prompt are never served again
+            db.execute(
+                "DELETE FROM digests WHERE agent = ? AND prompt = ? AND bucket < ?",
+                (agent, key, bucket),
+            )
+            overflow = db.execute("SELECT COUNT(*) FROM digests").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                db.execute(
+                    "DELETE FROM digests WHERE rowid IN"
+                    " (SELECT rowid FROM digests ORDER BY accessed LIMIT ?)",
+                    (overflow,),
+                )
+                self.counters["evictions"] += overflow
+            db.commit()
+
+    def clear(self, agent: Optional[str] = None) -> None:
+        with self._lock:
+            db = self._db()
+            if agent:
+                db.execute("DELETE FROM digests WHERE agent = ?", (agent,))
+            else:
+                db.execute("DELETE FROM digests")
+            db.commit()
+
+    # -- digests ---------------------------------------------------------------
+    async def get_digest(
+        self,
+        agent: str,
+        prompt: str,
+        compute: Callable[[str], Awaitable[BaseModel]],
+        model: Type[BaseModel],
+    ) -> BaseModel:
+        """
+        Cached `await compute(prompt)`. Fresh hits return immediately, stale
+        hits return immediately and schedule a refresh, misses compute inline.
+        """
+        try:
+            payload, state = self.lookup(agent, prompt)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Digest cache unavailable, calling {agent} coordinator: {e}")
+            return await compute(prompt)
+
+        if state == "fresh":
+            self.counters["hits"] += 1
+            logger.info(f"💾 {agent} digest cache hit")
+            return model.model_validate_json(payload)
+        if state == "stale":
+            self.counters["stale"] += 1
+            logger.info(f"💾 {agent} digest stale, serving cached copy while refreshing")
+            self._schedule_refresh(agent, prompt, compute)
+            return model.model_validate_json(payload)
+
+        self.counters["misses"] += 1
+        return await self._compute_and_store(agent, prompt, compute)
+
+    async def _compute_and_store(self, agent: str, prompt: str, compute) -> BaseModel:
+        digest = await compute(prompt)
+        if not _is_empty(digest):
+            try:
+                self.store(agent, prompt, digest.model_dump_json())
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Could not cache {agent} digest: {e}")
+        return digest
+
+    def _schedule_refresh(self, agent: str, prompt: str, compute) -> None:
+        key = (agent, normalize_prompt(prompt))
+        if key in self._refreshing:
+            return  # one refresh per prompt at a time
+
+        async def refresh():
+            try:
+                await self._compute_and_store(agent, prompt, compute)
+                self.counters["refreshes"] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Background refresh of {agent} digest failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.get_running_loop().create_task(refresh())
+
+    def pending_refreshes(self) -> List[asyncio.Task]:
+        return list(self._refreshing.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db().execute(
+                "SELECT agent, COUNT(*) FROM digests GROUP BY agent"
+            ).fetchall()
+        return {**self.counters, "entries": dict(entries), "refreshing": len(self._refreshing)}
+
+
+_cache: Optional[DigestCache] = None
+
+def get_cache() -> DigestCache:
+    """The process-wide digest cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        _cache = DigestCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+
+    cache = get_cache()
+    if sys.argv[1:2] == ["clear"]:
+        cache.clear(sys.argv[2] if len(sys.argv) > 2 else None)
+        print("🧹 Digest cache cleared")
+    print(json.dumps(cache.stats(), indent=2))
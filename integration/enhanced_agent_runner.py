@@ -2,378 +2,217 @@
 """
 Enhanced Agent Runner for GridWatch
 Continuously runs all 5 agents (traffic, outage, crime, environment, emergency) and posts evidence to the backend.
+GRIDWATCH_CITIES=all (or a ";"-separated list of cities.CITIES
+names) runs every due agent for every city in one pass; the (agent, city)
+jobs run concurrently on the agents' workers, so a cycle over ten cities
+takes about as long as one. Unset, only GRIDWATCH_CITY / GRIDWATCH_BBOX run.
 """
 import os
 import time
-import asyncio
 import logging
-import requests
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional
 import sys
 
 # Add paths for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models import Evidence
+import http_client
+from circuit_breaker import summary as circuit_breaker_summary
+from evidence_shipper import get_shipper
+from agent_workers import AgentWorkerPool
+from agent_scheduler import AgentScheduler, fingerprint
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AGENTS = ("traffic", "energy", "crime", "environment", "emergency")
+
+def load_cities() -> Dict[str, str]:
+    """{city: bbox} to cover, from GRIDWATCH_CITIES or else GRIDWATCH_CITY / GRIDWATCH_BBOX."""
+    from cities import CITIES, city_bbox
+    names = os.getenv('GRIDWATCH_CITIES', '').strip()
+    wanted = list(CITIES) if names.lower() == "all" else [n.strip() for n in names.split(";") if n.strip()]
+    if not wanted:  # unset, or only blank entries
+        return {os.getenv('GRIDWATCH_CITY', 'Washington, DC'): os.getenv('GRIDWATCH_BBOX', '-77.044,38.895,-77.028,38.905')}
+    unknown = [name for name in wanted if name not in CITIES]
+    if unknown:
+        raise ValueError(f"Unknown GRIDWATCH_CITIES {unknown}; known: {list(CITIES)}")
+    return {name: city_bbox(CITIES[name]) for name in wanted}
+
 class EnhancedAgentRunner:
     def __init__(self, backend_url: str = None):
         self.backend_url = backend_url or os.getenv('BACKEND_URL', 'https://gridwatch-backend-554454627121.us-east1.run.app')
-        self.poll_interval = int(os.getenv('AGENT_POLL_INTERVAL', '300'))  # 5 minutes default
         self.bbox = os.getenv('GRIDWATCH_BBOX', '-77.044,38.895,-77.028,38.905')
         self.city = os.getenv('GRIDWATCH_CITY', 'Washington, DC')
+        self.agent_timeout = int(os.getenv('AGENT_TIMEOUT', '600'))  # seconds per job (agent, city)
+        self.cities = load_cities()
+        self._cycle = 0
+        self.shipper = get_shipper(self.backend_url, producer=os.getenv('GRIDWATCH_PRODUCER_ID', 'agent-runner'))
+        # One warm worker process per agent, started on first use
+        self.workers: Optional[AgentWorkerPool] = None
         
+    def _pool(self) -> AgentWorkerPool:
+        if self.workers is None:
+            self.workers = AgentWorkerPool(AGENTS)
+            self.workers.start()
+        return self.workers
+
+    def _job_params(self) -> Dict[str, Any]:
+        return {"city": self.city, "bbox": self.bbox}
+
+    def _run_agent(self, agent: str) -> List[Dict[str, Any]]:
+        """Run one agent on its warm worker and return its evidence."""
+        for _, ok, result in self._pool().run({agent: self._job_params()}, self.agent_timeout):
+            if ok:
+                return result["evidence"]
+            logger.error(f"Error running {agent} agents: {result}")
+        return []
+
     def run_traffic_agents(self) -> List[Dict[str, Any]]:
-        """Run traffic orchestrator and return evidence."""
-        try:
-            logger.info("🚗 Running traffic agents...")
-            
-            # Change to traffic directory to find agent_config.json
-            traffic_dir = os.path.join(os.path.dirname(__file__), '..', 'agents', 'vendor', 'namma', 'traffic')
-            original_cwd = os.getcwd()
-            os.chdir(traffic_dir)
-            
-            try:
-                # Add traffic directory to Python path
-                sys.path.insert(0, traffic_dir)
-                # Dynamic import to avoid path issues
-                import orca
-                asyncio.run(orca.call_traffic_update_agent_async("Traffic update alert: road block detected."))
-            finally:
-                # Restore original working directory
-                os.chdir(original_cwd)
-            
-            # The traffic orchestrator already posts to backend, so we return empty
-            # If you want to capture the evidence here instead, we'd need to modify orca.py
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error running traffic agents: {e}")
-            return []
-    
+        """Run traffic orchestrator (it posts to the backend itself)."""
+        logger.info("🚗 Running traffic agents...")
+        return self._run_agent("traffic")
+
     def run_energy_agents(self) -> List[Dict[str, Any]]:
         """Run energy management agent and return evidence."""
-        try:
-            logger.info("⚡ Running energy agents...")
-            
-            # Skip energy agents if no Google Cloud credentials
-            if not os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
-                logger.info("Skipping energy agents - no Google Cloud credentials found")
-                return []
-            
-            # Change to energy directory for proper imports
-            energy_dir = os.path.join(os.path.dirname(__file__), '..', 'agents', 'vendor', 'namma', 'energy')
-            original_cwd = os.getcwd()
-            os.chdir(energy_dir)
-            
-            try:
-                # Add energy directory to Python path
-                sys.path.insert(0, energy_dir)
-                # Dynamic import to avoid path issues
-                from energy_coordinator import get_energy_digest
-                
-                # Parse bbox for energy agent
-                bbox_parts = self.bbox.split(',')
-                if len(bbox_parts) == 4:
-                    min_lng, min_lat, max_lng, max_lat = map(float, bbox_parts)
-                    lat = (min_lat + max_lat) / 2.0
-                    lng = (min_lng + max_lng) / 2.0
-                else:
-                    lat, lng = 38.9000, -77.0365
-                
-                # Create energy digest
-                prompt = f"My location is {lat}, {lng}. Provide power-outage information for the next 24 hours in {self.city} including official utility notices and reliable local news reports."
-                digest = get_energy_digest(prompt)
-                
-                # Convert to evidence
-                evidence_items = []
-                if hasattr(digest, 'outage_summary') and digest.outage_summary:
-                    for i, outage in enumerate(digest.outage_summary):
-                        evidence_items.append({
-                            "evidence_id": f"energy_outage_{int(time.time())}_{i}",
-                            "source_type": "news",
-                            "type": "power_outage",
-                            "lat": float(lat),
-                            "lng": float(lng),
-                            "radius_m": 200,
-                            "confidence": 0.8,
-                            "url": None,
-                            "raw": {"agent": "EnergyAgent", "outage": outage},
-                            "detected_at": datetime.now(timezone.utc).isoformat(),
-                        })
-                
-                return evidence_items
-            finally:
-                # Restore original working directory
-                os.chdir(original_cwd)
-            
-        except Exception as e:
-            logger.error(f"Error running energy agents: {e}")
-            return []
-    
+        logger.info("⚡ Running energy agents...")
+        return self._run_agent("energy")
+
     def run_crime_agents(self) -> List[Dict[str, Any]]:
         """Run crime agents and return evidence."""
-        try:
-            logger.info("🚔 Running crime agents...")
-            
-            # Change to crime directory
-            crime_dir = os.path.join(os.path.dirname(__file__), '..', 'agents', 'vendor', 'namma', 'crime')
-            original_cwd = os.getcwd()
-            os.chdir(crime_dir)
-            
-            try:
-                # Add crime directory to Python path
-                sys.path.insert(0, crime_dir)
-                from crime_coordinator import get_crime_digest
-                from gridwatch_adapter import convert_crime_digest_to_incidents
-                
-                # Get crime digest
-                prompt = f"Show crime in {self.city} last 24 hours"
-                digest = get_crime_digest(prompt)
-                
-                # Convert to evidence
-                evidence_items = []
-                if hasattr(digest, 'crime_digest') and digest.crime_digest:
-                    incidents = convert_crime_digest_to_incidents(digest.crime_digest)
-                    
-                    for i, incident in enumerate(incidents.get('incidents', [])):
-                        evidence_items.append({
-                            "evidence_id": f"crime_{int(time.time())}_{i}",
-                            "source_type": "news",
-                            "type": "crime",
-                            "lat": incident['lat'],
-                            "lng": incident['lng'],
-                            "radius_m": 200,
-                            "confidence": incident['confidence'],
-                            "url": None,
-                            "raw": {
-                                "agent": "CrimeAgent",
-                                "incident": incident,
-                                "sources": incident.get('sources', [])
-                            },
-                            "detected_at": datetime.now(timezone.utc).isoformat(),
-                        })
-                
-                return evidence_items
-            finally:
-                os.chdir(original_cwd)
-                
-        except Exception as e:
-            logger.error(f"Error running crime agents: {e}")
-            return []
-    
+        logger.info("🚔 Running crime agents...")
+        return self._run_agent("crime")
+
     def run_environment_agents(self) -> List[Dict[str, Any]]:
         """Run environment agents and return evidence."""
-        try:
-            logger.info("🌍 Running environment agents...")
-            
-            # Change to environment directory
-            env_dir = os.path.join(os.path.dirname(__file__), '..', 'agents', 'vendor', 'namma', 'environment')
-            original_cwd = os.getcwd()
-            os.chdir(env_dir)
-            
-            try:
-                # Add environment directory to Python path
-                sys.path.insert(0, env_dir)
-                from environment_coordinator import get_environment_digest
-                from gridwatch_adapter import convert_environment_digest_to_incidents
-                
-                # Get environment digest
-                prompt = f"Show environmental hazards in {self.city}"
-                digest = get_environment_digest(prompt)
-                
-                # Convert to evidence
-                evidence_items = []
-                if hasattr(digest, 'environment_digest') and digest.environment_digest:
-                    incidents = convert_environment_digest_to_incidents(digest.environment_digest)
-                    
-                    for i, incident in enumerate(incidents.get('incidents', [])):
-                        evidence_items.append({
-                            "evidence_id": f"environment_{int(time.time())}_{i}",
-                            "source_type": "news",
-                            "type": "environment",
-                            "lat": incident['lat'],
-                            "lng": incident['lng'],
-                            "radius_m": 500,
-                            "confidence": incident['confidence'],
-                            "url": None,
-                            "raw": {
-                                "agent": "EnvironmentAgent",
-                                "incident": incident,
-                                "sources": incident.get('sources', [])
-                            },
-                            "detected_at": datetime.now(timezone.utc).isoformat(),
-                        })
-                
-                return evidence_items
-            finally:
-                os.chdir(original_cwd)
-                
-        except Exception as e:
-            logger.error(f"Error running environment agents: {e}")
-            return []
-    
+        logger.info("🌍 Running environment agents...")
+        return self._run_agent("environment")
+
     def run_emergency_agents(self) -> List[Dict[str, Any]]:
         """Run emergency agents and return evidence."""
-        try:
-            logger.info("🚨 Running emergency agents...")
-            
-            # Change to emergency directory
-            emergency_dir = os.path.join(os.path.dirname(__file__), '..', 'agents', 'vendor', 'namma', 'emergency')
-            original_cwd = os.getcwd()
-            os.chdir(emergency_dir)
-            
-            try:
-                # Add emergency directory to Python path
-                sys.path.insert(0, emergency_dir)
-                from emergency_coordinator import get_emergency_digest
-                from gridwatch_adapter import EmergencyToGridWatchAdapter
-                
-                # Get emergency digest
-                prompt = f"Show active emergencies in {self.city}"
-                digest = get_emergency_digest(prompt)
-                
-                # Convert to evidence
-                evidence_items = []
-                if hasattr(digest, 'emergency_digest') and digest.emergency_digest:
-                    adapter = EmergencyToGridWatchAdapter()
-                    incidents = adapter.adapt_emergency_incidents(digest.emergency_digest)
-                    
-                    for i, incident in enumerate(incidents):
-                        evidence_items.append({
-                            "evidence_id": f"emergency_{int(time.time())}_{i}",
-                            "source_type": "news",
-                            "type": "emergency",
-                            "lat": incident['lat'],
-                            "lng": incident['lng'],
-                            "radius_m": 300,
-                            "confidence": incident['confidence'],
-                            "url": None,
-                            "raw": {
-                                "agent": "EmergencyAgent",
-                                "incident": incident,
-                                "sources": incident.get('sources', [])
-                            },
-                            "detected_at": datetime.now(timezone.utc).isoformat(),
-                        })
-                
-                return evidence_items
-            finally:
-                os.chdir(original_cwd)
-                
-        except Exception as e:
-            logger.error(f"Error running emergency agents: {e}")
-            return []
+        logger.info("🚨 Running emergency agents...")
+        return self._run_agent("emergency")
     
     def post_evidence(self, evidence_items: List[Dict[str, Any]]) -> bool:
-        """Post evidence to backend."""
+        """Queue evidence for the backend; the shipper batches, retries and spools it."""
         if not evidence_items:
             return True
             
         try:
-            response = requests.post(f"{self.backend_url}/evidence", json=evidence_items, timeout=10)
-            response.raise_for_status()
-            logger.info(f"✅ Posted {len(evidence_items)} evidence items to backend")
+            queued = self.shipper.submit(evidence_items)
+            logger.info(f"📤 Queued {queued} evidence items for the backend")
             return True
         except Exception as e:
-            logger.error(f"❌ Error posting evidence to backend: {e}")
+            logger.error(f"❌ Error queueing evidence for backend: {e}")
             return False
     
-    def run_all_agents(self) -> Dict[str, int]:
-        """Run all 5 agents and return counts."""
-        results = {
-            "traffic": 0, 
-            "energy": 0, 
-            "crime": 0, 
-            "environment": 0, 
-            "emergency": 0, 
-            "errors": 0
-        }
-        
-        # Run traffic agents (they post directly to backend)
-        try:
-            self.run_traffic_agents()
-            results["traffic"] = 3  # Traffic orchestrator posts 3 items
-        except Exception as e:
-            logger.error(f"Traffic agents error: {e}")
-            results["errors"] += 1
-        
-        # Run energy agents
-        try:
-            energy_evidence = self.run_energy_agents()
-            if self.post_evidence(energy_evidence):
-                results["energy"] = len(energy_evidence)
-        except Exception as e:
-            logger.error(f"Energy agents error: {e}")
-            results["errors"] += 1
-        
-        # Run crime agents
-        try:
-            crime_evidence = self.run_crime_agents()
-            if self.post_evidence(crime_evidence):
-                results["crime"] = len(crime_evidence)
-        except Exception as e:
-            logger.error(f"Crime agents error: {e}")
-            results["errors"] += 1
-        
-        # Run environment agents
-        try:
-            env_evidence = self.run_environment_agents()
-            if self.post_evidence(env_evidence):
-                results["environment"] = len(env_evidence)
-        except Exception as e:
-            logger.error(f"Environment agents error: {e}")
-            results["errors"] += 1
+    def _post_partial(self, agent: str, evidence_items: List[Dict[str, Any]]) -> None:
+        logger.debug(f"⚡ {agent} streamed {len(evidence_items)} evidence items ahead of its digest")
+        self.post_evidence(evidence_items)
+    
+    def _city_jobs(self, agents: Iterable[str]) -> List[tuple]:
+        """(agent, params) for every agent and city; the starting city rotates each cycle."""
+        cities = list(self.cities.items())
+        shift = self._cycle % len(cities)
+        self._cycle += 1
+        return [(agent, {"city": city, "bbox": bbox})
+                for city, bbox in cities[shift:] + cities[:shift] for agent in agents]
+
+    def run_agents(self, agents: Iterable[str], scheduler: Optional[AgentScheduler] = None) -> Dict[str, int]:
+        """Run the given agents for every city concurrently on their warm workers and return counts."""
+        agents = list(agents)
+        results = {agent: 0 for agent in AGENTS}
+        results["errors"] = 0
+        remaining = {agent: len(self.cities) for agent in agents}
+        evidence_by_agent: Dict[str, Dict[str, List[Dict[str, Any]]]] = defaultdict(dict)
         
-        # Run emergency agents
-        try:
-            emergency_evidence = self.run_emergency_agents()
-            if self.post_evidence(emergency_evidence):
-                results["emergency"] = len(emergency_evidence)
-        except Exception as e:
-            logger.error(f"Emergency agents error: {e}")
-            results["errors"] += 1
+        # Post each job's evidence as soon as its worker answers; digest entries
+        # the model streams arrive earlier as partial results and are posted then
+        jobs = self._city_jobs(agents)
+        for agent, params, ok, result in self._pool().run_many(jobs, self.agent_timeout, on_partial=self._post_partial):
+            city = params["city"]
+            remaining[agent] -= 1
+            if not ok:
+                logger.error(f"{agent.capitalize()} agents error ({city}): {result}")
+                results["errors"] += 1
+            else:
+                logger.info(f"⏱️ {agent} agents finished for {city} in {result['elapsed_s']:.1f}s")
+                evidence = result["evidence"]
+                evidence_by_agent[agent][city] = evidence
+                if agent == "traffic":
+                    # Traffic orchestrator posts directly to backend (3 items)
+                    results["traffic"] += 3
+                elif self.post_evidence(evidence[result.get("streamed", 0):]):
+                    results[agent] += len(evidence)
+            if scheduler and not remaining[agent]:
+                self._reschedule(scheduler, agent, evidence_by_agent.get(agent))
         
         return results
     
+    def _reschedule(self, scheduler: AgentScheduler, agent: str,
+                    evidence_by_city: Optional[Dict[str, List[Dict[str, Any]]]]) -> None:
+        """Once every city of an agent answered: back off if all failed, else adapt to the change in evidence."""
+        if not evidence_by_city:
+            delay = scheduler.record_failure(agent)
+            logger.info(f"⏳ {agent} backing off for {delay:.0f}s")
+            return
+        # Traffic posts its own evidence, so there is nothing to compare
+        digest_hash = None if agent == "traffic" else fingerprint(
+            [item for city in sorted(evidence_by_city) for item in evidence_by_city[city]])
+        delay = scheduler.record_success(agent, digest_hash)
+        logger.info(f"🗓️ {agent} next run in {delay:.0f}s")
+    
+    def run_all_agents(self) -> Dict[str, int]:
+        """Run all 5 agents concurrently on their warm workers and return counts."""
+        return self.run_agents(AGENTS)
+    
     def run_continuous(self):
-        """Run agents continuously."""
+        """Run each agent on its own adaptive schedule (see agent_scheduler.py)."""
+        scheduler = AgentScheduler(AGENTS)
         logger.info(f"🚀 Starting Enhanced GridWatch Agent Runner...")
         logger.info(f"  Backend URL: {self.backend_url}")
-        logger.info(f"  Poll interval: {self.poll_interval} seconds")
-        logger.info(f"  Bounding box: {self.bbox}")
-        logger.info(f"  City: {self.city}")
+        logger.info(f"  Base intervals: { {a: s['interval_s'] for a, s in scheduler.stats().items()} }")
+        logger.info(f"  Cities: {', '.join(self.cities)}")
         logger.info("Press Ctrl+C to stop")
         
         try:
             while True:
-                start_time = time.time()
-                
-                # Run all agents
-                results = self.run_all_agents()
-                
-                # Log results
-                logger.info(f"📊 Agent run completed: {results}")
-                
-                # Calculate sleep time
-                elapsed = time.time() - start_time
-                sleep_time = max(0, self.poll_interval - elapsed)
+                due = scheduler.due()
+                if due:
+                    # Run whichever agents are due
+                    results = self.run_agents(due, scheduler)
+                    
+                    # Log results
+                    logger.info(f"📊 Agent run completed ({', '.join(due)}): {results}")
+                    logger.info(http_client.summary("Backend HTTP (cumulative)"))
+                    logger.info(self.shipper.summary())
+                    if circuit_breaker_summary():
+                        logger.info(circuit_breaker_summary())
+                    
+                    # Between cycles: ping idle workers, restart dead or silent ones
+                    health = self.workers.health_check()
+                    if not all(health.values()):
+                        logger.warning(f"🩺 Worker health: {health} ({self.workers.stats()})")
                 
+                sleep_time = scheduler.seconds_until_next()
                 if sleep_time > 0:
-                    logger.info(f"⏰ Sleeping for {sleep_time:.1f} seconds...")
+                    logger.info(f"⏰ Sleeping for {sleep_time:.1f} seconds... {scheduler.stats()}")
                     time.sleep(sleep_time)
-                else:
-                    logger.info("⚠️ Agent run took longer than interval, continuing immediately")
                     
         except KeyboardInterrupt:
             logger.info("🛑 Stopping agent runner...")
         except Exception as e:
             logger.error(f"💥 Fatal error in agent runner: {e}")
             raise
+        finally:
+            if self.workers is not None:
+                self.workers.shutdown()
+            self.shipper.close()
+            logger.info(self.shipper.summary())
 
 def main():
     """Main entry point."""
@@ -381,7 +220,7 @@ def main():
     backend_url = os.getenv('BACKEND_URL', 'https://gridwatch-backend-554454627121.us-east1.run.app')
     try:
         health_url = f"{backend_url}/health"
-        response = requests.get(health_url, timeout=5)
+        response = http_client.get(health_url, timeout=5)
         response.raise_for_status()
         logger.info(f"✅ Backend is healthy: {response.json()}")
     except Exception as e:
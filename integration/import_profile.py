@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Import-time profile for the agent entry points.
+Each entry point is imported in a fresh interpreter with `-X importtime`
+from its own agent directory, the same way Cloud Functions, pubsub triggers
+and the runners load them. The report lists the total import time and the
+top-level packages that account for most of it.
+
+Usage:
+    python import_profile.py                 # all entry points
+    python import_profile.py crime traffic   # selected agents
+    python import_profile.py --build         # also time the first agent build
+"""
+import os
+import sys
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents', 'vendor', 'namma')
+
+# agent -> (entry point modules, factory that builds the agent on first use)
+ENTRY_POINTS: Dict[str, Tuple[List[str], str]] = {
+    "traffic": (["main", "traffic_coordinator", "orca"], "traffic_coordinator.get_runner()"),
+    "energy": (["main", "energy_coordinator"], "energy_coordinator.get_runner()"),
+    "crime": (["main", "crime_coordinator"], "crime_coordinator.get_runner()"),
+    "environment": (["main", "environment_coordinator"], "environment_coordinator.get_runner()"),
+    "emergency": (["main", "emergency_coordinator"], "emergency_coordinator.get_runner()"),
+}
+
+TOP_PACKAGES = 8
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Return (total ms, self ms per top-level package) from -X importtime output."""
+    per_package: Dict[str, float] = defaultdict(float)
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1000
+        # Lines indented by one space are imported directly by the -c snippet
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative_us)
+    return total_us / 1000, per_package
+
+
+def profile(agent: str, module: str, build: Optional[str] = None) -> Dict:
+    agent_dir = os.path.abspath(os.path.join(AGENTS_DIR, agent))
+    code = f"import {module}"
+    if build:
+        code += (f"\nimport time, {build.split('.')[0]}\nt = time.perf_counter()\n{build}\n"
+                 "print(f'BUILD_MS={(time.perf_counter() - t) * 1000:.1f}')")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=agent_dir, capture_output=True, text=True,
+    )
+    total_ms, per_package = parse_importtime(proc.stderr)
+    result = {"agent": agent, "module": module, "total_ms": total_ms, "packages": per_package, "error": None}
+    if proc.returncode != 0:
+        # Last line of the traceback is enough to explain a missing dependency
+        tail = [l for l in proc.stderr.splitlines() if l and not l.startswith("import time:")]
+        result["error"] = tail[-1] if tail else f"exit code {proc.returncode}"
+    for line in proc.stdout.splitlines():
+        if line.startswith("BUILD_MS="):
+            result["build_ms"] = float(line.split("=", 1)[1])
+    return result
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    build = "--build" in sys.argv
+    agents = args or list(ENTRY_POINTS)
+
+    print("📦 Agent entry point import times (-X importtime, fresh interpreter each)\n")
+    for agent in agents:
+        modules, factory = ENTRY_POINTS[agent]
+        for module in modules:
+            r = profile(agent, module, factory if build and module == modules[-1] else None)
+            header = f"{agent}/{module}.py"
+            if r["error"]:
+                print(f"❌ {header:38} {r['total_ms']:8.1f}ms  ({r['error']})")
+            else:
+                print(f"✅ {header:38} {r['total_ms']:8.1f}ms")
+            if "build_ms" in r:
+                print(f"   first build ({factory}): {r['build_ms']:.1f}ms")
+            heaviest = sorted(r["packages"].items(), key=lambda kv: kv[1], reverse=True)[:TOP_PACKAGES]
+            print("   " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in heaviest if ms >= 1))
+        print()
+
+
+if __name__ == "__main__":
+    main()
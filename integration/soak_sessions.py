@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Session soak test for the coordinator runners.
+Drives thousands of digest-sized session lifecycles through the same
+InMemorySessionService + SessionPool the coordinators use and samples RSS,
+so a session leak shows up as a rising line instead of an OOM days later.
+No LLM calls: each cycle appends what a coordinator run leaves in its
+session (the prompt and a digest-sized model answer).
+
+Usage:
+    python soak_sessions.py                          # 5000 cycles, evict mode
+    python soak_sessions.py --cycles 20000 --mode reuse
+    python soak_sessions.py --no-pool                # previous behaviour, for comparison
+
+Exits with status 1 when RSS grows more than --max-growth-mb after warm-up.
+"""
+import os
+import gc
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents', 'gridwatch_agents', 'src'))
+
+from session_pool import SessionPool, rss_mb
+
+APP_NAME = "crime_monitoring_orchestrator"
+USER_ID = "crime_user"
+CITIES = ["Washington, DC", "New York, NY", "Seattle, WA", "Chicago, IL", "Austin, TX"]
+
+
+def _digest_text(cycle: int, kb: int) -> str:
+    entry = ('{"timestamp": "%d", "location": "14th St & U St", "incident_type": "Theft", '
+             '"severity": "Medium", "description": "%s", "source": "news", "advice": "none"}')
+    count = max(1, kb * 1024 // 220)
+    return '{"crime_digest": [' + ", ".join(entry % (cycle, "x" * 60) for _ in range(count)) + "]}"
+
+
+async def _append_run(service, session_id: str, cycle: int, answer_kb: int) -> None:
+    from google.adk.events import Event
+    from google.genai import types
+
+    session = await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    prompt = f"Show crime in {CITIES[cycle % len(CITIES)]} last 24 hours"
+    for author, role, text in (("user", "user", prompt), ("crime_coordinator", "model", _digest_text(cycle, answer_kb))):
+        await service.append_event(session, Event(
+            invocation_id=f"soak-{cycle}", author=author,
+            content=types.Content(role=role, parts=[types.Part(text=text)]),
+        ))
+
+
+async def soak(cycles: int, mode: str, use_pool: bool, answer_kb: int, every: int) -> list:
+    from google.adk.sessions import InMemorySessionService
+
+    service = InMemorySessionService()
+    pool = SessionPool(service, APP_NAME, USER_ID, mode=mode)
+    samples = []
+    started = time.perf_counter()
+    for cycle in range(1, cycles + 1):
+        key = CITIES[cycle % len(CITIES)]
+        if use_pool:
+            async with pool.session(key=key) as session_id:
+                await _append_run(service, session_id, cycle, answer_kb)
+        else:
+            session_id = uuid.uuid4().hex
+            await service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+            await _append_run(service, session_id, cycle, answer_kb)
+
+        if cycle % every == 0 or cycle == cycles:
+            gc.collect()
+            rss = rss_mb()
+            samples.append((cycle, rss))
+            live = pool.stats()["live"] if use_pool else cycle
+            print(f"  cycle {cycle:>6}  RSS {rss:7.1f} MB  live sessions {live:>6}  "
+                  f"{cycle / (time.perf_counter() - started):6.0f} cycles/s")
+    await pool.clear()
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=5000)
+    parser.add_argument("--mode", choices=("evict", "reuse"), default="evict")
+    parser.add_argument("--no-pool", action="store_true", help="create sessions without ever deleting them")
+    parser.add_argument("--answer-kb", type=int, default=8, help="size of each simulated digest")
+    parser.add_argument("--every", type=int, default=500, help="sample RSS every N cycles")
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    label = "no pool (sessions never deleted)" if args.no_pool else f"SessionPool, {args.mode} mode"
+    print(f"🧪 Session soak: {args.cycles} cycles, {label}, {args.answer_kb} KB answers")
+    samples = asyncio.run(soak(args.cycles, args.mode, not args.no_pool, args.answer_kb, args.every))
+
+    # Compare against the first sample so interpreter/ADK warm-up doesn't count as growth
+    baseline, final = samples[0][1], samples[-1][1]
+    growth = final - baseline
+    ok = growth <= args.max_growth_mb
+    print(f"{'✅' if ok else '❌'} RSS {baseline:.1f} MB -> {final:.1f} MB ({growth:+.1f} MB, "
+          f"limit {args.max_growth_mb:.0f} MB)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,13 @@ Runs all 5 agents and posts evidence to live Firebase backend
 import os
 import sys
 import time
-import requests
 import asyncio
 from datetime import datetime, timezone
 from typing import List, Dict, Any
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+import http_client
+
 # Check for API key (cloud backend has its own, this is just for local testing)
 if not os.getenv('GOOGLE_API_KEY'):
     print("⚠️ GOOGLE_API_KEY not found in environment")
@@ -23,7 +25,7 @@ LIVE_BACKEND_URL = "https://gridwatch-backend-554454627121.us-east1.run.app"
 def check_backend_health():
     """Check if live backend is accessible."""
     try:
-        response = requests.get(f"{LIVE_BACKEND_URL}/health", timeout=10)
+        response = http_client.get(f"{LIVE_BACKEND_URL}/health", timeout=10)
         response.raise_for_status()
         print("✅ Live backend is healthy")
         return True
@@ -34,7 +36,7 @@ def check_backend_health():
 def get_current_incidents():
     """Get current incidents from live backend."""
     try:
-        response = requests.get(f"{LIVE_BACKEND_URL}/incidents", timeout=15)
+        response = http_client.get(f"{LIVE_BACKEND_URL}/incidents", timeout=15)
         response.raise_for_status()
         data = response.json()
         incidents = data.get('data', [])
@@ -13,7 +13,12 @@ if [ -z "$GOOGLE_API_KEY" ]; then
     echo "The agents will use the cloud backend's environment variables"
 fi
 export BACKEND_URL="https://gridwatch-backend-554454627121.us-east1.run.app"
-export AGENT_POLL_INTERVAL="300"  # 5 minutes
+# Per-agent base intervals (seconds); the runner adapts them to how often digests change
+export AGENT_POLL_INTERVAL_TRAFFIC="300"
+export AGENT_POLL_INTERVAL_EMERGENCY="300"
+export AGENT_POLL_INTERVAL_CRIME="900"
+export AGENT_POLL_INTERVAL_ENERGY="900"
+export AGENT_POLL_INTERVAL_ENVIRONMENT="1800"
 export GRIDWATCH_CITY="Washington, DC"
 export GRIDWATCH_BBOX="-77.044,38.895,-77.028,38.905"
 
@@ -0,0 +1,14 @@
+"""
+Shared setup for the GridWatch tests.
+The backend, integration runner and shared agent helpers are flat module
+directories rather than packages, so they go on sys.path the same way the
+services themselves import them.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("backend", "integration", os.path.join("agents", "gridwatch_agents", "src")):
+    path = os.path.join(ROOT, path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,59 @@
+from agent_scheduler import AgentScheduler, MAX_FACTOR, MIN_FACTOR, fingerprint
+
+
+def _crime_evidence(evidence_id: str, detected_at: str, updated_at: int, stale: bool = False):
+    raw = {
+        "agent": "CrimeAgent",
+        "incident": {"type": "crime", "lat": 38.9, "lng": -77.0, "where": "14th St", "updatedAt": updated_at},
+        "sources": ["news"],
+    }
+    if stale:
+        raw["stale"] = True
+    return [{"evidence_id": evidence_id, "type": "crime", "lat": 38.9, "lng": -77.0,
+             "detected_at": detected_at, "raw": raw}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fingerprint_ignores_nested_volatile_fields():
+    first = _crime_evidence("crime_1_a", "2026-01-01T00:00:00", 1_700_000_000)
+    second = _crime_evidence("crime_2_a", "2026-01-01T00:00:01", 1_700_000_001, stale=True)
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_fingerprint_sees_real_changes():
+    first = _crime_evidence("crime_1_a", "t", 1)
+    second = _crime_evidence("crime_1_a", "t", 1)
+    second[0]["raw"]["incident"]["where"] = "U St"
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_unchanged_digest_slows_agent_down():
+    clock = FakeClock()
+    scheduler = AgentScheduler(["crime"], jitter=0, clock=clock)
+    base = scheduler.schedules["crime"].base
+    for second in range(6):
+        clock.now += 1
+        scheduler.record_success("crime", fingerprint(_crime_evidence(f"id{second}", str(second), second)))
+    assert scheduler.schedules["crime"].interval == base * MAX_FACTOR
+    assert scheduler.schedules["crime"].changes == 0
+
+
+def test_changed_digest_speeds_agent_up_and_failures_back_off():
+    clock = FakeClock()
+    scheduler = AgentScheduler(["crime"], jitter=0, clock=clock)
+    base = scheduler.schedules["crime"].base
+    for run in range(4):
+        scheduler.record_success("crime", f"hash-{run}")
+    assert scheduler.schedules["crime"].interval == base * MIN_FACTOR
+    assert scheduler.record_failure("crime") == base
+    assert scheduler.record_failure("crime") == base * 2
+    assert scheduler.due() == []
+    clock.now += base * 2
+    assert scheduler.due() == ["crime"]
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import Counter
+from multiprocessing import Pipe
+
+import pytest
+
+import agent_workers
+from agent_workers import AgentWorker, AgentWorkerPool
+
+
+class Tracker:
+    """Jobs the stub workers are running right now, per agent and in total, and the peaks seen."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = Counter()
+        self.peak = Counter()
+        self.peak_total = 0
+        self.started = []
+
+    def enter(self, agent, city):
+        with self.lock:
+            self.running[agent] += 1
+            self.started.append((agent, city))
+            self.peak[agent] = max(self.peak[agent], self.running[agent])
+            self.peak_total = max(self.peak_total, sum(self.running.values()))
+
+    def leave(self, agent):
+        with self.lock:
+            self.running[agent] -= 1
+
+
+class StubProcess:
+    def __init__(self):
+        # Readable only once the write end closes, i.e. never while the stub lives
+        self.sentinel, self._writer = Pipe(duplex=False)
+        self.pid = 0
+
+    def is_alive(self):
+        return True
+
+    def terminate(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+
+class StubWorker(AgentWorker):
+    """
+    Worker served by a thread instead of a process. A job sleeps params["delay"]
+    seconds, fails when params["fail"] is set and can be cancelled like a task.
+    """
+
+    def __init__(self, agent, tracker):
+        super().__init__(agent, ctx=None)
+        self.tracker = tracker
+        self.cancelled = []
+
+    def start(self):
+        self.conn, child = Pipe(duplex=True)
+        self.process = StubProcess()
+        send_lock, cancels = threading.Lock(), {}
+
+        def send(msg):
+            with send_lock:
+                child.send(msg)
+
+        def run(job_id, params, cancel):
+            self.tracker.enter(self.agent, params.get("city"))
+            cancelled = cancel.wait(params.get("delay", 0.02))
+            self.tracker.leave(self.agent)
+            if cancelled:
+                self.cancelled.append(params.get("city"))
+            elif params.get("fail"):
+                send((job_id, False, "RuntimeError: upstream failed"))
+            else:
+                send((job_id, True, {"evidence": [params.get("city")], "rss_mb": 1.0}))
+
+        def serve():
+            while True:
+                msg = child.recv()
+                if msg is None:
+                    return
+                job_id, kind, params = msg
+                if kind == "cancel":
+                    cancels.pop(params["job"], threading.Event()).set()
+                    send((job_id, True, {"cancelled": True}))
+                elif kind == "run":
+                    cancels[job_id] = threading.Event()
+                    threading.Thread(target=run, args=(job_id, params, cancels[job_id]), daemon=True).start()
+
+        threading.Thread(target=serve, daemon=True).start()
+
+    def stop(self, timeout=5.0):
+        self.conn.send(None)
+
+
+@pytest.fixture
+def tracker():
+    return Tracker()
+
+
+def _pool(tracker, agents, max_jobs):
+    pool = AgentWorkerPool([], max_jobs=max_jobs, rss_limit_mb=0)
+    pool.workers = {agent: StubWorker(agent, tracker) for agent in agents}
+    return pool
+
+
+def test_per_agent_and_global_limits_are_never_exceeded(tracker, monkeypatch):
+    monkeypatch.setattr(agent_workers, "AGENT_CONCURRENCY", 3)
+    monkeypatch.setenv("GRIDWATCH_AGENT_CONCURRENCY_CRIME", "1")
+    pool = _pool(tracker, ["crime", "energy", "traffic"], max_jobs=5)
+    jobs = [(agent, {"city": f"{agent}-{i}"}) for agent in ("crime", "energy", "traffic") for i in range(6)]
+    try:
+        results = list(pool.run_many(jobs, timeout=10))
+    finally:
+        pool.shutdown()
+
+    assert len(results) == 18 and all(ok for _, _, ok, _ in results)
+    assert tracker.peak["crime"] == 1
+    assert tracker.peak["energy"] <= 3 and tracker.peak["traffic"] <= 3
+    assert tracker.peak_total <= 5
+
+
+def test_free_slots_go_to_the_agents_in_turn(tracker):
+    pool = _pool(tracker, ["crime", "energy", "traffic"], max_jobs=3)
+    # One agent's backlog comes first in the job list
+    jobs = [("crime", {"city": f"c{i}", "delay": 0.1}) for i in range(5)] + [
+        ("energy", {"city": "e0", "delay": 0.1}), ("traffic", {"city": "t0", "delay": 0.1})]
+    try:
+        list(pool.run_many(jobs, timeout=10))
+    finally:
+        pool.shutdown()
+    assert {agent for agent, _ in tracker.started[:3]} == {"crime", "energy", "traffic"}
+
+
+def test_a_failing_or_overdue_city_does_not_cancel_its_siblings(tracker):
+    pool = _pool(tracker, ["crime"], max_jobs=10)
+    jobs = [("crime", {"city": "ok-1"}), ("crime", {"city": "broken", "fail": True}),
+            ("crime", {"city": "hung", "delay": 30}), ("crime", {"city": "ok-2", "delay": 0.2})]
+    try:
+        results = {params["city"]: (ok, result) for _, params, ok, result in pool.run_many(jobs, timeout=1)}
+    finally:
+        pool.shutdown()
+
+    assert results["ok-1"] == (True, {"evidence": ["ok-1"], "rss_mb": 1.0})
+    assert results["ok-2"][0] is True
+    assert results["broken"] == (False, "RuntimeError: upstream failed")
+    assert results["hung"] == (False, "timed out after 1s")
+    deadline = time.monotonic() + 5
+    while not pool.workers["crime"].cancelled and time.monotonic() < deadline:
+        time.sleep(0.01)  # the cancel is acknowledged before the job thread wakes
+    assert pool.workers["crime"].cancelled == ["hung"]
+    assert pool.workers["crime"].restarts == 0  # the cancel was acknowledged
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from archive import IncidentArchive
+from models import Evidence
+
+END = datetime(2026, 1, 8, 0, 0, 0)
+
+
+def _evidence(i: int, hours_ago: float, event_type: str = "crime", lng: float = -77.03) -> Evidence:
+    return Evidence(evidence_id=f"ev{i}", source_type="news", type=event_type, lat=38.9, lng=lng,
+                    detected_at=END - timedelta(hours=hours_ago))
+
+
+def _fill(archive: IncidentArchive) -> None:
+    for i in range(30):
+        archive.add_evidence(_evidence(i, hours_ago=i * 0.25 + 0.1,
+                                       event_type="crime" if i % 2 else "accident",
+                                       lng=-77.03 if i % 3 else -70.0))
+        if i % 2:
+            archive.flush("evidence")  # several parts per hour, like the live writer
+
+
+def _query(archive: IncidentArchive, **kwargs):
+    return archive.query("evidence", END - timedelta(days=7), END, **kwargs)
+
+
+def test_query_filters_and_orders_newest_first(tmp_path):
+    archive = IncidentArchive(str(tmp_path), compact_after=10 ** 9)
+    _fill(archive)
+    rows = _query(archive, bbox=(-77.1, 38.8, -77.0, 39.0), types=["crime"], limit=5)
+    ids = [r["evidence_id"] for r in rows]
+    expected = [f"ev{i}" for i in range(30) if i % 2 and i % 3][:5]
+    assert ids == expected
+    archive.close()
+
+
+def test_compaction_merges_closed_hours_without_changing_results(tmp_path):
+    archive = IncidentArchive(str(tmp_path), compact_after=10 ** 9)
+    _fill(archive)
+    archive.flush()
+    before = _query(archive)
+    hour_dirs = list((tmp_path / "evidence").iterdir())
+    assert any(len(list(d.glob("*.npz"))) > 1 for d in hour_dirs)
+
+    archive.compact_after = 0
+    assert archive.compact(now=END.timestamp() + 7200) > 0
+    assert all(len(list(d.glob("*.npz"))) == 1 for d in hour_dirs)
+    assert _query(archive) == before
+    # A fresh process reads the compacted parts the same way
+    assert _query(IncidentArchive(str(tmp_path))) == before
+    archive.close()
+
+
+def test_close_writes_buffered_rows(tmp_path):
+    archive = IncidentArchive(str(tmp_path), flush_seconds=3600)
+    archive.add_evidence(_evidence(1, hours_ago=1))
+    assert not (tmp_path / "evidence").exists()  # buffered, nothing written on the caller's thread
+    archive.close()
+    assert [r["evidence_id"] for r in _query(IncidentArchive(str(tmp_path)))] == ["ev1"]
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def _boom():
+    raise ConnectionError("down")
+
+
+def _trip(breaker: CircuitBreaker, calls: int) -> None:
+    for _ in range(calls):
+        with pytest.raises(ConnectionError):
+            breaker.call(_boom)
+
+
+def test_failures_open_the_circuit_and_serve_last_good(clock):
+    breaker = CircuitBreaker("test", min_calls=4, failure_rate=0.5, open_s=30)
+    assert breaker.call(lambda: "fresh", key="k") == ("fresh", False)
+    _trip(breaker, 2)
+    assert breaker.state == CLOSED  # 2 of 3 failed, but fewer than min_calls
+    _trip(breaker, 1)
+    assert breaker.state == OPEN
+
+    assert breaker.call(lambda: "unused", key="k") == ("fresh", True)
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "unused")
+    assert breaker.counters["rejected"] == 2
+    assert breaker.counters["stale_served"] == 1
+
+
+def test_half_open_trial_closes_or_reopens_with_doubled_cooldown(clock):
+    breaker = CircuitBreaker("test", min_calls=2, open_s=30, max_open_s=50)
+    _trip(breaker, 2)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    _trip(breaker, 1)  # the trial fails
+    assert breaker.state == OPEN and breaker.retry_in() == 50  # doubled, capped at max_open_s
+
+    clock.now += 50
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: 1) == (1, False)
+
+
+def test_slow_calls_open_the_circuit(clock):
+    breaker = CircuitBreaker("test", min_calls=2, slow_call_s=1.0, slow_rate=0.5)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_cancelled_acall_records_nothing_and_frees_the_trial(clock):
+    breaker = CircuitBreaker("test", min_calls=1, open_s=30)
+    _trip(breaker, 1)
+    clock.now += 30
+    calls = breaker.counters["calls"]
+
+    async def cancelled_trial():
+        task = asyncio.ensure_future(breaker.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_trial())
+    assert breaker.counters["calls"] == calls
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()  # the next caller gets the trial
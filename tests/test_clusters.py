@@ -0,0 +1,70 @@
+import pytest
+
+from clusters import MAX_CLUSTER_ZOOM, ClusterIndex
+from models import Incident
+
+DC = (-77.2, 38.7, -76.8, 39.1)
+WORLD = (-180.0, -85.0, 180.0, 85.0)
+
+
+def _incident(inc_id: str, lat=38.9, lng=-77.03, type="crime", severity=0.5, status="active") -> Incident:
+    return Incident(id=inc_id, type=type, status=status, lat=lat, lng=lng, severity=severity, confidence=0.7)
+
+
+def _index(*incidents: Incident) -> ClusterIndex:
+    index = ClusterIndex()
+    index.apply([(None, inc) for inc in incidents])
+    return index
+
+
+def test_nearby_incidents_share_a_cluster_with_aggregates():
+    index = _index(_incident("a", severity=0.3), _incident("b", lat=38.9001, type="accident", severity=0.9))
+    [cluster] = index.query(10, DC)
+    assert cluster["count"] == 2 and "incident_id" not in cluster
+    assert cluster["types"] == {"crime": 1, "accident": 1}
+    assert cluster["max_severity"] == 0.9
+    assert cluster["lat"] == pytest.approx(38.90005, abs=1e-6)
+
+
+def test_update_moves_and_resolve_removes():
+    a = _incident("a")
+    index = _index(a, _incident("b", lat=47.6, lng=-122.33))
+    moved = _incident("a", lat=47.6001, lng=-122.3301)
+    index.apply([(a, moved)])
+    assert index.query(10, DC) == []
+    assert [c["count"] for c in index.query(3, WORLD)] == [2]
+
+    index.apply([(moved, moved.model_copy(update={"status": "resolved"}))])
+    [cluster] = index.query(3, WORLD)
+    assert cluster["count"] == 1 and cluster["incident_id"] == "b"
+    index.apply([(_incident("b", lat=47.6, lng=-122.33), None)])
+    assert index.query(0, WORLD) == []
+
+
+def test_max_severity_is_recomputed_when_the_worst_incident_leaves():
+    worst = _incident("worst", severity=0.95)
+    index = _index(_incident("a", severity=0.4), worst, _incident("c", lat=38.9002, severity=0.6))
+    assert index.query(8, DC)[0]["max_severity"] == 0.95
+    index.apply([(worst, None)])
+    [cluster] = index.query(8, DC)
+    assert cluster["max_severity"] == 0.6 and cluster["count"] == 2
+
+
+def test_bbox_filters_cells_across_zooms():
+    index = _index(_incident("dc"), _incident("sea", lat=47.6, lng=-122.33), _incident("nyc", lat=40.71, lng=-74.0))
+    assert sorted(c["count"] for c in index.query(0, WORLD)) == [1, 2]  # the east coast shares a cell
+    assert [c["incident_id"] for c in index.query(6, DC)] == ["dc"]
+    east = (-80.0, 35.0, -70.0, 42.0)
+    assert sorted(c.get("incident_id") for c in index.query(7, east)) == ["dc", "nyc"]
+    assert index.query(12, (-100.0, 30.0, -99.0, 31.0)) == []
+
+
+def test_every_incident_is_its_own_cluster_above_max_zoom():
+    # ~5 m apart: one cell at the deepest aggregated level
+    index = _index(_incident("a", severity=0.2), _incident("b", lat=38.90005, severity=0.8))
+    assert [c["count"] for c in index.query(MAX_CLUSTER_ZOOM, DC)] == [2]
+
+    singles = index.query(MAX_CLUSTER_ZOOM + 3, DC)
+    assert sorted((c["incident_id"], c["count"], c["max_severity"]) for c in singles) == [("a", 1, 0.2), ("b", 1, 0.8)]
+    only_a = index.query(20, (-77.031, 38.8999, -77.029, 38.90002))
+    assert [c["incident_id"] for c in only_a] == ["a"]
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+import digest_cache
+from digest_cache import DigestCache, normalize_prompt
+
+
+class Digest(BaseModel):
+    crime_digest: Any = None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_800_000.0  # start of a 1800 s crime bucket
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(digest_cache.time, "time", clock)
+    return clock
+
+
+class Coordinator:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, prompt: str) -> Digest:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return Digest(crime_digest=[{"call": self.calls}])
+
+
+def test_prompts_normalise_case_space_and_coordinates():
+    assert normalize_prompt("Crime near  38.90721, -77.03691 ?") == normalize_prompt("crime NEAR 38.9074, -77.0371")
+
+
+def test_fresh_hit_skips_the_coordinator(tmp_path, clock):
+    cache, coordinator = DigestCache(str(tmp_path / "d.sqlite")), Coordinator()
+
+    async def run():
+        first = await cache.get_digest("crime", "crime in DC", coordinator, Digest)
+        clock.now += 1000
+        second = await cache.get_digest("crime", "Crime in DC.", coordinator, Digest)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second and coordinator.calls == 1
+    assert cache.counters["misses"] == 1 and cache.counters["hits"] == 1
+
+
+def test_stale_digest_is_served_while_one_refresh_runs(tmp_path, clock):
+    cache, coordinator = DigestCache(str(tmp_path / "d.sqlite")), Coordinator()
+
+    async def run():
+        await cache.get_digest("crime", "crime in DC", coordinator, Digest)
+        clock.now += 1800  # next bucket: the cached digest is stale
+        stale = [await cache.get_digest("crime", "crime in DC", coordinator, Digest) for _ in range(3)]
+        assert coordinator.calls == 1  # served before any refresh ran
+        await asyncio.gather(*cache.pending_refreshes())
+        fresh = await cache.get_digest("crime", "crime in DC", coordinator, Digest)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert [d.crime_digest for d in stale] == [[{"call": 1}]] * 3
+    assert fresh.crime_digest == [{"call": 2}]
+    assert coordinator.calls == 2  # one refresh for three stale reads
+    assert cache.counters["stale"] == 3 and cache.counters["refreshes"] == 1
+
+
+def test_digest_older_than_one_bucket_is_a_miss(tmp_path, clock):
+    cache = DigestCache(str(tmp_path / "d.sqlite"))
+    cache.store("crime", "crime in DC", Digest(crime_digest=[1]).model_dump_json())
+    clock.now += 2 * 1800
+    assert cache.lookup("crime", "crime in DC") == (None, "miss")
+
+
+def test_empty_digests_are_not_cached(tmp_path, clock):
+    cache = DigestCache(str(tmp_path / "d.sqlite"))
+
+    async def empty(prompt):
+        return Digest(crime_digest=[])
+
+    asyncio.run(cache.get_digest("crime", "crime in DC", empty, Digest))
+    assert cache.lookup("crime", "crime in DC") == (None, "miss")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = DigestCache(str(tmp_path / "d.sqlite"), max_entries=2)
+    for i, prompt in enumerate(("a", "b", "c")):
+        clock.now += 1
+        cache.store("crime", prompt, str(i))
+        if prompt == "b":
+            clock.now += 1
+            cache.lookup("crime", "a")  # "a" is now more recent than "b"
+    assert cache.lookup("crime", "b") == (None, "miss")
+    assert cache.lookup("crime", "a")[1] == cache.lookup("crime", "c")[1] == "fresh"
+    assert cache.counters["evictions"] == 1
@@ -0,0 +1,72 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import encoding
+from encoding import RequestDecompressionMiddleware
+
+brotli = pytest.importorskip("brotli")
+
+MAX_BYTES = 64 * 1024
+PACKERS = [("gzip", gzip.compress), ("br", brotli.compress)]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(RequestDecompressionMiddleware, max_bytes=MAX_BYTES)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("content_encoding, pack", PACKERS)
+def test_compressed_bodies_are_inflated(client, content_encoding, pack):
+    response = client.post("/echo", content=pack(b"x" * 1000), headers={"Content-Encoding": content_encoding})
+    assert response.json() == {"size": 1000}
+
+
+@pytest.mark.parametrize("content_encoding, pack", PACKERS)
+def test_oversized_bodies_get_413(client, content_encoding, pack):
+    bomb = pack(b"\0" * (32 * 1024 * 1024))
+    assert len(bomb) < MAX_BYTES  # a small body that would inflate to 32 MB
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": content_encoding})
+    assert response.status_code == 413
+
+
+def test_brotli_output_is_bounded_while_inflating(client, monkeypatch):
+    outputs = []
+
+    class SpyDecompressor:
+        def __init__(self):
+            self._inner = brotli.Decompressor()
+
+        def process(self, data, **kwargs):
+            out = self._inner.process(data, **kwargs)
+            outputs.append(len(out))
+            return out
+
+        def __getattr__(self, name):
+            return getattr(self._inner, name)
+
+    monkeypatch.setattr(encoding, "brotli", SimpleNamespace(Decompressor=SpyDecompressor, error=brotli.error))
+    bomb = brotli.compress(b"\0" * (32 * 1024 * 1024))
+    assert client.post("/echo", content=bomb, headers={"Content-Encoding": "br"}).status_code == 413
+    assert sum(outputs) < 2 * MAX_BYTES  # never anywhere near the 32 MB the body expands to
+
+
+@pytest.mark.parametrize("content_encoding, pack", PACKERS)
+def test_truncated_bodies_get_400(client, content_encoding, pack):
+    body = pack(bytes(range(256)) * 64)
+    response = client.post("/echo", content=body[:len(body) // 2], headers={"Content-Encoding": content_encoding})
+    assert response.status_code == 400
+
+
+def test_unknown_encoding_gets_415(client):
+    assert client.post("/echo", content=b"{}", headers={"Content-Encoding": "zstd"}).status_code == 415
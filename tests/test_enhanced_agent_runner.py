@@ -0,0 +1,39 @@
+import pytest
+
+from cities import CITIES, city_bbox
+from enhanced_agent_runner import load_cities
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch):
+    for name in ("GRIDWATCH_CITIES", "GRIDWATCH_CITY", "GRIDWATCH_BBOX"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_unset_runs_the_single_configured_city(env):
+    assert load_cities() == {"Washington, DC": "-77.044,38.895,-77.028,38.905"}
+    env.setenv("GRIDWATCH_CITY", "Denver, CO")
+    env.setenv("GRIDWATCH_BBOX", "-105.1,39.6,-104.9,39.8")
+    assert load_cities() == {"Denver, CO": "-105.1,39.6,-104.9,39.8"}
+
+
+def test_all_covers_every_city(env):
+    env.setenv("GRIDWATCH_CITIES", " ALL ")
+    assert load_cities() == {name: city_bbox(data) for name, data in CITIES.items()}
+
+
+def test_listed_cities_skip_blank_entries(env):
+    env.setenv("GRIDWATCH_CITIES", " Seattle, WA ;; Denver, CO; ")
+    assert list(load_cities()) == ["Seattle, WA", "Denver, CO"]
+
+
+def test_only_blank_entries_fall_back_to_the_single_city(env):
+    env.setenv("GRIDWATCH_CITIES", " ; ;")
+    assert list(load_cities()) == ["Washington, DC"]
+
+
+def test_unknown_names_are_rejected(env):
+    env.setenv("GRIDWATCH_CITIES", "Seattle, WA;Gotham")
+    with pytest.raises(ValueError, match="Gotham"):
+        load_cities()
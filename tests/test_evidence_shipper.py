@@ -0,0 +1,108 @@
+import gzip
+import json
+
+import pytest
+import requests
+
+import evidence_shipper
+from circuit_breaker import CircuitBreaker
+from evidence_shipper import EvidenceShipper
+
+
+class FakeBackend:
+    def __init__(self):
+        self.up = False
+        self.batches = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        if not self.up:
+            raise requests.exceptions.ConnectionError("refused")
+        self.batches.append((headers["X-Producer-Id"], json.loads(gzip.decompress(data))))
+        response = requests.Response()
+        response.status_code = 202
+        return response
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(evidence_shipper.http_client, "post", backend.post)
+    monkeypatch.setattr(evidence_shipper, "_backoff", lambda attempt: 0.0)
+    return backend
+
+
+def _shipper(tmp_path, producer="runner", backend_url="http://backend.test", **kwargs):
+    shipper = EvidenceShipper(backend_url, producer, flush_interval=60, spool_root=str(tmp_path), **kwargs)
+    shipper.circuit = CircuitBreaker("test-backend", min_calls=1000)
+    return shipper
+
+
+def test_spools_while_down_and_replays_in_order(tmp_path, backend):
+    shipper = _shipper(tmp_path, max_items=2)
+    shipper.submit([{"evidence_id": f"e{i}"} for i in range(5)])
+    assert not shipper.flush(timeout=1)  # backend down: batches stay spooled
+    assert shipper.stats()["spool_files"] == 3
+    assert shipper.counters["spooled"] == 5
+
+    backend.up = True
+    shipper.submit([{"evidence_id": "e5"}])
+    assert shipper.flush(timeout=5)
+    shipper.close()
+    sent = [item["evidence_id"] for _, batch in backend.batches for item in batch]
+    assert sent == [f"e{i}" for i in range(6)]
+    assert shipper.counters["replayed"] == 5
+    assert shipper.stats()["spool_files"] == 0
+
+
+def test_spool_survives_a_restart(tmp_path, backend):
+    first = _shipper(tmp_path)
+    first.submit([{"evidence_id": "e0"}])
+    first.close()
+    assert first.stats()["spool_files"] == 1
+
+    backend.up = True
+    second = _shipper(tmp_path)
+    assert second.flush(timeout=5)
+    second.close()
+    assert backend.batches == [("runner", [{"evidence_id": "e0"}])]
+
+
+def test_spools_are_not_shared_across_backends(tmp_path, backend):
+    staging = _shipper(tmp_path, backend_url="http://staging.test")
+    staging.submit([{"evidence_id": "staging"}])
+    staging.close()
+
+    backend.up = True
+    prod = _shipper(tmp_path, backend_url="http://prod.test")
+    assert prod.spool_dir != staging.spool_dir
+    assert prod.flush(timeout=5)
+    prod.close()
+    assert backend.batches == [] and staging.stats()["spool_files"] == 1
+
+
+def test_concurrent_shippers_for_one_producer_get_their_own_spool(tmp_path, backend):
+    first, second = _shipper(tmp_path), _shipper(tmp_path)
+    assert second.spool_dir == first.spool_dir + ".1"
+    first.submit([{"evidence_id": "e0"}])
+    second.submit([{"evidence_id": "e1"}])
+    first.close()
+    second.close()
+    assert first.stats()["spool_files"] == second.stats()["spool_files"] == 1
+
+    backend.up = True
+    restarted = _shipper(tmp_path)  # the first directory's lock is free again
+    assert restarted.spool_dir == first.spool_dir
+    assert restarted.flush(timeout=5)
+    restarted.close()
+    assert backend.batches == [("runner", [{"evidence_id": "e0"}])]
+
+
+def test_get_shipper_is_per_backend_and_producer(tmp_path, monkeypatch):
+    monkeypatch.setattr(evidence_shipper, "EvidenceShipper",
+                        lambda url, producer: EvidenceShipper(url, producer, spool_root=str(tmp_path)))
+    monkeypatch.setattr(evidence_shipper, "_shippers", {})
+    orca = evidence_shipper.get_shipper("http://backend.test", "orca")
+    assert evidence_shipper.get_shipper("http://backend.test", "orca") is orca
+    runner = evidence_shipper.get_shipper("http://backend.test", "agent-runner")
+    assert runner is not orca and runner.producer == "agent-runner"
+    evidence_shipper.close_all()
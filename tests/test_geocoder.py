@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import geocoder
+from geocoder import Gazetteer, geocode, normalize
+
+DUPONT = (38.9096, -77.0434)
+FOURTEENTH_AND_U = (38.917, -77.032)
+FOURTEENTH = (38.91, -77.0319)
+SPACE_NEEDLE = (47.6205, -122.3493)
+
+
+@pytest.fixture
+def gazetteer(tmp_path, monkeypatch):
+    path = tmp_path / "gazetteer.json"
+    path.write_text(json.dumps({"cities": {
+        "Washington, DC": {
+            "lat": 38.9072, "lng": -77.0369,
+            "places": {"Dupont Circle": DUPONT, "14th Street": FOURTEENTH, "U Street Corridor": [38.917, -77.029],
+                       "Capitol Hill": [38.8868, -76.9995], "US Capitol": [38.8899, -77.0091]},
+            "intersections": {"14th Street & U Street": FOURTEENTH_AND_U},
+            "aliases": {"Capitol": "US Capitol", "U Street": "U Street Corridor"},
+        },
+        "Seattle, WA": {"lat": 47.6062, "lng": -122.3321, "places": {"Space Needle": SPACE_NEEDLE}},
+    }}))
+    gazetteer = Gazetteer(str(path))
+    monkeypatch.setattr(geocoder, "_gazetteer", gazetteer)
+    geocoder._geocode.cache_clear()
+    yield gazetteer
+    geocoder._geocode.cache_clear()
+
+
+def test_normalize_expands_abbreviations_and_drops_noise():
+    assert normalize("  1400 block of 14th St. NW ") == "14th street"
+    assert normalize("Near the  DUPONT   Circle") == "dupont circle"
+
+
+def test_exact_place_and_alias_hits(gazetteer):
+    assert geocode("Dupont Circle", "Washington, DC") == DUPONT
+    assert geocode("Space Needle", "Seattle") == SPACE_NEEDLE
+    assert geocode("Capitol", "Washington, DC") == (38.8899, -77.0091)  # alias, not "Capitol Hill"
+
+
+def test_case_and_whitespace_are_normalised(gazetteer):
+    assert geocode("  dupont   CIRCLE ", "Washington, DC") == DUPONT
+    assert geocode("DUPONT CIRCLE", "washington") == DUPONT
+
+
+@pytest.mark.parametrize("text", ["14th St NW & U St", "U Street and 14th Street", "14th St / U St"])
+def test_intersections_match_in_any_order(gazetteer, text):
+    assert geocode(text, "Washington, DC") == FOURTEENTH_AND_U
+
+
+def test_unknown_intersection_falls_back_to_a_known_street(gazetteer):
+    assert geocode("14th St & Some Alley", "Washington, DC") == FOURTEENTH
+
+
+def test_contained_and_fuzzy_names(gazetteer):
+    assert geocode("Shooting reported near Dupont Circle fountain", "Washington, DC") == DUPONT
+    assert geocode("Dupont Cirle", "Washington, DC") == DUPONT
+
+
+def test_city_is_resolved_from_nearby_coordinates(gazetteer):
+    assert geocode("Space Needle", near=(47.61, -122.34)) == SPACE_NEEDLE
+    assert geocode("Space Needle", near=(0.0, 0.0)) is None  # no gazetteer city within range
+
+
+def test_unknown_city_and_location_return_none(gazetteer):
+    assert geocode("Dupont Circle", "Atlantis") is None
+    assert geocode("Space Needle", "Washington, DC") is None  # known, but in another city
+    assert geocode("Zzyzx Road", "Washington, DC") is None
+    assert geocode("", "Washington, DC") is None
+
+
+def test_bundled_gazetteer_covers_every_city():
+    from cities import CITIES
+
+    assert set(Gazetteer().cities) == set(CITIES)
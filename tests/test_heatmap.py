@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+import evidence_bus
+import heatmap
+from evidence_bus import EvidenceBus
+from heatmap import SeverityHeatmap, encode_png, quantize
+from models import Evidence
+
+CITIES = {"Washington, DC": {"lat": 38.9072, "lng": -77.0369}, "Denver, CO": {"lat": 39.7392, "lng": -104.9903}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(evidence_bus, "time", clock)
+    monkeypatch.setattr(heatmap, "time", clock)
+    return clock
+
+
+def _evidence(evidence_id: str, lat=38.9072, lng=-77.0369, severity=0.8, confidence=0.5, radius_m=400) -> Evidence:
+    return Evidence(evidence_id=evidence_id, source_type="news", type="crime", lat=lat, lng=lng,
+                    radius_m=radius_m, confidence=confidence, raw={"severity": severity})
+
+
+def _bus(clock, ttl=300):
+    bus = EvidenceBus(ttl_seconds=ttl)
+    grids = SeverityHeatmap(CITIES, size=64)
+    bus.listeners.append(grids)
+    return bus, grids
+
+
+def test_added_evidence_lands_in_its_city_only(clock):
+    bus, grids = _bus(clock)
+    bus.add(_evidence("a"))
+    bus.add(_evidence("far", lat=0.0, lng=0.0))  # in no city: ignored
+
+    dc = grids.grid("Washington, DC", resolution=32)
+    assert dc.sum() == pytest.approx(0.8 * 0.5, rel=1e-5)  # footprint is normalised
+    row, col = np.unravel_index(dc.argmax(), dc.shape)
+    assert (row, col) in {(15, 15), (15, 16), (16, 15), (16, 16)}  # around the city center
+    assert grids.grid("Denver, CO", resolution=32).sum() == 0
+
+
+def test_expired_evidence_is_subtracted(clock):
+    bus, grids = _bus(clock, ttl=300)
+    bus.add(_evidence("a"))
+    clock.now += 200
+    bus.add(_evidence("b", lat=38.95))
+    clock.now += 150
+    bus.expire()  # "a" is past its TTL, "b" is not
+
+    remaining = grids.grid("Washington, DC", resolution=64)
+    assert remaining.sum() == pytest.approx(0.4, rel=1e-5)
+    clock.now += 200
+    bus.expire()
+    assert not grids.grid("Washington, DC", resolution=64).any()
+
+
+def test_reingested_evidence_replaces_its_footprint(clock):
+    _, grids = _bus(clock)
+    grids.on_evidence_added(_evidence("a", severity=0.8), clock.now)
+    grids.on_evidence_added(_evidence("a", severity=0.2), clock.now)
+    assert grids.grid("Washington, DC", resolution=64).sum() == pytest.approx(0.2 * 0.5, rel=1e-5)
+
+
+def test_expiring_an_older_copy_keeps_the_reingested_footprint(clock):
+    bus, grids = _bus(clock, ttl=300)
+    bus.add(_evidence("a", severity=0.8))
+    clock.now += 200
+    bus.add(_evidence("a", severity=0.4))
+    clock.now += 150
+    assert len(bus.snapshot()) == 1  # the first copy expired, the second is live
+
+    assert grids.grid("Washington, DC", resolution=64).sum() == pytest.approx(0.4 * 0.5, rel=1e-5)
+    clock.now += 200
+    bus.expire()
+    assert not grids.grid("Washington, DC", resolution=64).any()
+
+
+def test_decayed_grid_halves_every_half_life(clock):
+    grids = SeverityHeatmap(CITIES, size=64, half_life_s=600)
+    grids.on_evidence_added(_evidence("a"), clock.now)
+    clock.now += 600
+    assert grids.grid("Washington, DC", resolution=64, decay=True).sum() == pytest.approx(0.2, rel=1e-5)
+    assert grids.grid("Washington, DC", resolution=64).sum() == pytest.approx(0.4, rel=1e-5)
+
+
+def test_quantize_and_png():
+    gray, peak = quantize(np.array([[0.0, 1.0], [2.0, 4.0]], dtype=np.float32))
+    assert peak == 4.0 and gray.tolist() == [[0, 64], [128, 255]]
+    png = encode_png(gray)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n") and png.endswith(b"IEND\xaeB`\x82")
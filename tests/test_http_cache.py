@@ -0,0 +1,92 @@
+import os
+
+import pytest
+import requests
+
+import http_cache
+from http_cache import HttpCache
+
+
+class Upstream:
+    """Stands in for http_client.get: serves one body per URL with an ETag and answers If-None-Match."""
+
+    def __init__(self, cache_control: str = "max-age=0"):
+        self.cache_control = cache_control
+        self.bodies = {}
+        self.requests = []
+
+    def __call__(self, url, params=None, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append((url, dict(headers)))
+        body = self.bodies.get(url, b'{"ok": true}')
+        etag = f'"{len(body)}"'
+        response = requests.Response()
+        response.url = url
+        response.headers["Cache-Control"] = self.cache_control
+        response.headers["ETag"] = etag
+        if headers.get("If-None-Match") == etag:
+            response.status_code, response._content = 304, b""
+        else:
+            response.status_code, response._content = 200, body
+        return response
+
+
+def _cache(tmp_path, monkeypatch, upstream, **kwargs) -> HttpCache:
+    monkeypatch.setattr(http_cache.http_client, "get", upstream)
+    return HttpCache(str(tmp_path / "http.sqlite"), **kwargs)
+
+
+def test_default_path_is_next_to_the_module():
+    if "GRIDWATCH_HTTP_CACHE" in os.environ:
+        pytest.skip("cache path overridden")
+    assert http_cache.CACHE_PATH == os.path.join(os.path.dirname(os.path.abspath(http_cache.__file__)),
+                                                 "cache", "http.sqlite")
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path, monkeypatch):
+    upstream = Upstream("max-age=60")
+    cache = _cache(tmp_path, monkeypatch, upstream)
+    assert cache.get("https://feed.test/a").json() == {"ok": True}
+    again = cache.get("https://feed.test/a")
+    assert again.json() == {"ok": True} and again.from_cache
+    assert len(upstream.requests) == 1 and cache.counters["hits"] == 1
+
+
+def test_stale_entries_are_revalidated_with_their_etag(tmp_path, monkeypatch):
+    upstream = Upstream("max-age=0")
+    cache = _cache(tmp_path, monkeypatch, upstream)
+    cache.get("https://feed.test/a")
+    revalidated = cache.get("https://feed.test/a")
+
+    assert upstream.requests[1][1]["If-None-Match"] == '"12"'
+    assert revalidated.status_code == 200 and revalidated.json() == {"ok": True}
+    assert cache.counters["revalidated"] == 1 and cache.counters["bytes_saved"] == 12
+
+    upstream.bodies["https://feed.test/a"] = b'{"ok": false}'  # changed upstream: new ETag, full body
+    assert cache.get("https://feed.test/a").json() == {"ok": False}
+    assert cache.counters["misses"] == 2
+
+
+def test_no_store_and_errors_are_not_cached(tmp_path, monkeypatch):
+    upstream = Upstream("no-store")
+    cache = _cache(tmp_path, monkeypatch, upstream)
+    cache.get("https://feed.test/a")
+    cache.get("https://feed.test/a")
+    assert len(upstream.requests) == 2 and "If-None-Match" not in upstream.requests[1][1]
+    assert cache.stats()["entries"] == 0 and cache.counters["uncacheable"] == 2
+
+
+def test_least_recently_used_bodies_are_evicted_over_max_bytes(tmp_path, monkeypatch):
+    upstream = Upstream("max-age=60")
+    for name in "abc":
+        upstream.bodies[f"https://feed.test/{name}"] = name.encode() * 400
+    cache = _cache(tmp_path, monkeypatch, upstream, max_bytes=1000)
+    cache.get("https://feed.test/a")
+    cache.get("https://feed.test/b")
+    cache.get("https://feed.test/a")  # "b" is now the least recently used
+    cache.get("https://feed.test/c")
+
+    assert cache.counters["evictions"] == 1
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 800
+    cache.get("https://feed.test/b")
+    assert [url for url, _ in upstream.requests].count("https://feed.test/b") == 2
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from incident_registry import IncidentRegistry
+from models import Incident
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+
+def _fused(lat=38.9, lng=-77.03, type_="crime", severity=0.5) -> Incident:
+    # build_incidents hands out fresh ids on every rebuild
+    return Incident(id=f"{type_}-fused", type=type_, lat=lat, lng=lng, severity=severity, confidence=0.7)
+
+
+def test_ids_and_first_seen_survive_rebuilds():
+    registry = IncidentRegistry()
+    (first,) = registry.reconcile([_fused()], now=T0)
+    assert first.id.startswith("crime-") and first.version == 1
+    assert registry.changes == [(None, first)]
+
+    (same,) = registry.reconcile([_fused(lat=38.9003)], now=T0 + timedelta(minutes=1))  # ~33 m drift
+    assert same.id == first.id
+    assert same.created_at == T0
+    assert same.version == 2  # moved
+
+    (unchanged,) = registry.reconcile([_fused(lat=38.9003)], now=T0 + timedelta(minutes=2))
+    assert unchanged.version == 2 and registry.changes == []
+
+
+def test_other_types_and_distant_clusters_get_new_ids():
+    registry = IncidentRegistry()
+    (crime,) = registry.reconcile([_fused()], now=T0)
+    out = registry.reconcile([_fused(), _fused(type_="accident"), _fused(lat=38.95)], now=T0)
+    assert len({i.id for i in out}) == 3
+    assert crime.id in {i.id for i in out}
+
+
+def test_unseen_incidents_age_out():
+    registry = IncidentRegistry(monitoring_after_s=600, resolve_after_s=1800, retain_s=3600)
+    (inc,) = registry.reconcile([_fused()], now=T0)
+
+    registry.reconcile([], now=T0 + timedelta(minutes=10))
+    assert registry.get(inc.id).status == "monitoring"
+    registry.reconcile([], now=T0 + timedelta(minutes=30))
+    assert registry.get(inc.id).status == "resolved"
+    assert registry.get(inc.id).version == 3
+
+    (back,) = registry.reconcile([_fused()], now=T0 + timedelta(minutes=40))
+    assert back.id == inc.id and back.status == "active"
+
+    registry.reconcile([], now=T0 + timedelta(minutes=40 + 30 + 60))
+    assert registry.get(inc.id) is None
+    assert registry.changes[-1][1] is None
+
+
+def test_snapshot_lists_live_incidents_first():
+    registry = IncidentRegistry()
+    registry.reconcile([_fused(severity=0.9)], now=T0)
+    registry.reconcile([_fused(lat=38.95, severity=0.2)], now=T0 + timedelta(hours=1))
+    version = registry.version
+    snapshot = registry.snapshot()
+    assert [i.status for i in snapshot] == ["active", "resolved"]
+    assert registry.version == version  # reading does not rebuild or age
@@ -0,0 +1,94 @@
+import importlib
+import threading
+
+import pytest
+
+from ingest_queue import IngestQueue, IngestRejected
+from models import Evidence
+
+
+def _items(producer: str, n: int):
+    return [Evidence(evidence_id=f"{producer}_{i}", source_type="news", type="crime", lat=38.9, lng=-77.0)
+            for i in range(n)]
+
+
+class BlockedSink:
+    """Holds the consumer on its first item until released, so the queue keeps its depth."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.seen = []
+
+    def __call__(self, ev):
+        self.started.set()
+        self.release.wait(5)
+        self.seen.append(ev.evidence_id)
+
+
+@pytest.fixture
+def blocked():
+    sink = BlockedSink()
+    queue = IngestQueue(sink, max_items=20, producer_share=0.5, batch_size=4)
+    queue.offer("warmup", _items("warmup", 1))
+    assert sink.started.wait(5)  # the consumer is now stuck inside the sink
+    yield queue, sink
+    sink.release.set()
+    queue.stop()
+
+
+def test_producer_over_its_share_gets_429_with_retry_after(blocked):
+    queue, _ = blocked
+    assert queue.offer("runner", _items("runner", 10)) == 10
+    with pytest.raises(IngestRejected) as e:
+        queue.offer("runner", _items("runner", 1))
+    assert e.value.status_code == 429 and 1 <= e.value.retry_after <= 30
+    assert queue.offer("orca", _items("orca", 5)) == 5  # other producers still get in
+
+
+def test_full_queue_and_oversized_batches_are_rejected_whole(blocked):
+    queue, _ = blocked
+    queue.offer("a", _items("a", 10))
+    queue.offer("b", _items("b", 8))
+    with pytest.raises(IngestRejected) as e:
+        queue.offer("c", _items("c", 3))
+    assert e.value.status_code == 429 and e.value.reason == "Ingest queue is full"
+    with pytest.raises(IngestRejected) as e:
+        queue.offer("c", _items("c", 11))
+    assert e.value.status_code == 413
+    assert queue.stats()["depth"] == 18 and queue.rejected == 14
+
+
+def test_drains_round_robin_across_producers(blocked):
+    queue, sink = blocked
+    queue.offer("a", _items("a", 6))
+    queue.offer("b", _items("b", 2))
+    sink.release.set()
+    queue.stop()
+    assert sink.seen == ["warmup_0", "a_0", "a_1", "b_0", "b_1", "a_2", "a_3", "a_4", "a_5"]
+
+
+def test_evidence_endpoint_maps_rejections_to_http(tmp_path, monkeypatch):
+    monkeypatch.setenv("GRIDWATCH_LOCAL_MODE", "1")
+    monkeypatch.setenv("GRIDWATCH_ARCHIVE_DIR", str(tmp_path))
+    main = importlib.import_module("main")
+    from fastapi.testclient import TestClient
+
+    sink = BlockedSink()
+    queue = IngestQueue(sink, max_items=8, producer_share=0.5)
+    monkeypatch.setattr(main, "ingest_queue", queue)
+    client = TestClient(main.app)
+    body = [item.model_dump(mode="json") for item in _items("runner", 4)]
+    try:
+        assert client.post("/evidence", json=body[:1], headers={"X-Producer-Id": "warmup"}).status_code == 202
+        assert sink.started.wait(5)
+        assert client.post("/evidence", json=body, headers={"X-Producer-Id": "runner"}).json() == {"count": 4}
+
+        rejected = client.post("/evidence", json=body[:1], headers={"X-Producer-Id": "runner"})
+        assert rejected.status_code == 429
+        assert 1 <= int(rejected.headers["Retry-After"]) <= 30
+        assert client.post("/evidence", json=body[:1], headers={"X-Producer-Id": "orca"}).status_code == 202
+        assert client.post("/evidence", json=body + body, headers={"X-Producer-Id": "big"}).status_code == 413
+    finally:
+        sink.release.set()
+        queue.stop()
@@ -0,0 +1,43 @@
+import json
+
+from json_stream import JsonItemStream, loads_tolerant, parse_items, repair_json
+
+
+def test_trailing_comma_before_a_comment():
+    assert json.loads(repair_json('{"a": 1, // note\n}')) == {"a": 1}
+    assert json.loads(repair_json('[1, 2, // last\n  // really\n]')) == [1, 2]
+
+
+def test_repairs_python_reprs_and_sloppy_output():
+    text = "{'where': \"O'Hare\", ok: True, 'n': None, 'tags': ['a', 'b',],}"
+    assert loads_tolerant(text) == {"where": "O'Hare", "ok": True, "n": None, "tags": ["a", "b"]}
+    assert loads_tolerant('```json\n{"url": "http://x.test/a"}\n```') == {"url": "http://x.test/a"}
+
+
+def test_stream_emits_items_as_they_close():
+    text = '```json\n{"crime_digest": [{"id": 1, "where": "14th St"}, {"id": 2, "note": "}]"}]}\n```'
+    seen = []
+    stream = JsonItemStream(on_item=seen.append)
+    emitted = [item for c in text for item in stream.feed(c)]
+    assert emitted == seen == [{"id": 1, "where": "14th St"}, {"id": 2, "note": "}]"}]
+    assert stream.close() == seen
+
+
+def test_stream_ignores_braces_and_quotes_in_comments():
+    text = '[{"id": 1, // don\'t close {here}\n}, // next one\'s "odd" ]\n{"id": 2}]'
+    stream = JsonItemStream()
+    stream.feed(text)
+    assert stream.close() == [{"id": 1}, {"id": 2}]
+    assert stream.skipped == 0
+
+
+def test_truncated_stream_keeps_complete_items():
+    stream = JsonItemStream()
+    stream.feed('{"crime_digest": [{"id": 1}, {"id": 2, "where": "U S')
+    assert stream.close() == [{"id": 1}]
+    assert stream.skipped == 1
+
+
+def test_malformed_item_costs_only_itself():
+    assert parse_items('[{"id": 1}, {"id": 2 "x": }, {"id": 3}]') == [{"id": 1}, {"id": 3}]
+    assert parse_items({"crime_digest": "[{'id': 1}]"}, key="crime_digest") == [{"id": 1}]
@@ -0,0 +1,38 @@
+import json
+import threading
+
+from llm_metrics import MetricsRecorder, aggregate, metrics_context, price
+
+
+def test_events_from_many_threads_land_as_whole_lines(tmp_path):
+    path = tmp_path / "metrics" / "llm_metrics.jsonl"
+    recorder = MetricsRecorder(str(path))
+
+    def run(city):
+        with metrics_context(city):
+            for _ in range(200):
+                recorder.record("model", agent="crime", model="gemini-2.5-flash", latency_ms=120.0,
+                                prompt_tokens=1000, output_tokens=100, cost_usd=price("gemini-2.5-flash", 1000, 100))
+
+    threads = [threading.Thread(target=run, args=(f"City {i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    recorder.close()
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(events) == 800
+    totals = aggregate(str(path))
+    assert totals["models"][("crime", "gemini-2.5-flash")]["calls"] == 800
+    assert {city for (city,) in totals["cities"]} == {f"City {i}" for i in range(4)}
+
+
+def test_recording_after_close_starts_a_new_writer(tmp_path):
+    path = tmp_path / "llm_metrics.jsonl"
+    recorder = MetricsRecorder(str(path))
+    recorder.record("agent", agent="crime", latency_ms=1.0)
+    recorder.close()
+    recorder.record("agent", agent="crime", latency_ms=2.0)
+    recorder.close()
+    assert [json.loads(line)["latency_ms"] for line in path.read_text().splitlines()] == [1.0, 2.0]
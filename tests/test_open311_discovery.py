@@ -0,0 +1,98 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import open311_discovery
+from open311_discovery import REPROBE_BASE_S, REPROBE_MAX_S, Open311Discovery, candidate_endpoints
+
+JURISDICTION = "city.test"
+CANDIDATES = candidate_endpoints(JURISDICTION)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Upstream:
+    """Stands in for http_cache.get: only the URLs in `working` answer with Open311 requests."""
+
+    def __init__(self, *working):
+        self.working = set(working)
+        self.calls = []
+
+    def __call__(self, url, params=None, timeout=None):
+        self.calls.append(url)
+        if url not in self.working:
+            raise ConnectionError(f"{url} refused")
+        return SimpleNamespace(status_code=200, json=lambda: [{"service_request_id": "1"}])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(open311_discovery, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+def _discovery(tmp_path, monkeypatch, upstream) -> Open311Discovery:
+    monkeypatch.setattr(open311_discovery.http_cache, "get", upstream)
+    return Open311Discovery(str(tmp_path / "open311.json"))
+
+
+def test_default_path_is_next_to_the_module():
+    if "GRIDWATCH_OPEN311_STATE" in os.environ:
+        pytest.skip("state path overridden")
+    assert open311_discovery.STATE_PATH == os.path.join(
+        os.path.dirname(os.path.abspath(open311_discovery.__file__)), "cache", "open311_endpoints.json")
+
+
+def test_working_endpoint_is_remembered_across_runs(tmp_path, monkeypatch, clock):
+    upstream = Upstream(CANDIDATES[1])
+    found, url = _discovery(tmp_path, monkeypatch, upstream).fetch(JURISDICTION)
+    assert url == CANDIDATES[1] and found == [{"service_request_id": "1"}]
+
+    upstream.calls.clear()
+    restarted = _discovery(tmp_path, monkeypatch, upstream)
+    assert restarted.fetch(JURISDICTION)[1] == CANDIDATES[1]
+    assert upstream.calls == [CANDIDATES[1]] and restarted.counters["known_hits"] == 1
+
+
+def test_dead_endpoints_back_off_exponentially(tmp_path, monkeypatch, clock):
+    upstream = Upstream()
+    discovery = _discovery(tmp_path, monkeypatch, upstream)
+    assert discovery.fetch(JURISDICTION) == ([], None)
+    assert len(upstream.calls) == len(CANDIDATES)
+
+    clock.now += REPROBE_BASE_S - 1
+    assert discovery.fetch(JURISDICTION) == ([], None)
+    assert len(upstream.calls) == len(CANDIDATES)  # all negatively cached: nothing probed
+    assert discovery.counters["skipped_dead"] == len(CANDIDATES)
+
+    clock.now += 1
+    discovery.fetch(JURISDICTION)
+    dead = json.loads((tmp_path / "open311.json").read_text())[JURISDICTION]["dead"]
+    assert {d["failures"] for d in dead.values()} == {2}
+    assert {d["retry_at"] for d in dead.values()} == {clock.now + 2 * REPROBE_BASE_S}
+
+    for _ in range(20):
+        clock.now += REPROBE_MAX_S
+        discovery.fetch(JURISDICTION)
+    assert {d["retry_at"] - clock.now for d in discovery._state[JURISDICTION]["dead"].values()} == {REPROBE_MAX_S}
+
+
+def test_failing_known_endpoint_is_demoted_and_candidates_reprobed(tmp_path, monkeypatch, clock):
+    upstream = Upstream(CANDIDATES[0])
+    discovery = _discovery(tmp_path, monkeypatch, upstream)
+    discovery.fetch(JURISDICTION)
+
+    upstream.working = {CANDIDATES[2]}
+    clock.now += REPROBE_BASE_S  # candidates that lost the first race may have been marked dead
+    assert discovery.fetch(JURISDICTION)[1] == CANDIDATES[2]
+    state = discovery._state[JURISDICTION]
+    assert state["working"] == CANDIDATES[2] and state["dead"][CANDIDATES[0]]["failures"] == 1
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from session_pool import SessionPool
+
+
+class FakeSessionService:
+    """The create/delete half of an InMemorySessionService."""
+
+    def __init__(self, fail_deletes: bool = False):
+        self.sessions = {}
+        self.fail_deletes = fail_deletes
+
+    async def create_session(self, app_name, user_id, session_id, state=None):
+        self.sessions[session_id] = (app_name, user_id, state)
+
+    async def delete_session(self, app_name, user_id, session_id):
+        if self.fail_deletes:
+            raise RuntimeError("backend gone")
+        del self.sessions[session_id]
+
+
+def _pool(mode="evict", **kwargs):
+    service = FakeSessionService(**kwargs)
+    return SessionPool(service, app_name="crime_app", user_id="crime_user", mode=mode, max_reuses=3), service
+
+
+def test_evict_deletes_the_session_after_the_run():
+    pool, service = _pool()
+
+    async def run():
+        async with pool.session(key="Washington, DC", state={"city": "DC"}) as session_id:
+            assert service.sessions[session_id] == ("crime_app", "crime_user", {"city": "DC"})
+        return session_id
+
+    session_id = asyncio.run(run())
+    assert session_id not in service.sessions
+    assert pool.stats()["live"] == 0 and pool.stats()["kept"] == 0
+
+
+def test_evict_deletes_the_session_when_the_run_raises():
+    pool, service = _pool()
+
+    async def run():
+        async with pool.session() as session_id:
+            assert session_id in service.sessions
+            raise ValueError("model failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert service.sessions == {} and pool.counters["deleted"] == 1
+
+
+def test_reuse_hands_back_the_same_session_per_key_until_max_reuses():
+    pool, service = _pool("reuse")
+
+    async def run():
+        ids = []
+        for key in ["DC", "DC", "Seattle", "DC", "DC"]:
+            async with pool.session(key=key) as session_id:
+                ids.append(session_id)
+        return ids
+
+    dc1, dc2, seattle, dc3, dc4 = asyncio.run(run())
+    assert dc1 == dc2 == dc3 != seattle
+    assert dc4 != dc3  # replaced after max_reuses runs
+    assert dc3 not in service.sessions and set(service.sessions) == {seattle, dc4}
+    assert pool.counters["reused"] == 2
+
+
+def test_reuse_replaces_a_session_whose_run_failed_and_busy_keys_get_a_throwaway():
+    pool, service = _pool("reuse")
+
+    async def run():
+        with pytest.raises(ValueError):
+            async with pool.session(key="DC") as failed:
+                raise ValueError("model failed")
+        async with pool.session(key="DC") as outer:
+            async with pool.session(key="DC") as inner:  # concurrent run for a busy key
+                assert inner != outer
+            assert inner not in service.sessions
+        return failed, outer
+
+    failed, outer = asyncio.run(run())
+    assert failed not in service.sessions and failed != outer
+    assert set(service.sessions) == {outer}
+
+
+def test_clear_deletes_every_kept_session():
+    pool, service = _pool("reuse")
+
+    async def run():
+        for key in ("DC", "Seattle", "Denver"):
+            async with pool.session(key=key):
+                pass
+        assert len(service.sessions) == 3
+        await pool.clear()
+
+    asyncio.run(run())
+    assert service.sessions == {} and pool.stats()["kept"] == 0
+
+
+def test_failed_cleanup_does_not_fail_the_run():
+    pool, service = _pool(fail_deletes=True)
+
+    async def run():
+        async with pool.session() as session_id:
+            return session_id
+
+    assert asyncio.run(run()) in service.sessions
+    assert pool.counters["deleted"] == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        SessionPool(FakeSessionService(), app_name="a", user_id="u", mode="forever")
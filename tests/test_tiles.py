@@ -0,0 +1,131 @@
+import struct
+
+import pytest
+
+from models import Incident
+from tiles import EXTENT, LAYER_NAME, TileIndex, encode_tile, lnglat_to_world, tile_for
+
+
+def _varint(buf: bytes, i: int):
+    shift = value = 0
+    while True:
+        b = buf[i]
+        value |= (b & 0x7F) << shift
+        i += 1
+        if not b & 0x80:
+            return value, i
+        shift += 7
+
+
+def _fields(buf: bytes):
+    """(field number, value) pairs of one protobuf message; length-delimited values as bytes."""
+    i, out = 0, []
+    while i < len(buf):
+        key, i = _varint(buf, i)
+        num, wire = key >> 3, key & 7
+        if wire == 0:
+            value, i = _varint(buf, i)
+        elif wire == 2:
+            size, i = _varint(buf, i)
+            value, i = buf[i:i + size], i + size
+        elif wire == 5:
+            value, i = struct.unpack("<f", buf[i:i + 4])[0], i + 4
+        else:
+            raise AssertionError(f"unexpected wire type {wire}")
+        out.append((num, value))
+    return out
+
+
+def _unzigzag(v: int) -> int:
+    return (v >> 1) ^ -(v & 1)
+
+
+def _decode(tile: bytes):
+    """Layer name, extent and [(x, y, properties)] of a single-layer point tile."""
+    (num, layer), = _fields(tile)
+    assert num == 3
+    fields = _fields(layer)
+    keys = [v.decode() for n, v in fields if n == 3]
+    values = []
+    for n, v in fields:
+        if n == 4:
+            (kind, raw), = _fields(v)
+            values.append(raw.decode() if kind == 1 else _unzigzag(raw) if kind == 6 else raw)
+    features = []
+    for n, v in fields:
+        if n != 2:
+            continue
+        feat = dict(_fields(v))
+        tags, tag_ids, i = feat[2], [], 0
+        while i < len(tags):
+            t, i = _varint(tags, i)
+            tag_ids.append(t)
+        props = {keys[k]: values[val] for k, val in zip(tag_ids[::2], tag_ids[1::2])}
+        geom, i = feat[4], 0
+        cmd, i = _varint(geom, i)
+        assert cmd == (1 << 3) | 1 and feat[3] == 1  # one MoveTo, Point
+        x, i = _varint(geom, i)
+        y, i = _varint(geom, i)
+        features.append((_unzigzag(x), _unzigzag(y), props))
+    name = next(v.decode() for n, v in fields if n == 1)
+    extent = next(v for n, v in fields if n == 5)
+    return name, extent, features
+
+
+def _incident(inc_id: str, lat=38.9, lng=-77.03, status="active", version=1) -> Incident:
+    return Incident(id=inc_id, type="crime", status=status, lat=lat, lng=lng,
+                    severity=0.5, confidence=0.75, version=version)
+
+
+def _tile_of(inc: Incident, z: int):
+    return tile_for(*lnglat_to_world(inc.lng, inc.lat), z)
+
+
+def test_encode_tile_round_trips():
+    tile = encode_tile([(10, 4000, {"id": "a", "version": 3, "severity": 0.5}), (-5, 20, {"id": "b", "version": 3})])
+    name, extent, features = _decode(tile)
+    assert (name, extent) == (LAYER_NAME, EXTENT)
+    assert features == [(10, 4000, {"id": "a", "version": 3, "severity": 0.5}), (-5, 20, {"id": "b", "version": 3})]
+
+
+def test_tile_contains_incident_and_is_cached():
+    index = TileIndex()
+    inc = _incident("crime-1")
+    index.apply([(None, inc)], version=1)
+    x, y = _tile_of(inc, 14)
+
+    etag, data = index.get_tile(14, x, y)
+    _, _, features = _decode(data)
+    assert [f[2]["id"] for f in features] == ["crime-1"]
+    assert features[0][2]["status"] == "active"
+    assert 0 <= features[0][0] < EXTENT and 0 <= features[0][1] < EXTENT
+    assert etag == f'"1-14-{x}-{y}"'
+    assert index.get_tile(14, x, y) == (etag, data)
+    assert index.hits == 1
+    assert index.get_tile(14, x + 2, y)[1] == b""
+
+
+def test_change_invalidates_only_covering_tiles():
+    index = TileIndex()
+    here, there = _incident("crime-1"), _incident("crime-2", lat=40.7, lng=-74.0)
+    index.apply([(None, here), (None, there)], version=1)
+    tile_here, tile_there = _tile_of(here, 12), _tile_of(there, 12)
+    etag_there, _ = index.get_tile(12, *tile_there)
+    index.get_tile(12, *tile_here)
+
+    index.apply([(here, here.model_copy(update={"severity": 0.9, "version": 2}))], version=2)
+    assert index.get_tile(12, *tile_there)[0] == etag_there  # untouched tile still cached
+    etag_here, data = index.get_tile(12, *tile_here)
+    assert etag_here.startswith('"2-')
+    assert _decode(data)[2][0][2]["severity"] == pytest.approx(0.9)
+
+
+def test_resolved_incidents_leave_the_map():
+    index = TileIndex()
+    inc = _incident("crime-1")
+    index.apply([(None, inc)], version=1)
+    x, y = _tile_of(inc, 10)
+    assert index.get_tile(10, x, y)[1]
+
+    index.apply([(inc, inc.model_copy(update={"status": "resolved", "version": 2}))], version=2)
+    assert index.get_tile(10, x, y) == ('"2-10-%d-%d"' % (x, y), b"")